@@ -0,0 +1,98 @@
+"""
+Hot LapY - AI opponent benchmark
+
+Fits the racing line of the default track from scratch and loads it from the
+cache, then times the pure pursuit controller per call and a full AI car
+step (controller, physics and wall collisions) with 20 opponents on track.
+Finally has the controller drive the player's car for five laps and compares
+its lap times with the simple waypoint driver's.
+
+Run from the repository root:
+    python benchmarks/bench_ai.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hot_lap import DEFAULT_TRACK_PATH, PHYSICS_HZ, PurePursuitDriver, RacingLine, Simulation, Track, WaypointDriver
+
+
+OPPONENT_COUNT = 20
+TIMED_TICKS = 2000
+LAPS = 5
+
+
+def time_line(track: Track) -> tuple:
+    """Time fitting the racing line and loading it from a fresh cache. Returns milliseconds for both."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        RacingLine.load(track, cache_dir)
+        fitted = time.perf_counter()
+        RacingLine.load(track, cache_dir)
+        loaded = time.perf_counter()
+    return (fitted - start) * 1e3, (loaded - fitted) * 1e3
+
+
+def time_opponents(track: Track) -> tuple:
+    """Run a race with OPPONENT_COUNT AI cars. Returns microseconds per car per tick for the
+    controller alone and for the whole AI step."""
+    simulation = Simulation(track)
+    simulation.add_opponents(OPPONENT_COUNT)
+    opponents = simulation.opponents
+    dt = simulation.dt
+
+    drive_time = 0.0
+    step_time = 0.0
+    for _ in range(TIMED_TICKS):
+        start = time.perf_counter()
+        for opponent in opponents:
+            opponent.driver.drive(opponent.car)
+        drive_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for opponent in opponents:
+            opponent.step(track, dt)
+        step_time += time.perf_counter() - start
+    calls = TIMED_TICKS * OPPONENT_COUNT
+    return drive_time / calls * 1e6, step_time / calls * 1e6
+
+
+def drive_laps(track: Track, driver) -> tuple:
+    """Have a driver race the player's car for LAPS laps. Returns (lap times, collision steps)."""
+    simulation = Simulation(track)
+    lap_times = []
+    collisions = 0
+    for _ in range(LAPS * 60 * PHYSICS_HZ):
+        result = simulation.step(driver(simulation))
+        collisions += result.collision
+        if result.lap_completed:
+            lap_times.append(simulation.timer.last_lap_time)
+            if len(lap_times) == LAPS:
+                break
+    return lap_times, collisions
+
+
+def main():
+    """Run the racing line, controller and lap time measurements."""
+    track = Track.load(DEFAULT_TRACK_PATH)
+    fit_ms, load_ms = time_line(track)
+    line = track.get_racing_line()
+    print(f"Racing line: {line.count} points over {line.get_length():.0f} px, "
+          f"fitted in {fit_ms:.0f} ms, loaded from cache in {load_ms:.1f} ms")
+
+    drive_us, step_us = time_opponents(track)
+    print(f"{OPPONENT_COUNT} AI cars: controller {drive_us:.1f} us, full step {step_us:.1f} us per car per tick")
+
+    for name, driver in (("Waypoint driver", WaypointDriver(track.waypoints)),
+                         ("Pure pursuit", PurePursuitDriver(line))):
+        lap_times, collisions = drive_laps(track, driver)
+        laps = ", ".join(f"{lap_time:.3f}" for lap_time in lap_times)
+        print(f"{name:>16}: laps {laps} s, {collisions} collision steps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Hot LapY - Reinforcement learning environment benchmark
+
+Drives HotLapEnv and a HotLapVecEnv side by side with the scripted waypoint
+driver for two laps and checks that the batched environment reproduces the
+Simulation's positions, lap times and rewards. Then times env steps per
+second for the single environment and for vectorized environments of 256 to
+16384 cars driven with random actions.
+
+Exits with status 1 if the two environments disagree.
+
+Run from the repository root:
+    python benchmarks/bench_env.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+
+from hot_lap import PHYSICS_HZ, WaypointDriver
+from hotlap_env import HotLapEnv, HotLapVecEnv
+
+
+VEC_COUNTS = (256, 1024, 4096, 16384)
+TIMED_STEPS = 200
+SINGLE_STEPS = 5000
+CHECK_LAPS = 2
+TOLERANCE = 1e-5
+
+
+def check_equivalence() -> bool:
+    """Drive both environments with the same controls. Returns True if they agree."""
+    env = HotLapEnv(max_laps=CHECK_LAPS)
+    vec_env = HotLapVecEnv(1, max_laps=CHECK_LAPS)
+    env.reset()
+    vec_env.reset()
+    driver = WaypointDriver(env.simulation.track.waypoints)
+
+    for tick in range(CHECK_LAPS * 60 * PHYSICS_HZ):
+        controls = driver(env.simulation)
+        action = (controls.throttle, controls.brake, controls.steer)
+        _, reward, terminated, _, info = env.step(action)
+        _, vec_rewards, vec_terminated, _, vec_info = vec_env.step(np.array([action]))
+
+        car = env.simulation.car
+        position_error = max(abs(car.x - vec_env.batch.x[0]), abs(car.y - vec_env.batch.y[0])) if not terminated else 0.0
+        lap_time = info['lap_time'] if info['lap_time'] is not None else np.nan
+        if (position_error > TOLERANCE or abs(reward - vec_rewards[0]) > TOLERANCE or
+                not np.allclose(lap_time, vec_info['lap_time'][0], equal_nan=True) or terminated != vec_terminated[0]):
+            print(f"Environments disagree at tick {tick}")
+            return False
+        if info['lap_time'] is not None:
+            print(f"Lap {info['laps_completed']}: {info['lap_time']:.3f}s in both environments")
+        if terminated:
+            return True
+    print("The waypoint driver did not finish its laps")
+    return False
+
+
+def time_vec_env(count: int, rng: np.random.Generator) -> float:
+    """Step count environments with random actions. Returns env steps per second."""
+    env = HotLapVecEnv(count)
+    env.reset()
+    actions = np.column_stack([rng.uniform(0.0, 1.0, count), (rng.uniform(0.0, 1.0, count) < 0.1).astype(float),
+                               rng.uniform(-1.0, 1.0, count)])
+    start = time.perf_counter()
+    for _ in range(TIMED_STEPS):
+        env.step(actions)
+    return count * TIMED_STEPS / (time.perf_counter() - start)
+
+
+def time_single_env() -> float:
+    """Step the single environment. Returns env steps per second."""
+    env = HotLapEnv()
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(SINGLE_STEPS):
+        env.step((1.0, 0.0, 0.3))
+    return SINGLE_STEPS / (time.perf_counter() - start)
+
+
+def main():
+    """Run the equivalence check and the timing, exiting non-zero if the environments disagree."""
+    matches = check_equivalence()
+
+    rng = np.random.default_rng(1234)
+    print(f"\n{'envs':>8} {'steps/s':>12}")
+    print(f"{1:>8} {time_single_env():>12,.0f}  (HotLapEnv)")
+    for count in VEC_COUNTS:
+        print(f"{count:>8} {time_vec_env(count, rng):>12,.0f}")
+
+    if not matches:
+        raise SystemExit("HotLapVecEnv does not match HotLapEnv")
+
+
+if __name__ == "__main__":
+    main()
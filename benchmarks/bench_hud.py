@@ -0,0 +1,96 @@
+"""
+Hot LapY - HUD render benchmark
+
+Times one frame of HUD drawing (timer panel, lap counter and controls help)
+with GameUI's cached panels and glyph atlas versus a reference that renders
+everything per frame the way the HUD used to (fresh SRCALPHA panels and
+font.render for every string).
+
+Run from the repository root:
+    python benchmarks/bench_hud.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from hot_lap import GameUI, LapTimer, SCREEN_HEIGHT, SCREEN_WIDTH, UI_MARGIN, WHITE
+
+
+FRAMES = 3000
+FPS = 60
+
+
+def draw_panel_uncached(ui: GameUI, screen: pygame.Surface, rect: pygame.Rect):
+    """Reference: build and blit a fresh SRCALPHA panel."""
+    panel = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
+    pygame.draw.rect(panel, ui.box_bg_color, (0, 0, rect.width, rect.height), border_radius=ui.border_radius)
+    pygame.draw.rect(panel, ui.border_color, (0, 0, rect.width, rect.height),
+                     width=ui.border_width, border_radius=ui.border_radius)
+    screen.blit(panel, rect.topleft)
+
+
+def draw_hud_uncached(ui: GameUI, screen: pygame.Surface, timer: LapTimer):
+    """Reference: the per-frame HUD drawing without any caching."""
+    lines = [ui.font.render(f"Time: {ui.format_time(timer.get_current_time())}", True, WHITE),
+             ui.font.render(f"Best: {ui.format_time(timer.best_time)}", True, WHITE),
+             ui.font.render(f"Last: {ui.format_time(timer.last_lap_time)}", True, WHITE)]
+    height = lines[0].get_height() * 3 + ui.box_margin * 2 + ui.box_padding * 2
+    draw_panel_uncached(ui, screen, pygame.Rect(UI_MARGIN, UI_MARGIN, 100 + ui.box_padding * 2, height))
+    for row, line in enumerate(lines):
+        screen.blit(line, (UI_MARGIN + ui.box_padding,
+                           UI_MARGIN + ui.box_padding + (line.get_height() + ui.box_margin) * row))
+
+    lap_text = ui.font.render(f"Lap: {timer.lap_count}", True, WHITE)
+    lap_rect = pygame.Rect(0, UI_MARGIN, lap_text.get_width() + ui.box_padding * 2,
+                           lap_text.get_height() + ui.box_padding * 2)
+    lap_rect.right = SCREEN_WIDTH - UI_MARGIN
+    draw_panel_uncached(ui, screen, lap_rect)
+    screen.blit(lap_text, (lap_rect.x + ui.box_padding, lap_rect.y + ui.box_padding))
+
+    controls_text = ui.small_font.render("Press R to Reset", True, WHITE)
+    screen.blit(controls_text, (SCREEN_WIDTH // 2 - controls_text.get_width() // 2, SCREEN_HEIGHT - 30))
+
+
+def draw_hud_cached(ui: GameUI, screen: pygame.Surface, timer: LapTimer):
+    """The HUD as drawn by the game."""
+    ui.draw_timer_info(screen, timer)
+    ui.draw_lap_counter(screen, timer)
+    ui.draw_controls_help(screen)
+
+
+def run_frames(screen: pygame.Surface, ui: GameUI, draw_hud) -> float:
+    """Draw FRAMES HUD frames with a running lap clock; return mean ms per frame."""
+    timer = LapTimer(1.0 / FPS)
+    timer.start_timing()
+    timer.best_time = 42.17
+    timer.last_lap_time = 43.5
+
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        timer.update(frame / FPS)
+        draw_hud(ui, screen, timer)
+    return (time.perf_counter() - start) / FRAMES * 1e3
+
+
+def main():
+    """Run the benchmark and print mean HUD time per frame."""
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    ui = GameUI()
+
+    uncached = run_frames(screen, ui, draw_hud_uncached)
+    cached = run_frames(screen, ui, draw_hud_cached)
+    print(f"uncached: {uncached:.3f} ms/frame")
+    print(f"cached:   {cached:.3f} ms/frame ({uncached / cached:.1f}x)")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Hot LapY - Engine pitch bank benchmark
+
+Measures frame time jitter of the simulation + engine audio update with
+per-change resampling (the old path), with the pre-rendered pitch bank and
+with the block-streaming synthesizer, and reports how much memory the bank
+holds. Uses SDL's dummy audio driver
+unless another one is configured.
+
+Run from the repository root:
+    python benchmarks/bench_pitch_bank.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from hot_lap import (
+    AudioManager, DriverInput, EngineSynthesizer, GameAssets, SCREEN_HEIGHT, SCREEN_WIDTH, Simulation
+)
+
+
+FRAMES = 1800  # 30 seconds at 60 FPS
+
+
+def driver_pattern(frame: int) -> DriverInput:
+    """Repeatedly accelerate and brake so engine pitch sweeps up and down."""
+    phase = frame % 300
+    if phase < 200:
+        return DriverInput(throttle=1.0)
+    return DriverInput(brake=1.0)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    """Get a percentile of pre-sorted samples."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def measure(assets: GameAssets, use_pitch_bank: bool, streaming: bool = False) -> list:
+    """Run FRAMES frames of simulation + audio and return sorted frame times in ms."""
+    start = time.perf_counter()
+    audio = AudioManager(assets, use_pitch_bank=use_pitch_bank, streaming=streaming)
+    setup_time = time.perf_counter() - start
+
+    simulation = Simulation()
+    frame_times = []
+    for frame in range(FRAMES):
+        start = time.perf_counter()
+        simulation.step(driver_pattern(frame))
+        audio.update_engine_sound(simulation.car)
+        frame_times.append((time.perf_counter() - start) * 1e3)
+
+    audio.reset()
+    if audio.pitch_bank is not None:
+        bank = audio.pitch_bank
+        print(f"pitch bank: {len(bank.sounds)} steps, {bank.memory_bytes / 1024:.0f} KiB, "
+              f"built in {setup_time * 1e3:.0f} ms, {bank.misses} resamples total")
+    return sorted(frame_times)
+
+
+def main():
+    """Run both audio paths and print frame time statistics."""
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    assets = GameAssets()
+
+    results = [("resample", measure(assets, False)), ("pitch bank", measure(assets, True)),
+               ("stream", measure(assets, False, streaming=True))]
+    print(f"{'path':>12} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, times in results:
+        print(f"{name:>12} {sum(times) / len(times):>8.3f} {percentile(times, 0.5):>8.3f} "
+              f"{percentile(times, 0.99):>8.3f} {times[-1]:>8.3f}")
+
+    # Frame loops above outrun the mixer, so time the synthesizer's per-block work directly
+    synthesizer = EngineSynthesizer(assets.original_engine_sound)
+    blocks = 1000
+    start = time.perf_counter()
+    for block in range(blocks):
+        synthesizer.render_block(0.8 + (block % 100) / 80)
+    block_time = (time.perf_counter() - start) / blocks
+    block_ms = synthesizer.block_frames / 44.1
+    print(f"stream block: {block_time * 1e3:.3f} ms to render {block_ms:.1f} ms of audio")
+
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Hot LapY - Replay determinism check and benchmark
+
+Records a session of seeded random key presses (held for a fraction of a
+second each, with a reset halfway through) on the default track into an
+InputLog. The log, with the track and collision mode it was recorded in, is
+round-tripped through the binary replay format and re-simulated on two fresh
+Simulations, which must both end in the recorded state. A log with some
+inputs changed must not. Also reports how many times real-time a replay runs.
+
+Exits with status 1 if a replay diverges from the recording.
+
+Run from the repository root:
+    python benchmarks/bench_replay.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hot_lap import DEFAULT_TRACK_PATH, DriverInput, InputLog, Simulation, Track
+
+
+SESSION_SECONDS = 60
+SEED = 11
+
+
+def get_key_presses(rng: random.Random) -> int:
+    """Pick the keys held for the next stretch of the session, as input bits."""
+    bits = InputLog.THROTTLE_BIT if rng.random() < 0.8 else 0
+    if rng.random() < 0.1:
+        bits |= InputLog.BRAKE_BIT
+    return bits | rng.choice((0, 0, InputLog.LEFT_BIT, InputLog.RIGHT_BIT))
+
+
+def record_session(track: Track) -> InputLog:
+    """Drive and record a session of random key presses, resetting halfway through."""
+    simulation = Simulation(track)
+    log = InputLog(simulation.dt, track.source_hash)
+    rng = random.Random(SEED)
+    tick_count = round(SESSION_SECONDS / simulation.dt)
+    bits, held = 0, 0
+    for tick in range(tick_count):
+        if held == 0:
+            bits, held = get_key_presses(rng), rng.randint(5, 40)
+        held -= 1
+        controls = DriverInput(reset=True) if tick == tick_count // 2 else InputLog.decode(bits)
+        log.record(controls)
+        simulation.step(controls)
+    log.final_checksum = simulation.get_state_checksum()
+    print(f"Recorded {log.tick_count} ticks ({len(log.runs)} input runs, {len(log.to_bytes())} bytes)")
+    return log
+
+
+def replay(track: Track, log: InputLog) -> tuple:
+    """Replay a log on a fresh Simulation. Returns (matches the recording, seconds taken)."""
+    start = time.perf_counter()
+    matches = Simulation(track).replay(log)
+    return matches, time.perf_counter() - start
+
+
+def main():
+    """Record, round-trip and replay a session, exiting non-zero if a replay diverges."""
+    track = Track.load(DEFAULT_TRACK_PATH)
+    recorded = record_session(track)
+    log = InputLog.from_bytes(recorded.to_bytes())
+    failures = 0
+    if log.runs != recorded.runs or log.tick_count != recorded.tick_count or \
+            log.final_checksum != recorded.final_checksum or log.track_hash != track.source_hash or \
+            log.image_collision != recorded.image_collision:
+        print("The replay format does not round-trip the log")
+        failures += 1
+
+    for run in (1, 2):
+        matches, seconds = replay(track, log)
+        failures += not matches
+        print(f"Replay {run}: {'matches' if matches else 'DIVERGES FROM'} the recording, "
+              f"{log.tick_count * log.dt / seconds:.0f}x real-time")
+
+    # A changed input has to show up in the checksum
+    tampered = InputLog.from_bytes(recorded.to_bytes())
+    reset_run = next(index for index, (bits, _) in enumerate(tampered.runs) if bits & InputLog.RESET_BIT)
+    # Steer through the longest run after the reset (which would erase earlier changes)
+    changed = max(range(reset_run + 1, len(tampered.runs)), key=lambda index: tampered.runs[index][1])
+    tampered.runs[changed][0] ^= InputLog.LEFT_BIT
+    if replay(track, tampered)[0]:
+        print("A replay with a changed input still matched the recording")
+        failures += 1
+
+    if failures:
+        raise SystemExit("Replays do not reproduce the recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Hot LapY - Ray sensor benchmark
+
+Casts the default fan of rays from 10000 cars at random positions and
+headings and reports rays per second for:
+
+- the built-in track (a handful of walls, tested directly),
+- tracks with 100, 300 and 1000 random walls, walking the wall grid index,
+  against testing every wall (the two must agree exactly),
+- the track image distance field (sphere tracing), with its error against
+  marching each ray in 0.25 px steps.
+
+Exits with status 1 if the grid walk disagrees with the per-wall test.
+
+Run from the repository root:
+    python benchmarks/bench_sensors.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from hot_lap import SCREEN_HEIGHT, SCREEN_WIDTH, Track
+from sensors import RaySensors, get_screen_exit
+from track_field import TrackField
+
+
+CAR_COUNT = 10000
+WALL_COUNTS = (100, 300, 1000)
+MARCH_STEP = 0.25
+
+
+def make_wall_track(count: int, rng: random.Random) -> Track:
+    """Create a screen-sized track with count short random walls."""
+    walls = []
+    for _ in range(count):
+        x, y, length = rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), rng.randint(10, 80)
+        walls.append(pygame.Rect(x, y, length, 10) if rng.random() < 0.5 else pygame.Rect(x, y, 10, length))
+    return Track(walls=walls)
+
+
+def time_cast(sensors: RaySensors, cars: tuple, cast=None) -> tuple:
+    """Cast every car's rays (with cast(origin_x, origin_y, direction_x, direction_y, limit) if given).
+    Returns (distances, rays per second)."""
+    center_x, center_y, heading = cars
+    if cast is None:
+        sensors.cast(center_x, center_y, heading)  # Warm up
+        start = time.perf_counter()
+        distances = sensors.cast(center_x, center_y, heading)
+    else:
+        angles = (np.radians(heading)[:, None] + sensors.offsets).ravel()
+        origin_x = np.repeat(center_x, len(sensors.offsets))
+        origin_y = np.repeat(center_y, len(sensors.offsets))
+        direction_x, direction_y = np.sin(angles), -np.cos(angles)
+        limit = np.minimum(get_screen_exit(origin_x, origin_y, direction_x, direction_y), sensors.max_distance)
+        start = time.perf_counter()
+        distances = cast(origin_x, origin_y, direction_x, direction_y, limit).reshape(len(center_x), -1)
+    return distances, distances.size / (time.perf_counter() - start)
+
+
+def march_field(sensors: RaySensors, cars: tuple) -> np.ndarray:
+    """Reference: march each ray through the distance field in small fixed steps."""
+    center_x, center_y, heading = cars
+    angles = np.radians(heading)[:, None] + sensors.offsets
+    direction_x, direction_y = np.sin(angles), -np.cos(angles)
+    origin_x, origin_y = np.broadcast_to(center_x[:, None], angles.shape), np.broadcast_to(center_y[:, None], angles.shape)
+    limit = np.minimum(get_screen_exit(origin_x, origin_y, direction_x, direction_y), sensors.max_distance)
+    distances = limit.copy()
+    hit = np.zeros(angles.shape, dtype=bool)
+    for along in np.arange(0.0, sensors.max_distance, MARCH_STEP):
+        off_road = sensors.field.get_distances(origin_x + direction_x * along, origin_y + direction_y * along) <= 0
+        first = off_road & ~hit & (along < limit)
+        distances[first] = along
+        hit |= first
+    return distances
+
+
+def make_cars(rng: np.random.Generator, field: TrackField = None) -> tuple:
+    """Scatter CAR_COUNT car centers over the screen (on the road, given a field) with random headings."""
+    if field is None:
+        center_x, center_y = rng.uniform(0, SCREEN_WIDTH, CAR_COUNT), rng.uniform(0, SCREEN_HEIGHT, CAR_COUNT)
+    else:
+        rows, columns = np.nonzero(field.distance > 0)
+        picks = rng.integers(0, len(rows), CAR_COUNT)
+        center_x, center_y = columns[picks] + 0.5, rows[picks] + 0.5
+    return center_x, center_y, rng.uniform(0, 360, CAR_COUNT)
+
+
+def main():
+    """Run the timing and accuracy checks, exiting non-zero if the grid walk is wrong."""
+    rng = np.random.default_rng(1234)
+    cars = make_cars(rng)
+    mismatches = 0
+    print(f"{CAR_COUNT} cars x {len(RaySensors(Track()).offsets)} rays")
+
+    _, rays_per_second = time_cast(RaySensors(Track()), cars)
+    print(f"  built-in track ({len(Track().walls)} walls):  {rays_per_second / 1e6:6.2f} M rays/s")
+
+    wall_rng = random.Random(1234)
+    for count in WALL_COUNTS:
+        sensors = RaySensors(make_wall_track(count, wall_rng))
+        grid, grid_rate = time_cast(sensors, cars, sensors.walk_grid)
+        every_wall, every_wall_rate = time_cast(sensors, cars, sensors.test_walls)
+        error = np.abs(grid - every_wall).max()
+        mismatches += error > 1e-9
+        print(f"  {count} walls: grid {grid_rate / 1e6:6.2f} M rays/s, every wall {every_wall_rate / 1e6:6.2f} M rays/s "
+              f"(max difference {error:.1e} px)")
+
+    track = Track()
+    track.use_image_collision(TrackField.load(track.image_path))
+    sensors = RaySensors(track)
+    field_cars = make_cars(rng, track.field)
+    traced, rays_per_second = time_cast(sensors, field_cars)
+    error = np.abs(traced - march_field(sensors, field_cars))
+    print(f"  track image field: {rays_per_second / 1e6:6.2f} M rays/s "
+          f"(error vs marching: mean {error.mean():.2f} px, p99 {np.percentile(error, 99):.2f} px)")
+
+    if mismatches:
+        raise SystemExit("The grid walk disagrees with testing every wall")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Hot LapY - Spatial index benchmark
+
+Compares the uniform-grid wall index against a linear scan of every wall
+for tracks with 10, 100, 1000 and 10000 wall segments. Walls are spread
+over a world that grows with the wall count, like a longer circuit would.
+
+Run from the repository root:
+    python benchmarks/bench_spatial_index.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import pygame
+
+from hot_lap import CAR_HEIGHT, CAR_WIDTH, SpatialGrid
+
+
+WALL_COUNTS = (10, 100, 1000, 10000)
+QUERY_COUNT = 20000
+
+
+def make_walls(count: int, rng: random.Random) -> tuple:
+    """Create count thin wall segments over a world sized for constant density."""
+    world_size = int(800 * max(1.0, (count / 10) ** 0.5))
+    walls = []
+    for _ in range(count):
+        length = rng.randint(20, 200)
+        x = rng.randint(0, world_size)
+        y = rng.randint(0, world_size)
+        if rng.random() < 0.5:
+            walls.append(pygame.Rect(x, y, length, 10))
+        else:
+            walls.append(pygame.Rect(x, y, 10, length))
+    return walls, world_size
+
+
+def make_queries(world_size: int, rng: random.Random) -> list:
+    """Create swept car bounding boxes (car rect moved by up to MAX_SPEED)."""
+    queries = []
+    for _ in range(QUERY_COUNT):
+        car = pygame.Rect(rng.randint(0, world_size), rng.randint(0, world_size), CAR_WIDTH, CAR_HEIGHT)
+        queries.append(car.union(car.move(rng.randint(-8, 8), rng.randint(-8, 8))))
+    return queries
+
+
+def linear_scan(walls: list, area: pygame.Rect) -> list:
+    """Reference: test every wall."""
+    return [index for index, wall in enumerate(walls) if area.colliderect(wall)]
+
+
+def main():
+    """Run the benchmark and print per-query timings."""
+    rng = random.Random(1234)
+    print(f"{'walls':>8} {'build ms':>10} {'linear us':>10} {'grid us':>10} {'speedup':>8}")
+
+    for count in WALL_COUNTS:
+        walls, world_size = make_walls(count, rng)
+        queries = make_queries(world_size, rng)
+
+        start = time.perf_counter()
+        index = SpatialGrid(walls)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        linear_results = [linear_scan(walls, area) for area in queries]
+        linear_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        grid_results = [index.colliding(area) for area in queries]
+        grid_time = time.perf_counter() - start
+
+        if linear_results != grid_results:
+            raise SystemExit(f"Grid results differ from linear scan for {count} walls")
+
+        print(f"{count:>8} {build_time * 1e3:>10.2f} {linear_time / QUERY_COUNT * 1e6:>10.2f} "
+              f"{grid_time / QUERY_COUNT * 1e6:>10.2f} {linear_time / grid_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Hot LapY - Sector split and live delta check
+
+Drives the scripted waypoint driver for three laps and follows the live delta
+to the best lap every tick. Before a lap's first split the delta must be
+unknown (None) or positive (behind the best lap's first split), and at each
+split it must equal the split's difference to the best lap's. Prints the
+splits, sector times and delta of each lap.
+
+Exits with status 1 if the delta goes wrong.
+
+Run from the repository root:
+    python benchmarks/bench_splits.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hot_lap import DEFAULT_TRACK_PATH, PHYSICS_HZ, Simulation, Track, WaypointDriver
+
+
+LAPS = 3
+
+
+def main():
+    """Drive LAPS laps, checking the live delta every tick."""
+    track = Track.load(DEFAULT_TRACK_PATH)
+    simulation = Simulation(track)
+    driver = WaypointDriver(track.waypoints)
+    timer = simulation.timer
+    failures = 0
+    for _ in range(LAPS * 60 * PHYSICS_HZ):
+        best_splits = list(timer.best_splits)
+        split_count = len(timer.current_splits)
+        result = simulation.step(driver(simulation))
+        delta = timer.delta_to_best
+
+        if result.lap_completed:
+            splits = timer.last_splits
+            sectors = ", ".join(f"{sector:.3f}" for sector in timer.get_sector_times(splits))
+            print(f"Lap {timer.lap_count - 1}: {timer.last_lap_time:.3f}s, sectors {sectors}")
+            if timer.lap_count > LAPS:
+                break
+        elif len(timer.current_splits) > split_count and split_count < len(best_splits):
+            expected = timer.current_splits[-1] - best_splits[split_count]
+            print(f"  split {split_count + 1}: {timer.current_splits[-1]:.3f}s, delta {delta:+.3f}s")
+            if delta is None or abs(delta - expected) > 1e-9:
+                print(f"The delta at split {split_count + 1} is {delta}, not {expected:+.3f}")
+                failures += 1
+        elif not timer.current_splits and best_splits and delta is not None and delta < 0:
+            print(f"Lap {timer.lap_count}: delta {delta:+.3f}s before the first split")
+            failures += 1
+    else:
+        print(f"The driver did not finish {LAPS} laps")
+        failures += 1
+
+    if failures:
+        raise SystemExit("The live delta to the best lap is wrong")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""
+Hot LapY - Vectorized multi-car physics
+
+Structure-of-arrays version of the Car physics model that steps N cars in a
+single NumPy pass. It reproduces the same progressive inputs, torque curve,
+traction, engine braking and automatic gear logic as ``hot_lap.Car`` so that
+parameter sweeps and AI training can run thousands of cars per step.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from hot_lap import (
+    CAR_HEIGHT, CAR_WIDTH, COLLISION_EPSILON, CONTACT_SPEED_KEEP, REFERENCE_DT, SCREEN_HEIGHT, SCREEN_WIDTH, Car, CarParams
+)
+
+
+# Gear lookup tables are indexed by gear + 1 (reverse = -1 ... fifth = 5)
+GEAR_OFFSET = 1
+
+
+def get_gear_table(table: dict, default: float) -> np.ndarray:
+    """Get a per-gear parameter table as an array indexed by gear + GEAR_OFFSET."""
+    return np.array([table.get(gear, default) for gear in range(-1, 6)], dtype=float)
+
+
+def segment_crossings(start_x: np.ndarray, start_y: np.ndarray, end_x: np.ndarray, end_y: np.ndarray,
+                      segments: np.ndarray) -> np.ndarray:
+    """Vectorized hot_lap.segment_crossing of N moves against S line segments given as
+    rows of (x1, y1, x2, y2). Returns an (N, S) array of fractions, NaN where not crossed."""
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    move_x = (end_x - start_x)[:, None]
+    move_y = (end_y - start_y)[:, None]
+    line_x = segments[:, 2] - segments[:, 0]
+    line_y = segments[:, 3] - segments[:, 1]
+    offset_x = segments[:, 0] - start_x[:, None]
+    offset_y = segments[:, 1] - start_y[:, None]
+
+    denominator = move_x * line_y - move_y * line_x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = (offset_x * line_y - offset_y * line_x) / denominator
+        line_fraction = (offset_x * move_y - offset_y * move_x) / denominator
+    crossed = ((denominator != 0) & (fraction > 0.0) & (fraction <= 1.0) &
+               (line_fraction >= 0.0) & (line_fraction <= 1.0))
+    return np.where(crossed, fraction, np.nan)
+
+
+def box_wall_overlaps(center_x: np.ndarray, center_y: np.ndarray, sin_angle: np.ndarray, cos_angle: np.ndarray,
+                      walls: np.ndarray) -> np.ndarray:
+    """Vectorized separating axis test of N rotated car boxes against S axis-aligned walls given
+    as rows of (x, y, width, height), like hot_lap.get_wall_overlap. Returns an (N, S) bool array."""
+    walls = np.asarray(walls, dtype=float).reshape(-1, 4)
+    half_wall_width = walls[:, 2] / 2
+    half_wall_height = walls[:, 3] / 2
+    offset_x = center_x[:, None] - (walls[:, 0] + half_wall_width)
+    offset_y = center_y[:, None] - (walls[:, 1] + half_wall_height)
+    sin_angle = sin_angle[:, None]
+    cos_angle = cos_angle[:, None]
+    abs_sin = np.abs(sin_angle)
+    abs_cos = np.abs(cos_angle)
+    epsilon = COLLISION_EPSILON
+
+    # World axes: car bounds against the wall's extents
+    overlapping = np.abs(offset_x) < abs_cos * CAR_WIDTH / 2 + abs_sin * CAR_HEIGHT / 2 + half_wall_width - epsilon
+    overlapping &= np.abs(offset_y) < abs_sin * CAR_WIDTH / 2 + abs_cos * CAR_HEIGHT / 2 + half_wall_height - epsilon
+
+    # Car axes: the car's half size against the wall's projected radius
+    overlapping &= (np.abs(offset_x * cos_angle + offset_y * sin_angle) <
+                    CAR_WIDTH / 2 + abs_cos * half_wall_width + abs_sin * half_wall_height - epsilon)
+    overlapping &= (np.abs(offset_x * sin_angle - offset_y * cos_angle) <
+                    CAR_HEIGHT / 2 + abs_sin * half_wall_width + abs_cos * half_wall_height - epsilon)
+    return overlapping
+
+
+class CarBatch:
+    """N cars stored as parallel arrays and stepped together with the Car physics model."""
+
+    def __init__(self, count: int, x: float = 50.0, y: float = 280.0, params: Optional[CarParams] = None):
+        """Create count cars at the given start position with initial Car state, all sharing
+        one set of physics parameters (default CarParams unless given)."""
+        self.count = count
+        self.params = params if params is not None else CarParams()
+        self.gear_ratio_table = get_gear_table(self.params.gear_ratios, 1.0)
+        self.shift_up_table = get_gear_table(self.params.shift_up_speeds, np.inf)
+        self.shift_down_table = get_gear_table(self.params.shift_down_speeds, 0.0)
+        self.initial_x = np.full(count, float(x))
+        self.initial_y = np.full(count, float(y))
+
+        # Position and orientation
+        self.x = self.initial_x.copy()
+        self.y = self.initial_y.copy()
+        self.angle = np.zeros(count)
+        self.sin_angle = np.zeros(count)
+        self.cos_angle = np.ones(count)
+        self.previous_x = self.x.copy()
+        self.previous_y = self.y.copy()
+
+        # Contact at the end of the last step (speed is lost on impact only, as in Car)
+        self.wall_contact = np.zeros(count, dtype=bool)
+        self.edge_contact = np.zeros(count, dtype=bool)
+
+        # Physics properties
+        self.velocity = np.zeros(count)
+        self.angular_velocity = np.zeros(count)
+        self.acceleration = np.zeros(count)
+
+        # Engine state
+        self.rpm = np.full(count, float(self.params.idle_rpm))
+        self.throttle = np.zeros(count)
+        self.brake = np.zeros(count)
+        self.steering = np.zeros(count)
+        self.target_throttle = np.zeros(count)
+        self.target_brake = np.zeros(count)
+        self.throttle_rate = 1.0 / 0.6
+        self.brake_rate = 1.0 / 0.6
+
+        # Transmission state
+        self.gear = np.ones(count, dtype=np.int64)
+        self.gear_shift_timer = np.zeros(count)
+
+    @classmethod
+    def from_cars(cls, cars: list) -> 'CarBatch':
+        """Create a batch holding a copy of the state of the given Car objects (using the first car's params)."""
+        batch = cls(len(cars), params=cars[0].params if cars else None)
+        for i, car in enumerate(cars):
+            batch.set_car(i, car)
+        return batch
+
+    def set_car(self, index: int, car: Car):
+        """Copy the state of a Car into slot index."""
+        self.initial_x[index] = car.initial_x
+        self.initial_y[index] = car.initial_y
+        self.x[index] = car.x
+        self.y[index] = car.y
+        self.previous_x[index] = car.previous_x
+        self.previous_y[index] = car.previous_y
+        self.angle[index] = car.angle
+        self.sin_angle[index] = car.sin_angle
+        self.cos_angle[index] = car.cos_angle
+        self.velocity[index] = car.velocity
+        self.angular_velocity[index] = car.angular_velocity
+        self.acceleration[index] = car.acceleration
+        self.rpm[index] = car.engine_rpm
+        self.throttle[index] = car.throttle
+        self.brake[index] = car.brake
+        self.steering[index] = car.steering
+        self.target_throttle[index] = car.target_throttle
+        self.target_brake[index] = car.target_brake
+        self.gear[index] = car.current_gear
+        self.gear_shift_timer[index] = car.gear_shift_timer
+        self.wall_contact[index] = car.wall_contact
+        self.edge_contact[index] = car.edge_contact
+
+    def reset(self, mask: Optional[np.ndarray] = None):
+        """Reset all cars (or those selected by a boolean mask) to their initial state."""
+        if mask is None:
+            mask = np.ones(self.count, dtype=bool)
+        self.x[mask] = self.initial_x[mask]
+        self.y[mask] = self.initial_y[mask]
+        self.previous_x[mask] = self.initial_x[mask]
+        self.previous_y[mask] = self.initial_y[mask]
+        for array in (self.angle, self.velocity, self.angular_velocity, self.acceleration,
+                      self.throttle, self.brake, self.steering, self.target_throttle,
+                      self.target_brake, self.gear_shift_timer):
+            array[mask] = 0.0
+        self.sin_angle[mask] = 0.0
+        self.cos_angle[mask] = 1.0
+        self.rpm[mask] = self.params.idle_rpm
+        self.gear[mask] = 1
+        self.wall_contact[mask] = False
+        self.edge_contact[mask] = False
+
+    def update_progressive_inputs(self, dt: float):
+        """Move throttle and brake towards their targets (release is twice as fast)."""
+        throttle_up = np.minimum(self.target_throttle, self.throttle + self.throttle_rate * dt)
+        throttle_down = np.maximum(self.target_throttle, self.throttle - self.throttle_rate * 2.0 * dt)
+        self.throttle = np.where(self.target_throttle > self.throttle, throttle_up,
+                                 np.where(self.target_throttle < self.throttle, throttle_down, self.throttle))
+
+        brake_up = np.minimum(self.target_brake, self.brake + self.brake_rate * dt)
+        brake_down = np.maximum(self.target_brake, self.brake - self.brake_rate * 2.0 * dt)
+        self.brake = np.where(self.target_brake > self.brake, brake_up,
+                              np.where(self.target_brake < self.brake, brake_down, self.brake))
+
+    def update_engine_rpm(self, dt: float = REFERENCE_DT):
+        """Move RPM towards the throttle/wheel-speed target and clamp to the rev range."""
+        params = self.params
+        speed_rpm = params.idle_rpm + np.abs(self.velocity) * 200
+        target_rpm = speed_rpm + (self.throttle * (params.max_rpm - speed_rpm))
+
+        rpm_change_rate = 100 * (dt / REFERENCE_DT)
+        self.rpm = np.where(target_rpm > self.rpm,
+                            np.minimum(target_rpm, self.rpm + rpm_change_rate),
+                            np.maximum(target_rpm, self.rpm - rpm_change_rate * 2))
+        np.clip(self.rpm, params.idle_rpm, params.max_rpm, out=self.rpm)
+
+    def update_transmission(self, dt: float = REFERENCE_DT):
+        """Update automatic transmission logic for all cars."""
+        self.gear_shift_timer = np.where(self.gear_shift_timer > 0, self.gear_shift_timer - dt,
+                                         self.gear_shift_timer)
+
+        speed = np.abs(self.velocity)
+        ready = self.gear_shift_timer <= 0
+        index = self.gear + GEAR_OFFSET
+        shift_up = ready & (self.gear > 0) & (self.gear < 5) & (speed > self.shift_up_table[index])
+        shift_down = ready & ~shift_up & (self.gear > 1) & (self.gear <= 5) & (speed < self.shift_down_table[index])
+
+        self.gear += shift_up.astype(np.int64) - shift_down.astype(np.int64)
+        self.gear_shift_timer = np.where(shift_up | shift_down, 0.5, self.gear_shift_timer)
+
+    def calculate_traction_factor(self) -> np.ndarray:
+        """Calculate traction based on speed (simulates tire grip loss at high speeds)."""
+        params = self.params
+        speed = np.abs(self.velocity)
+        loss = np.maximum(0.3, 1.0 - (speed - params.traction_loss_speed) * 0.1)
+        return np.where(speed < params.traction_loss_speed, 1.0, loss)
+
+    def update_physics(self, dt: float = REFERENCE_DT):
+        """Update physics for all cars with the same gearing model as Car.update_physics."""
+        params = self.params
+        step_scale = dt / REFERENCE_DT
+        self.update_transmission(dt)
+
+        gear_ratio = self.gear_ratio_table[self.gear + GEAR_OFFSET]
+        abs_ratio = np.abs(gear_ratio)
+        speed = np.abs(self.velocity)
+
+        # Engine torque from the torque curve, multiplied by the gear ratio
+        rpm_factor = np.maximum(0.3, 1.0 - ((self.rpm - params.optimal_rpm) / params.max_rpm) ** 2)
+        torque = params.engine_torque_max * rpm_factor * self.throttle * abs_ratio
+        torque = np.where(self.rpm < params.idle_rpm, 0.0, torque)
+
+        # Engine power with gear efficiency
+        power_factor = np.minimum(1.0, self.rpm / params.optimal_rpm)
+        base_power = (torque * power_factor * self.rpm) / 1000
+        safe_ratio = np.where(gear_ratio != 0, abs_ratio, 1.0)
+        power = np.where(gear_ratio != 0, base_power * (0.8 + 0.2 / safe_ratio), 0.0)
+
+        engine_force = power * 0.03
+        engine_force = np.where(gear_ratio < 0, -engine_force * 0.7, engine_force)
+
+        # Speed-dependent power reduction
+        engine_force *= np.maximum(0.3, 1.0 - (speed / params.max_speed) * 0.4)
+
+        # Gear-specific top speed limitation
+        gear_max_speed = params.max_speed / np.maximum(1.0, abs_ratio * 0.8)
+        engine_force = np.where((speed > 0) & (speed > gear_max_speed), engine_force * 0.1, engine_force)
+
+        # Braking force always opposes forward motion
+        brake_force = self.brake * params.brake_force
+        brake_force = np.where(self.velocity > 0, -brake_force, brake_force)
+
+        # Natural friction/drag
+        friction_force = -self.velocity * params.deceleration * params.friction_coefficient
+
+        # Engine braking, stronger in lower gears
+        engine_braking = (self.throttle <= 0) & (speed > 0.1) & (self.gear > 0)
+        engine_brake_force = np.where(engine_braking, -self.velocity * 0.8 * ((6 - self.gear) / 5.0), 0.0)
+
+        # Total acceleration
+        traction = self.calculate_traction_factor()
+        net_force = (engine_force + brake_force) * traction + friction_force + engine_brake_force
+        self.acceleration = net_force * params.acceleration
+
+        self.velocity = np.clip(self.velocity + self.acceleration * step_scale, params.min_speed, params.max_speed)
+        speed = np.abs(self.velocity)
+
+        # Speed-dependent steering
+        speed_factor = 1.0 - np.minimum(0.7, speed / params.max_speed * params.turn_speed_factor)
+        turn_rate = params.turn_speed_base * speed_factor * traction
+        speed_multiplier = np.maximum(0.5, speed / params.max_speed + 0.5)
+        self.angular_velocity = np.where(speed > 0.05, self.steering * turn_rate * speed_multiplier, 0.0)
+
+        self.angle += self.angular_velocity * step_scale
+        radians = np.radians(self.angle)
+        self.sin_angle = np.sin(radians)
+        self.cos_angle = np.cos(radians)
+
+        # Update position based on velocity and angle
+        moving = speed > 0.01
+        distance = self.velocity * step_scale
+        self.x += np.where(moving, distance * self.sin_angle, 0.0)
+        self.y -= np.where(moving, distance * self.cos_angle, 0.0)
+
+    def apply_input(self, throttle: np.ndarray, brake: np.ndarray, steer: np.ndarray,
+                    dt: float = REFERENCE_DT) -> np.ndarray:
+        """Step all cars from per-car controls (same semantics as DriverInput). Returns engine-active mask."""
+        throttle = np.broadcast_to(np.asarray(throttle, dtype=float), (self.count,))
+        brake = np.broadcast_to(np.asarray(brake, dtype=float), (self.count,))
+        steer = np.broadcast_to(np.asarray(steer, dtype=float), (self.count,))
+        self.previous_x = self.x.copy()
+        self.previous_y = self.y.copy()
+
+        braking = brake > 0
+        braking_forward = braking & (self.velocity > 0.5)
+        reversing = braking & ~braking_forward
+
+        self.target_throttle = np.clip(throttle, -1.0, 1.0)
+        self.target_throttle = np.where(braking_forward, 0.0, self.target_throttle)
+        self.target_throttle = np.where(reversing, -1.8 * brake, self.target_throttle)
+        self.target_brake = np.where(braking_forward, np.clip(brake, 0.0, 1.0), 0.0)
+        self.steering = np.clip(steer, -1.0, 1.0)
+
+        self.update_progressive_inputs(dt)
+        self.update_engine_rpm(dt)
+        self.update_physics(dt)
+
+        return (throttle > 0) | (np.abs(self.velocity) > 0.5)
+
+    def get_line_crossings(self, segments: np.ndarray) -> np.ndarray:
+        """Get the fraction of the last step at which each car's center crossed each line
+        segment (see segment_crossings), as used for checkpoints and the start line."""
+        half_width, half_height = CAR_WIDTH / 2, CAR_HEIGHT / 2
+        return segment_crossings(self.previous_x + half_width, self.previous_y + half_height,
+                                 self.x + half_width, self.y + half_height, segments)
+
+    def get_wall_overlaps(self, walls: np.ndarray) -> np.ndarray:
+        """Get which walls each car's rotated box overlaps (see box_wall_overlaps)."""
+        return box_wall_overlaps(self.x + CAR_WIDTH / 2, self.y + CAR_HEIGHT / 2,
+                                 self.sin_angle, self.cos_angle, walls)
+
+    def handle_screen_boundaries(self, dt: float = REFERENCE_DT) -> np.ndarray:
+        """Clamp cars' rotated boxes to the screen after a step of dt seconds, losing speed in
+        contact (see get_contact_speed_keep). Returns the collision mask."""
+        half_width = np.abs(self.cos_angle) * CAR_WIDTH / 2 + np.abs(self.sin_angle) * CAR_HEIGHT / 2
+        half_height = np.abs(self.sin_angle) * CAR_WIDTH / 2 + np.abs(self.cos_angle) * CAR_HEIGHT / 2
+        center_x = self.x + CAR_WIDTH / 2
+        center_y = self.y + CAR_HEIGHT / 2
+        collided = ((center_x < half_width) | (center_x + half_width > SCREEN_WIDTH) |
+                    (center_y < half_height) | (center_y + half_height > SCREEN_HEIGHT))
+        self.x = np.clip(center_x, half_width, SCREEN_WIDTH - half_width) - CAR_WIDTH / 2
+        self.y = np.clip(center_y, half_height, SCREEN_HEIGHT - half_height) - CAR_HEIGHT / 2
+        keep = np.where(self.edge_contact, CONTACT_SPEED_KEEP ** (dt / REFERENCE_DT), CONTACT_SPEED_KEEP)
+        self.velocity = np.where(collided, self.velocity * keep, self.velocity)
+        self.edge_contact = collided
+        return collided
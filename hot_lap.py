@@ -5,16 +5,27 @@ A thrilling 2D top-down racing game built with Pygame where players race
 against the clock to set the fastest lap times on various circuits.
 """
 
+import argparse
+import hashlib
+import json
+import os
 import pygame
+import struct
+import sys
 import time
 import math
-from typing import Tuple, List, Optional
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple, List, Optional
 
 
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60                     # Render rate
+PHYSICS_HZ = 120             # Fixed physics rate, independent of render rate
+REFERENCE_DT = 1.0 / 60.0    # Time step the per-step physics constants below were tuned at
+MAX_FRAME_TIME = 0.25        # Longest frame fed to the physics accumulator (avoids spiral of death)
 
 # Colors
 BLACK = (0, 0, 0)
@@ -25,6 +36,11 @@ RED = (255, 0, 0)
 # Car settings
 CAR_WIDTH = 35
 CAR_HEIGHT = 70
+SPRITE_ANGLE_RESOLUTION = 1.0  # Degrees between cached car rotations
+MAX_COLLISION_ITERATIONS = 4   # Wall contacts resolved per step (hit, slide, hit again...)
+COLLISION_EPSILON = 1e-6       # Penetration (pixels) treated as touching
+CONTACT_SPEED_KEEP = 0.5       # Fraction of speed kept on hitting a wall or the screen edge, and per REFERENCE_DT
+                               # of staying in contact
 
 # Realistic car physics constants
 MAX_SPEED = 8.0              # Maximum forward speed
@@ -59,25 +75,69 @@ GEAR_RATIOS = {
 SHIFT_UP_SPEEDS = {1: 1.5, 2: 2.8, 3: 4.2, 4: 5.8}  # Shift up at these speeds
 SHIFT_DOWN_SPEEDS = {5: 5.0, 4: 3.5, 3: 2.2, 2: 1.0}  # Shift down below these speeds
 
+# Track settings
+TRACK_IMAGE_PATH = 'assets/images/track.png'
+DEFAULT_TRACK_PATH = 'tracks/default.json'
+DEFAULT_SPAWN = (50.0, 280.0)   # Car start position (top-left) on the built-in layout
+DEFAULT_WAYPOINTS = [(67, 100), (400, 75), (700, 100), (700, 300),   # Car center path around the
+                     (700, 500), (400, 520), (80, 500), (67, 300)]   # built-in layout, in driving order
+CACHE_DIR = '.cache'            # Compiled tracks and other derived data
+
+# Ghost car settings
+GHOST_SUFFIX = '.ghost'        # Best lap trajectory, saved next to the track file (tracks/default.ghost)
+GHOST_ALPHA = 110              # Ghost sprite opacity (0-255)
+GHOST_MAX_SECONDS = 120        # Stop recording a lap's trajectory after this long (laps display up to 60 s)
+GHOST_HZ = 60                  # Trajectory samples per second, whatever the physics rate (12 bytes each)
+
+# AI settings
+LINE_SPACING = 8.0             # Distance between racing line points (pixels)
+LINE_SMOOTHING_PASSES = 600    # Relaxation passes pulling the line through the inside of corners
+LINE_CLEARANCE = 30.0          # Closest the racing line may pass to a wall or the road edge (pixels)
+LINE_STEER_MARGIN = 0.9        # Fraction of full lock a corner may need at its target speed
+LINE_MIN_SPEED = 1.5           # Slowest target speed anywhere on the line
+LOOKAHEAD_BASE = 40.0          # Pure pursuit lookahead distance at standstill (pixels)
+LOOKAHEAD_PER_SPEED = 8.0      # Extra lookahead per unit of speed (pixels)
+BRAKING_LEAD = 6               # Line points ahead whose target speed the AI already brakes for
+OPPONENT_SPACING = 150.0       # Gap along the racing line between AI cars on the grid (pixels)
+OPPONENT_TINT = (120, 170, 255)  # Colour multiplier telling AI cars apart from the player
+
 # UI settings
 FONT_SIZE = 22
 UI_MARGIN = 10
 UI_LINE_HEIGHT = 40
 
+# Profiler settings
+PROFILE_HISTORY = 600          # Frames of timings kept for the percentiles (10 s at 60 FPS)
+PROFILE_REFRESH = 30           # Frames between overlay updates
+PROFILE_KEY = pygame.K_F3      # Toggles profiling and its overlay
+
 
 class GameAssets:
     """Handles loading and managing game assets."""
     
-    def __init__(self):
+    def __init__(self, track_image_path: str = TRACK_IMAGE_PATH):
         """Initialize and load all game assets."""
         pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=1024)  # Higher quality for pitch shifting
         
         # Load images
-        self.track_image = pygame.image.load('assets/images/track.png')
+        self.track_image = pygame.image.load(track_image_path)
         # Load and vertically flip the car image to correct orientation
         car_image_raw = pygame.image.load('assets/images/car.png')
         self.car_image = pygame.transform.flip(car_image_raw, False, True)
         
+        # Convert to the display's pixel format for fast blits (needs an open display)
+        if pygame.display.get_surface() is not None:
+            self.track_image = self.track_image.convert()
+            self.car_image = self.car_image.convert_alpha()
+        
+        # Translucent copy of the car for the best-lap ghost
+        self.ghost_image = self.car_image.copy()
+        self.ghost_image.fill((255, 255, 255, GHOST_ALPHA), special_flags=pygame.BLEND_RGBA_MULT)
+        
+        # Tinted copy of the car for AI opponents
+        self.opponent_image = self.car_image.copy()
+        self.opponent_image.fill(OPPONENT_TINT + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+        
         # Load sounds
         self.engine_sound = pygame.mixer.Sound('assets/sounds/car.wav')
         self.collision_sound = pygame.mixer.Sound('assets/sounds/collision.wav')
@@ -86,11 +146,128 @@ class GameAssets:
         self.original_engine_sound = pygame.mixer.Sound('assets/sounds/car.wav')
 
 
+class RotatedSpriteCache:
+    """Rotated copies of a sprite keyed by quantized angle, so drawing is a lookup plus a blit."""
+    
+    def __init__(self, image: pygame.Surface, resolution: float = SPRITE_ANGLE_RESOLUTION):
+        """Initialize an empty cache for image with the given angular resolution in degrees."""
+        self.image = image
+        self.resolution = resolution
+        self.steps = max(1, round(360 / resolution))
+        self.sprites: Dict[int, pygame.Surface] = {}
+    
+    def get(self, angle: float) -> pygame.Surface:
+        """Get the sprite rotated clockwise by angle degrees (nearest cached step)."""
+        key = round(angle / self.resolution) % self.steps
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.transform.rotate(self.image, -key * self.resolution)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()  # Match display format for fast blits
+            self.sprites[key] = sprite
+        return sprite
+    
+    def preload(self):
+        """Render every rotation step up front."""
+        for key in range(self.steps):
+            self.get(key * self.resolution)
+
+
+class DriverInput:
+    """Device-independent driver controls for a single simulation step."""
+    
+    def __init__(self, throttle: float = 0.0, brake: float = 0.0, steer: float = 0.0, reset: bool = False):
+        """Create a control sample (throttle/brake 0.0 to 1.0, steer -1.0 to 1.0)."""
+        self.throttle = throttle
+        self.brake = brake        # Brakes while moving forward, reverses when (nearly) stopped
+        self.steer = steer
+        self.reset = reset
+    
+    @classmethod
+    def from_keys(cls, keys: pygame.key.ScancodeWrapper) -> 'DriverInput':
+        """Build controls from the keyboard state (arrow keys and WASD, R to reset)."""
+        steer = 0.0
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            steer = -1.0
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            steer = 1.0
+        
+        return cls(
+            throttle=1.0 if keys[pygame.K_UP] or keys[pygame.K_w] else 0.0,
+            brake=1.0 if keys[pygame.K_DOWN] or keys[pygame.K_s] else 0.0,
+            steer=steer,
+            reset=bool(keys[pygame.K_r])
+        )
+
+
+class CarParams:
+    """Tunable physics constants of a car (defaults are the module-level values)."""
+    
+    def __init__(self, max_speed: float = MAX_SPEED, min_speed: float = MIN_SPEED,
+                 acceleration: float = ACCELERATION, deceleration: float = DECELERATION,
+                 brake_force: float = BRAKE_FORCE, turn_speed_base: float = TURN_SPEED_BASE,
+                 turn_speed_factor: float = TURN_SPEED_FACTOR, traction_loss_speed: float = TRACTION_LOSS_SPEED,
+                 friction_coefficient: float = FRICTION_COEFFICIENT, engine_torque_max: float = ENGINE_TORQUE_MAX,
+                 optimal_rpm: float = OPTIMAL_RPM, max_rpm: float = MAX_RPM, idle_rpm: float = IDLE_RPM,
+                 gear_ratios: Optional[Dict[int, float]] = None,
+                 shift_up_speeds: Optional[Dict[int, float]] = None,
+                 shift_down_speeds: Optional[Dict[int, float]] = None):
+        """Create a parameter set; gear tables default to copies of the module-level ones."""
+        self.max_speed = max_speed
+        self.min_speed = min_speed
+        self.acceleration = acceleration
+        self.deceleration = deceleration
+        self.brake_force = brake_force
+        self.turn_speed_base = turn_speed_base
+        self.turn_speed_factor = turn_speed_factor
+        self.traction_loss_speed = traction_loss_speed
+        self.friction_coefficient = friction_coefficient
+        self.engine_torque_max = engine_torque_max
+        self.optimal_rpm = optimal_rpm
+        self.max_rpm = max_rpm
+        self.idle_rpm = idle_rpm
+        self.gear_ratios = dict(GEAR_RATIOS if gear_ratios is None else gear_ratios)
+        self.shift_up_speeds = dict(SHIFT_UP_SPEEDS if shift_up_speeds is None else shift_up_speeds)
+        self.shift_down_speeds = dict(SHIFT_DOWN_SPEEDS if shift_down_speeds is None else shift_down_speeds)
+    
+    def replace(self, **changes) -> 'CarParams':
+        """Get a copy with some parameters changed. Gear table entries can be given as e.g.
+        gear_ratios_3=1.3. Raises ValueError for unknown parameters."""
+        params = CarParams(**self.to_dict())
+        for name, value in changes.items():
+            table, _, gear = name.rpartition('_')
+            if isinstance(getattr(params, table, None), dict) and gear.lstrip('-').isdigit():
+                getattr(params, table)[int(gear)] = value
+            elif hasattr(params, name) and not isinstance(getattr(params, name), dict):
+                setattr(params, name, value)
+            else:
+                raise ValueError(f"Unknown car parameter: {name}")
+        return params
+    
+    def to_dict(self) -> dict:
+        """Get all parameters as constructor keyword arguments."""
+        return {name: dict(value) if isinstance(value, dict) else value for name, value in vars(self).items()}
+    
+    def get_traction(self, speed: float) -> float:
+        """Get the traction factor at a speed (tire grip falls off above traction_loss_speed)."""
+        if speed < self.traction_loss_speed:
+            return 1.0
+        return max(0.3, 1.0 - (speed - self.traction_loss_speed) * 0.1)  # Minimum 30% traction
+    
+    def get_max_turn_rate(self, speed: float) -> float:
+        """Get the yaw rate (degrees per reference step) at full lock and a given speed."""
+        speed_factor = 1.0 - min(0.7, speed / self.max_speed * self.turn_speed_factor)
+        speed_multiplier = max(0.5, speed / self.max_speed + 0.5)
+        return self.turn_speed_base * speed_factor * self.get_traction(speed) * speed_multiplier
+
+
 class Car:
     """Represents the player's car with realistic physics including acceleration, braking, and steering."""
     
-    def __init__(self, x: float, y: float):
-        """Initialize car at given position with physics properties."""
+    def __init__(self, x: float, y: float, params: Optional[CarParams] = None):
+        """Initialize car at given position with physics properties (default CarParams unless given)."""
+        self.params = params if params is not None else CarParams()
+        
         # Position and orientation
         self.x = x
         self.y = y
@@ -102,7 +279,7 @@ class Car:
         self.acceleration = 0.0      # Current acceleration
         
         # Engine state
-        self.engine_rpm = IDLE_RPM
+        self.engine_rpm = self.params.idle_rpm
         self.throttle = 0.0         # 0.0 to 1.0 (actual applied throttle)
         self.brake = 0.0            # 0.0 to 1.0 (actual applied brake)
         self.steering = 0.0         # -1.0 to 1.0 (left to right)
@@ -117,8 +294,21 @@ class Car:
         self.current_gear = 1       # Start in first gear
         self.gear_shift_timer = 0.0 # Delay between shifts
         
-        # Collision rectangle
+        # Collision rectangle (unrotated) and the orientation of the rotated collision box,
+        # cached once per step from the sin/cos already needed for movement
         self.rect = pygame.Rect(x, y, CAR_WIDTH, CAR_HEIGHT)
+        self.sin_angle = 0.0
+        self.cos_angle = 1.0
+        
+        # Pose at the start of the current step (for swept queries and render interpolation)
+        self.previous_x = x
+        self.previous_y = y
+        self.previous_angle = 0
+        
+        # Contact at the end of the last step: an impact costs speed at once, staying in contact
+        # costs it at a fixed rate per second (see get_contact_speed_keep)
+        self.wall_contact = False
+        self.edge_contact = False
         
         # Store initial position for reset
         self.initial_x = x
@@ -132,7 +322,7 @@ class Car:
         self.velocity = 0.0
         self.angular_velocity = 0.0
         self.acceleration = 0.0
-        self.engine_rpm = IDLE_RPM
+        self.engine_rpm = self.params.idle_rpm
         self.throttle = 0.0
         self.brake = 0.0
         self.steering = 0.0
@@ -141,6 +331,13 @@ class Car:
         self.current_gear = 1
         self.gear_shift_timer = 0.0
         self.rect.topleft = (self.x, self.y)
+        self.sin_angle = 0.0
+        self.cos_angle = 1.0
+        self.previous_x = self.x
+        self.previous_y = self.y
+        self.previous_angle = self.angle
+        self.wall_contact = False
+        self.edge_contact = False
     
     def update_progressive_inputs(self, dt: float):
         """Update throttle and brake progressively towards target values."""
@@ -172,14 +369,14 @@ class Car:
     
     def get_current_gear_ratio(self) -> float:
         """Get the current gear ratio."""
-        return GEAR_RATIOS.get(self.current_gear, 1.0)
+        return self.params.gear_ratios.get(self.current_gear, 1.0)
     
     def should_shift_up(self) -> bool:
         """Determine if car should shift to higher gear."""
         if self.current_gear >= 5 or self.current_gear <= 0:
             return False
         
-        speed_threshold = SHIFT_UP_SPEEDS.get(self.current_gear, float('inf'))
+        speed_threshold = self.params.shift_up_speeds.get(self.current_gear, float('inf'))
         return abs(self.velocity) > speed_threshold and self.gear_shift_timer <= 0
     
     def should_shift_down(self) -> bool:
@@ -187,7 +384,7 @@ class Car:
         if self.current_gear <= 1 or self.current_gear > 5:
             return False
         
-        speed_threshold = SHIFT_DOWN_SPEEDS.get(self.current_gear, 0)
+        speed_threshold = self.params.shift_down_speeds.get(self.current_gear, 0)
         return abs(self.velocity) < speed_threshold and self.gear_shift_timer <= 0
     
     def shift_gear(self, direction: int):
@@ -200,7 +397,7 @@ class Car:
         # Set shift delay to prevent rapid shifting
         self.gear_shift_timer = 0.5  # 0.5 seconds between shifts
     
-    def update_transmission(self, dt: float = 1/60):
+    def update_transmission(self, dt: float = REFERENCE_DT):
         """Update automatic transmission logic."""
         # Update shift timer
         if self.gear_shift_timer > 0:
@@ -214,15 +411,16 @@ class Car:
         
     def calculate_engine_torque(self) -> float:
         """Calculate engine torque based on RPM and throttle, multiplied by gear ratio."""
-        if self.engine_rpm < IDLE_RPM:
+        params = self.params
+        if self.engine_rpm < params.idle_rpm:
             return 0.0
             
         # Torque curve: peaks at low-mid RPM, drops at high RPM
-        rpm_factor = 1.0 - ((self.engine_rpm - OPTIMAL_RPM) / MAX_RPM) ** 2
+        rpm_factor = 1.0 - ((self.engine_rpm - params.optimal_rpm) / params.max_rpm) ** 2
         rpm_factor = max(0.3, rpm_factor)  # Minimum torque factor
         
         # Base engine torque
-        base_torque = ENGINE_TORQUE_MAX * rpm_factor * self.throttle
+        base_torque = params.engine_torque_max * rpm_factor * self.throttle
         
         # Apply gear ratio (higher ratio = more torque multiplication)
         gear_ratio = abs(self.get_current_gear_ratio())  # Use absolute value
@@ -235,7 +433,7 @@ class Car:
         torque = self.calculate_engine_torque()
         
         # Power = Torque × RPM (simplified)
-        power_factor = min(1.0, self.engine_rpm / OPTIMAL_RPM)
+        power_factor = min(1.0, self.engine_rpm / self.params.optimal_rpm)
         base_power = (torque * power_factor * self.engine_rpm) / 1000  # Scaled for gameplay
         
         # Gear affects power delivery efficiency
@@ -247,37 +445,39 @@ class Car:
         
         return 0.0
     
-    def update_engine_rpm(self):
+    def update_engine_rpm(self, dt: float = REFERENCE_DT):
         """Update engine RPM based on throttle and current speed."""
+        params = self.params
+        
         # Base RPM calculation from wheel speed
-        speed_rpm = IDLE_RPM + abs(self.velocity) * 200  # Scale factor for gameplay
+        speed_rpm = params.idle_rpm + abs(self.velocity) * 200  # Scale factor for gameplay
         
         # Throttle affects RPM
-        target_rpm = speed_rpm + (self.throttle * (MAX_RPM - speed_rpm))
+        target_rpm = speed_rpm + (self.throttle * (params.max_rpm - speed_rpm))
         
         # Smooth RPM changes
-        rpm_change_rate = 100  # How quickly RPM changes
+        rpm_change_rate = 100 * (dt / REFERENCE_DT)  # How quickly RPM changes (per reference step)
         if target_rpm > self.engine_rpm:
             self.engine_rpm = min(target_rpm, self.engine_rpm + rpm_change_rate)
         else:
             self.engine_rpm = max(target_rpm, self.engine_rpm - rpm_change_rate * 2)
         
         # Clamp RPM
-        self.engine_rpm = max(IDLE_RPM, min(MAX_RPM, self.engine_rpm))
+        self.engine_rpm = max(params.idle_rpm, min(params.max_rpm, self.engine_rpm))
     
     def calculate_traction_factor(self) -> float:
         """Calculate traction based on speed (simulates tire grip loss at high speeds)."""
-        if abs(self.velocity) < TRACTION_LOSS_SPEED:
-            return 1.0
-        
-        speed_excess = abs(self.velocity) - TRACTION_LOSS_SPEED
-        traction_loss = speed_excess * 0.1
-        return max(0.3, 1.0 - traction_loss)  # Minimum 30% traction
+        return self.params.get_traction(abs(self.velocity))
     
-    def update_physics(self):
-        """Update car physics for realistic movement with proper gearing."""
+    def update_physics(self, dt: float = REFERENCE_DT):
+        """Update car physics for realistic movement with proper gearing, advancing dt seconds."""
+        params = self.params
+        
+        # Per-step constants are tuned at REFERENCE_DT; scale integration to the actual step
+        step_scale = dt / REFERENCE_DT
+        
         # Update transmission first
-        self.update_transmission()
+        self.update_transmission(dt)
         
         # Calculate forces with gear-adjusted power
         engine_force = self.calculate_engine_power() * 0.03  # Further reduced from 0.05 for slower acceleration
@@ -288,24 +488,24 @@ class Car:
             engine_force = -engine_force * 0.7  # Reduced power in reverse
         
         # Speed-dependent power reduction (realistic aerodynamic drag effect)
-        speed_drag_factor = 1.0 - (abs(self.velocity) / MAX_SPEED) * 0.4
+        speed_drag_factor = 1.0 - (abs(self.velocity) / params.max_speed) * 0.4
         engine_force *= max(0.3, speed_drag_factor)  # Minimum 30% power at top speed
         
         # Gear-specific top speed limitation
         if abs(self.velocity) > 0:
-            gear_max_speed = MAX_SPEED / max(1.0, abs(gear_ratio) * 0.8)  # Higher gears allow higher speeds
+            gear_max_speed = params.max_speed / max(1.0, abs(gear_ratio) * 0.8)  # Higher gears allow higher speeds
             if abs(self.velocity) > gear_max_speed:
                 engine_force *= 0.1  # Severely limit power beyond gear's optimal range
         
         # Braking force
-        brake_force = self.brake * BRAKE_FORCE
+        brake_force = self.brake * params.brake_force
         if self.velocity > 0:
             brake_force = -brake_force
         elif self.velocity < 0:
             brake_force = abs(brake_force)
         
         # Natural friction/drag
-        friction_force = -self.velocity * DECELERATION * FRICTION_COEFFICIENT
+        friction_force = -self.velocity * params.deceleration * params.friction_coefficient
         
         # Engine braking (more prominent in lower gears when not accelerating)
         engine_brake_force = 0
@@ -318,86 +518,88 @@ class Car:
         # Total acceleration
         traction = self.calculate_traction_factor()
         net_force = (engine_force + brake_force) * traction + friction_force + engine_brake_force
-        self.acceleration = net_force * ACCELERATION  # Apply base acceleration multiplier
+        self.acceleration = net_force * params.acceleration  # Apply base acceleration multiplier
         
         # Update velocity
-        self.velocity += self.acceleration
+        self.velocity += self.acceleration * step_scale
         
         # Clamp velocity to realistic limits
-        self.velocity = max(MIN_SPEED, min(MAX_SPEED, self.velocity))
+        self.velocity = max(params.min_speed, min(params.max_speed, self.velocity))
         
         # Speed-dependent steering
-        speed_factor = 1.0 - min(0.7, abs(self.velocity) / MAX_SPEED * TURN_SPEED_FACTOR)
-        turn_rate = TURN_SPEED_BASE * speed_factor * traction
+        speed_factor = 1.0 - min(0.7, abs(self.velocity) / params.max_speed * params.turn_speed_factor)
+        turn_rate = params.turn_speed_base * speed_factor * traction
         
         # Apply steering
         if abs(self.velocity) > 0.05:  # Lower threshold for steering (was 0.1)
             # Enhanced steering responsiveness at low speeds
-            speed_multiplier = max(0.5, abs(self.velocity) / MAX_SPEED + 0.5)
+            speed_multiplier = max(0.5, abs(self.velocity) / params.max_speed + 0.5)
             self.angular_velocity = self.steering * turn_rate * speed_multiplier
         else:
             self.angular_velocity = 0
         
-        # Update angle
-        self.angle += self.angular_velocity
+        # Update angle and the cached orientation
+        self.angle += self.angular_velocity * step_scale
+        radians = math.radians(self.angle)
+        self.sin_angle = math.sin(radians)
+        self.cos_angle = math.cos(radians)
         
         # Update position based on velocity and angle
         if abs(self.velocity) > 0.01:  # Minimum velocity threshold
-            self.x += self.velocity * math.sin(math.radians(self.angle))
-            self.y -= self.velocity * math.cos(math.radians(self.angle))
+            distance = self.velocity * step_scale
+            self.x += distance * self.sin_angle
+            self.y -= distance * self.cos_angle
         
         # Update collision rectangle
         self.rect.topleft = (self.x, self.y)
     
-    def update_position(self, keys: pygame.key.ScancodeWrapper) -> bool:
-        """Update car position based on key input with realistic progressive physics."""
-        # Calculate delta time (assuming 60 FPS)
-        dt = 1.0 / 60.0
+    def apply_input(self, controls: DriverInput, dt: float = REFERENCE_DT) -> bool:
+        """Update car state from abstract driver controls with realistic progressive physics."""
+        self.previous_x = self.x
+        self.previous_y = self.y
+        self.previous_angle = self.angle
         
         # Reset target input states
         self.target_throttle = 0.0
         self.target_brake = 0.0
         self.steering = 0.0
-        moving_forward = False
         
-        # Throttle input (progressive) - Arrow keys and WASD
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            self.set_throttle_input(1.0)
-            moving_forward = True
-        else:
-            self.set_throttle_input(0.0)
+        # Throttle input (progressive)
+        self.set_throttle_input(controls.throttle)
+        moving_forward = controls.throttle > 0
             
-        # Brake/Reverse input (progressive) - Arrow keys and WASD
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        # Brake/Reverse input (progressive)
+        if controls.brake > 0:
             if self.velocity > 0.5:
                 # Braking while moving forward
-                self.set_brake_input(1.0)
+                self.set_brake_input(controls.brake)
                 self.set_throttle_input(0.0)  # Can't throttle while braking
             else:
                 # Reverse throttle - set negative target throttle for reverse
-                self.target_throttle = -1.8  # Increased from -0.7 for faster reverse
+                self.target_throttle = -1.8 * controls.brake  # Increased from -0.7 for faster reverse
                 self.set_brake_input(0.0)
         else:
             self.set_brake_input(0.0)
             
-        # Steering input (still immediate for responsiveness) - Arrow keys and WASD
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.steering = -1.0
-            
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.steering = 1.0
+        # Steering input (still immediate for responsiveness)
+        self.steering = max(-1.0, min(1.0, controls.steer))
         
         # Update progressive inputs
         self.update_progressive_inputs(dt)
         
         # Update engine RPM
-        self.update_engine_rpm()
+        self.update_engine_rpm(dt)
         
         # Update physics
-        self.update_physics()
+        self.update_physics(dt)
         
         return moving_forward or abs(self.velocity) > 0.5
     
+    def update_position(self, keys: pygame.key.ScancodeWrapper) -> bool:
+        """Update car position based on key input with realistic progressive physics."""
+        # One step per rendered frame (assuming 60 FPS)
+        return self.apply_input(DriverInput.from_keys(keys), 1.0 / FPS)
+    
     def handle_collision(self):
         """Handle collision with walls by reducing velocity and bouncing back."""
         # Reduce velocity significantly on collision
@@ -409,40 +611,57 @@ class Car:
         self.y += bounce_distance * math.cos(math.radians(self.angle))
         self.rect.topleft = (self.x, self.y)
     
-    def handle_screen_boundaries(self) -> bool:
-        """Handle collision with screen boundaries. Returns True if collision occurred."""
+    def handle_screen_boundaries(self, dt: float = REFERENCE_DT) -> bool:
+        """Keep the car's rotated box on screen after a step of dt seconds. Returns True if collision occurred."""
         collision_occurred = False
+        half_width, half_height = get_box_extents(self.sin_angle, self.cos_angle)
+        center_x = self.x + CAR_WIDTH / 2
+        center_y = self.y + CAR_HEIGHT / 2
         
         # Left boundary
-        if self.x < 0:
-            self.x = 0
-            self.velocity *= 0.5  # Reduce speed on boundary hit
+        if center_x - half_width < 0:
+            self.x = half_width - CAR_WIDTH / 2
             collision_occurred = True
         
-        # Right boundary (account for car width)
-        if self.x + CAR_WIDTH > SCREEN_WIDTH:
-            self.x = SCREEN_WIDTH - CAR_WIDTH
-            self.velocity *= 0.5
+        # Right boundary (account for the rotated box's width)
+        if center_x + half_width > SCREEN_WIDTH:
+            self.x = SCREEN_WIDTH - half_width - CAR_WIDTH / 2
             collision_occurred = True
         
         # Top boundary
-        if self.y < 0:
-            self.y = 0
-            self.velocity *= 0.5
+        if center_y - half_height < 0:
+            self.y = half_height - CAR_HEIGHT / 2
             collision_occurred = True
         
-        # Bottom boundary (account for car height)
-        if self.y + CAR_HEIGHT > SCREEN_HEIGHT:
-            self.y = SCREEN_HEIGHT - CAR_HEIGHT
-            self.velocity *= 0.5
+        # Bottom boundary (account for the rotated box's height)
+        if center_y + half_height > SCREEN_HEIGHT:
+            self.y = SCREEN_HEIGHT - half_height - CAR_HEIGHT / 2
             collision_occurred = True
         
-        # Update collision rectangle if boundary collision occurred
+        # Reduce speed and update collision rectangle if boundary collision occurred
         if collision_occurred:
+            self.velocity *= get_contact_speed_keep(self.edge_contact, dt)
             self.rect.topleft = (self.x, self.y)
+        self.edge_contact = collision_occurred
         
         return collision_occurred
     
+    def get_box(self) -> Tuple[float, float, float, float]:
+        """Get the rotated collision box as (center x, center y, sin, cos of the heading)."""
+        return (self.x + CAR_WIDTH / 2, self.y + CAR_HEIGHT / 2, self.sin_angle, self.cos_angle)
+    
+    def get_corners(self) -> List[Tuple[float, float]]:
+        """Get the corners of the rotated collision box (front right, front left, rear left, rear right)."""
+        return get_box_corners((self.x + CAR_WIDTH / 2, self.y + CAR_HEIGHT / 2), self.sin_angle, self.cos_angle)
+    
+    def get_swept_rect(self) -> pygame.Rect:
+        """Get the bounding box covering the car's rotated collision box over the current step."""
+        half_width, half_height = get_box_extents(self.sin_angle, self.cos_angle)
+        previous_center = (self.previous_x + CAR_WIDTH / 2, self.previous_y + CAR_HEIGHT / 2)
+        center = (self.x + CAR_WIDTH / 2, self.y + CAR_HEIGHT / 2)
+        return get_box_bounds(previous_center, half_width, half_height).union(
+            get_box_bounds(center, half_width, half_height))
+    
     def get_speed_kmh(self) -> float:
         """Get current speed in km/h for display purposes."""
         return abs(self.velocity) * 15  # Scale factor for realistic-feeling speeds
@@ -451,97 +670,564 @@ class Car:
         """Get current gear (returns the actual transmission gear)."""
         return self.current_gear
     
-    def draw(self, screen: pygame.Surface, car_image: pygame.Surface):
-        """Draw the car on the screen with proper rotation."""
-        rotated_car = pygame.transform.rotate(car_image, -self.angle)
-        rotated_rect = rotated_car.get_rect(center=self.rect.center)
-        screen.blit(rotated_car, rotated_rect.topleft)
+    def get_interpolated_pose(self, alpha: float) -> Tuple[float, float, float]:
+        """Get (x, y, angle) blended between the previous and current step (alpha 0.0 to 1.0)."""
+        return (self.previous_x + (self.x - self.previous_x) * alpha,
+                self.previous_y + (self.y - self.previous_y) * alpha,
+                self.previous_angle + (self.angle - self.previous_angle) * alpha)
+    
+    def draw(self, screen: pygame.Surface, sprites: RotatedSpriteCache, alpha: float = 1.0) -> pygame.Rect:
+        """Draw the car with proper rotation, interpolated alpha of the way through the last step.
+        Returns the area drawn."""
+        x, y, angle = self.get_interpolated_pose(alpha)
+        rotated_car = sprites.get(angle)
+        center = (int(x) + CAR_WIDTH // 2, int(y) + CAR_HEIGHT // 2)
+        rotated_rect = rotated_car.get_rect(center=center)
+        return screen.blit(rotated_car, rotated_rect.topleft)
+
+
+def segment_crossing(start: Tuple[float, float], end: Tuple[float, float],
+                     line_start: Tuple[float, float], line_end: Tuple[float, float]) -> Optional[float]:
+    """Get the fraction (0.0 exclusive to 1.0) along start->end where it crosses the line segment, or None."""
+    move_x, move_y = end[0] - start[0], end[1] - start[1]
+    line_x, line_y = line_end[0] - line_start[0], line_end[1] - line_start[1]
+    denominator = move_x * line_y - move_y * line_x
+    if denominator == 0:
+        return None  # Parallel (or no movement)
+    
+    offset_x, offset_y = line_start[0] - start[0], line_start[1] - start[1]
+    fraction = (offset_x * line_y - offset_y * line_x) / denominator
+    line_fraction = (offset_x * move_y - offset_y * move_x) / denominator
+    if 0.0 < fraction <= 1.0 and 0.0 <= line_fraction <= 1.0:
+        return fraction
+    return None
+
+
+def get_rect_centerline(rect: pygame.Rect) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    """Get the segment running along the middle of a thin rect's long side."""
+    if rect.width >= rect.height:
+        center_y = rect.y + rect.height / 2
+        return (rect.left, center_y), (rect.right, center_y)
+    center_x = rect.x + rect.width / 2
+    return (center_x, rect.top), (center_x, rect.bottom)
+
+
+def get_box_extents(sin_angle: float, cos_angle: float) -> Tuple[float, float]:
+    """Get the half width and half height of the axis-aligned bounds of a rotated car box."""
+    return (abs(cos_angle) * CAR_WIDTH / 2 + abs(sin_angle) * CAR_HEIGHT / 2,
+            abs(sin_angle) * CAR_WIDTH / 2 + abs(cos_angle) * CAR_HEIGHT / 2)
+
+
+def get_contact_speed_keep(in_contact: bool, dt: float) -> float:
+    """Get the fraction of speed kept by a step of dt seconds touching a wall or the screen edge:
+    CONTACT_SPEED_KEEP on impact, and the same loss per REFERENCE_DT while the contact lasts."""
+    return CONTACT_SPEED_KEEP ** (dt / REFERENCE_DT) if in_contact else CONTACT_SPEED_KEEP
+
+
+def get_box_corners(center: Tuple[float, float], sin_angle: float, cos_angle: float) -> List[Tuple[float, float]]:
+    """Get the corners of a car box (front right, front left, rear left, rear right)."""
+    forward_x, forward_y = sin_angle * CAR_HEIGHT / 2, -cos_angle * CAR_HEIGHT / 2
+    right_x, right_y = cos_angle * CAR_WIDTH / 2, sin_angle * CAR_WIDTH / 2
+    return [(center[0] + forward_x + right_x, center[1] + forward_y + right_y),
+            (center[0] + forward_x - right_x, center[1] + forward_y - right_y),
+            (center[0] - forward_x - right_x, center[1] - forward_y - right_y),
+            (center[0] - forward_x + right_x, center[1] - forward_y + right_y)]
+
+
+def get_box_outline(center: Tuple[float, float], sin_angle: float, cos_angle: float) -> List[Tuple[float, float]]:
+    """Get the corners and edge midpoints of a car box, for point-sampled collision."""
+    corners = get_box_corners(center, sin_angle, cos_angle)
+    midpoints = [((x1 + x2) / 2, (y1 + y2) / 2) for (x1, y1), (x2, y2) in zip(corners, corners[1:] + corners[:1])]
+    return corners + midpoints
+
+
+def get_box_bounds(center: Tuple[float, float], half_width: float, half_height: float) -> pygame.Rect:
+    """Get an integer rect safely covering axis-aligned bounds around a center (for index queries)."""
+    return pygame.Rect(int(center[0] - half_width) - 1, int(center[1] - half_height) - 1,
+                       int(half_width * 2) + 3, int(half_height * 2) + 3)
+
+
+def get_separating_axes(sin_angle: float, cos_angle: float) -> List[Tuple[float, float, float]]:
+    """Get the SAT axes for a car box against axis-aligned walls as (axis x, axis y, car radius)."""
+    half_width, half_height = get_box_extents(sin_angle, cos_angle)
+    return [(1.0, 0.0, half_width),
+            (0.0, 1.0, half_height),
+            (cos_angle, sin_angle, CAR_WIDTH / 2),      # Car's right
+            (sin_angle, -cos_angle, CAR_HEIGHT / 2)]    # Car's forward
+
+
+def sweep_box(start: Tuple[float, float], end: Tuple[float, float], axes: List[Tuple[float, float, float]],
+              wall: pygame.Rect) -> Optional[Tuple[float, float, float]]:
+    """Get the time of impact (0.0 to 1.0 exclusive) and contact normal of a car box (given by its
+    separating axes) whose center moves from start to end against a static wall, or None if it
+    does not hit it. A box already overlapping the wall at start is not a hit (see get_wall_overlap)."""
+    wall_center_x = wall.x + wall.width / 2
+    wall_center_y = wall.y + wall.height / 2
+    entry = -math.inf
+    exit_time = math.inf
+    normal = (0.0, 0.0)
+    
+    for axis_x, axis_y, car_radius in axes:
+        # Separated on this axis while the center's projection stays outside low..high
+        radius = car_radius + abs(axis_x) * wall.width / 2 + abs(axis_y) * wall.height / 2 - COLLISION_EPSILON
+        wall_position = wall_center_x * axis_x + wall_center_y * axis_y
+        position = start[0] * axis_x + start[1] * axis_y
+        move = (end[0] - start[0]) * axis_x + (end[1] - start[1]) * axis_y
+        if move == 0:
+            if abs(position - wall_position) >= radius:
+                return None  # Moving parallel to this axis, outside (or touching) the wall
+            continue
+        
+        time_low = (wall_position - radius - position) / move
+        time_high = (wall_position + radius - position) / move
+        if time_low > time_high:
+            time_low, time_high = time_high, time_low
+        if time_low > entry:
+            # The side hit is on the axis entered last, facing against the movement
+            entry = time_low
+            normal = (-axis_x, -axis_y) if move > 0 else (axis_x, axis_y)
+        exit_time = min(exit_time, time_high)
+    
+    if entry >= exit_time or not 0.0 <= entry < 1.0:
+        return None
+    return entry, normal[0], normal[1]
+
+
+def get_wall_overlap(center: Tuple[float, float], axes: List[Tuple[float, float, float]],
+                     wall: pygame.Rect) -> Optional[Tuple[float, float]]:
+    """Get the minimum translation that pushes an overlapping car box out of a wall, or None."""
+    wall_center_x = wall.x + wall.width / 2
+    wall_center_y = wall.y + wall.height / 2
+    push = None
+    smallest = math.inf
+    
+    for axis_x, axis_y, car_radius in axes:
+        radius = car_radius + abs(axis_x) * wall.width / 2 + abs(axis_y) * wall.height / 2
+        offset = (center[0] - wall_center_x) * axis_x + (center[1] - wall_center_y) * axis_y
+        overlap = radius - abs(offset)
+        if overlap <= COLLISION_EPSILON:
+            return None  # Separating axis found
+        if overlap < smallest:
+            # Push away from the wall's center along the axis with the smallest overlap
+            smallest = overlap
+            direction = 1.0 if offset >= 0 else -1.0
+            push = (axis_x * overlap * direction, axis_y * overlap * direction)
+    return push
+
+
+class SpatialGrid:
+    """Uniform grid index over a fixed list of rectangles for fast overlap queries."""
+    
+    def __init__(self, rects: List[pygame.Rect], cell_size: int = 64,
+                 cells: Optional[Dict[Tuple[int, int], List[int]]] = None):
+        """Build the index once (or reuse prebuilt cells); rects must not move afterwards."""
+        self.rects = rects
+        self.cell_size = cell_size
+        if cells is not None:
+            self.cells = cells
+            return
+        
+        self.cells = {}
+        for index, rect in enumerate(rects):
+            for cell in self.get_cells(rect):
+                self.cells.setdefault(cell, []).append(index)
+    
+    def to_array(self) -> array:
+        """Flatten the cells to int32 values: cell x, cell y, count, indices... per cell."""
+        values = array('i')
+        for (cell_x, cell_y), bucket in self.cells.items():
+            values.extend((cell_x, cell_y, len(bucket)))
+            values.extend(bucket)
+        return values
+    
+    @classmethod
+    def from_array(cls, rects: List[pygame.Rect], cell_size: int, values: array) -> 'SpatialGrid':
+        """Restore an index flattened with to_array without recomputing cell coverage."""
+        cells = {}
+        position = 0
+        while position < len(values):
+            count = values[position + 2]
+            cells[(values[position], values[position + 1])] = values[position + 3:position + 3 + count].tolist()
+            position += 3 + count
+        return cls(rects, cell_size, cells)
+    
+    def get_cells(self, rect: pygame.Rect) -> List[Tuple[int, int]]:
+        """Get the grid cells overlapped by a rectangle."""
+        size = self.cell_size
+        first_x, last_x = rect.left // size, (rect.right - 1) // size
+        first_y, last_y = rect.top // size, (rect.bottom - 1) // size
+        return [(cell_x, cell_y)
+                for cell_x in range(first_x, last_x + 1)
+                for cell_y in range(first_y, last_y + 1)]
+    
+    def query(self, area: pygame.Rect) -> List[int]:
+        """Get indices of rects that may overlap area, in the original list order."""
+        size = self.cell_size
+        cells = self.cells
+        first_x, last_x = area.left // size, (area.right - 1) // size
+        first_y, last_y = area.top // size, (area.bottom - 1) // size
+        
+        # Common case: a car-sized query inside one cell, whose bucket is already ordered
+        if first_x == last_x and first_y == last_y:
+            return cells.get((first_x, first_y), [])
+        
+        candidates = set()
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    candidates.update(bucket)
+        return sorted(candidates)
+    
+    def colliding(self, area: pygame.Rect) -> List[int]:
+        """Get indices of rects that overlap area, in the original list order."""
+        rects = self.rects
+        return [index for index in self.query(area) if area.colliderect(rects[index])]
 
 
 class Track:
-    """Represents the racing track with walls, checkpoints, and start/finish line."""
+    """Represents the racing track with walls, checkpoints, and start/finish line.
     
-    def __init__(self):
-        """Initialize track elements."""
-        self.walls = [
+    Layouts are defined in JSON files (see tracks/default.json). The first load
+    compiles one into a binary cache holding the geometry, spatial indexes and the
+    baked static layer, so later launches load it with a single read.
+    """
+    
+    MAGIC = b'HLTK'
+    VERSION = 2
+    HEADER = struct.Struct('<4sB16s')  # Magic, version, hash of the definition file
+    
+    def __init__(self, walls: Optional[List[pygame.Rect]] = None, start_line: Optional[pygame.Rect] = None,
+                 checkpoints: Optional[List[pygame.Rect]] = None, spawn: Tuple[float, float] = DEFAULT_SPAWN,
+                 name: str = "Default", image_path: str = TRACK_IMAGE_PATH,
+                 waypoints: Optional[List[Tuple[float, float]]] = None):
+        """Initialize track elements (the built-in layout for any not given)."""
+        self.name = name
+        self.image_path = image_path
+        self.spawn = spawn
+        self.waypoints = waypoints if waypoints is not None else list(DEFAULT_WAYPOINTS)  # For AI drivers
+        self.source_hash = bytes(16)  # Hash of the definition file it was loaded from (see load)
+        
+        self.walls = walls if walls is not None else [
             pygame.Rect(200, 150, 400, 10),  # Top wall
             pygame.Rect(200, 440, 400, 10),  # Bottom wall
             pygame.Rect(200, 150, 10, 300),  # Left wall
             pygame.Rect(590, 150, 10, 300)   # Right wall
         ]
         
-        self.start_line = pygame.Rect(0, 400, 200, 10)
+        self.start_line = start_line if start_line is not None else pygame.Rect(0, 400, 200, 10)
         
-        self.checkpoints = [
+        self.checkpoints = checkpoints if checkpoints is not None else [
             pygame.Rect(SCREEN_WIDTH // 2, 0, 10, 150),      # Top checkpoint
             pygame.Rect(SCREEN_WIDTH - 200, SCREEN_HEIGHT // 2, 200, 10),  # Right checkpoint
             pygame.Rect(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 150, 10, 150)   # Bottom checkpoint
         ]
+        
+        # Optional drivable area derived from the track image (see use_image_collision)
+        self.field = None
+        
+        self.static_layer: Optional[pygame.Surface] = None
+        self.racing_line: Optional['RacingLine'] = None
+        self.rebuild()
+    
+    @classmethod
+    def from_definition(cls, definition: dict) -> 'Track':
+        """Create a track from a parsed track definition. Raises ValueError if it is malformed."""
+        try:
+            track = cls(walls=[pygame.Rect(*wall) for wall in definition['walls']],
+                        start_line=pygame.Rect(*definition['start_line']),
+                        checkpoints=[pygame.Rect(*checkpoint) for checkpoint in definition['checkpoints']],
+                        spawn=(float(definition['spawn'][0]), float(definition['spawn'][1])),
+                        name=str(definition.get('name', "Untitled")),
+                        image_path=str(definition.get('image', TRACK_IMAGE_PATH)),
+                        waypoints=[(float(x), float(y)) for x, y in definition['waypoints']])
+        except (KeyError, IndexError, TypeError, ValueError) as error:
+            raise ValueError(f"Invalid track definition: {error!r}") from error
+        if len(track.waypoints) < 3:
+            raise ValueError("Invalid track definition: the AI drivers need a loop of at least 3 waypoints")
+        return track
+    
+    @classmethod
+    def load(cls, path: str, cache_dir: str = CACHE_DIR) -> 'Track':
+        """Load a track definition file, from its compiled cache when it is up to date."""
+        with open(path, 'rb') as definition_file:
+            source = definition_file.read()
+        source_hash = hashlib.blake2b(source, digest_size=16).digest()
+        cache_path = os.path.join(cache_dir, f"track_{source_hash.hex()}.bin")
+        
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                return cls.from_bytes(cache_file.read(), source_hash)
+        except (OSError, ValueError):
+            pass  # Not compiled yet, or stale: compile it
+        
+        try:
+            track = cls.from_definition(json.loads(source))
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Invalid track definition: {error}") from error
+        track.source_hash = source_hash
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary_path, 'wb') as cache_file:
+                cache_file.write(track.to_bytes(source_hash))
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            pass  # Read-only install: compile again next time
+        return track
+    
+    def get_image_stamp(self) -> Tuple[int, int]:
+        """Get (size, modification time) of the background image, to detect a stale cache."""
+        stat = os.stat(self.image_path)
+        return stat.st_size, stat.st_mtime_ns
+    
+    def to_bytes(self, source_hash: bytes = bytes(16)) -> bytes:
+        """Compile the track: geometry, spatial indexes and the static layer baked over its image."""
+        chunks = [self.HEADER.pack(self.MAGIC, self.VERSION, source_hash)]
+        for text in (self.name, self.image_path):
+            encoded = text.encode('utf-8')
+            chunks.append(struct.pack('<H', len(encoded)) + encoded)
+        chunks.append(struct.pack('<qqddI', *self.get_image_stamp(), *self.spawn, len(self.waypoints)))
+        chunks.append(struct.pack(f'<{len(self.waypoints) * 2}d', *(value for point in self.waypoints for value in point)))
+        
+        rects = array('i', self.start_line)
+        for rect in self.walls + self.checkpoints:
+            rects.extend(rect)
+        wall_cells = self.wall_index.to_array()
+        checkpoint_cells = self.checkpoint_index.to_array()
+        chunks.append(struct.pack('<IIiIiI', len(self.walls), len(self.checkpoints),
+                                  self.wall_index.cell_size, len(wall_cells),
+                                  self.checkpoint_index.cell_size, len(checkpoint_cells)))
+        for values in (rects, wall_cells, checkpoint_cells):
+            if sys.byteorder != 'little':
+                values.byteswap()
+            chunks.append(values.tobytes())
+        
+        layer = self.static_layer
+        if layer is None:
+            layer = self.build_static_layer(pygame.image.load(self.image_path))
+        chunks.append(struct.pack('<II', *layer.get_size()))
+        chunks.append(pygame.image.tobytes(layer, 'RGB'))
+        return b''.join(chunks)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, source_hash: Optional[bytes] = None) -> 'Track':
+        """Load a compiled track without rebuilding anything. Raises ValueError if the data is
+        invalid, or stale for the given definition hash or the current background image."""
+        view = memoryview(data)
+        try:
+            magic, version, compiled_hash = cls.HEADER.unpack_from(view, 0)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError("Not a compiled track file")
+            if source_hash is not None and compiled_hash != source_hash:
+                raise ValueError("Compiled track is for a different definition")
+            offset = cls.HEADER.size
+            
+            texts = []
+            for _ in range(2):
+                (length,) = struct.unpack_from('<H', view, offset)
+                texts.append(bytes(view[offset + 2:offset + 2 + length]).decode('utf-8'))
+                offset += 2 + length
+            image_size, image_mtime, spawn_x, spawn_y, waypoint_count = struct.unpack_from('<qqddI', view, offset)
+            offset += struct.calcsize('<qqddI')
+            waypoint_values = struct.unpack_from(f'<{waypoint_count * 2}d', view, offset)
+            offset += waypoint_count * 16
+            
+            (wall_count, checkpoint_count, wall_cell_size, wall_values,
+             checkpoint_cell_size, checkpoint_values) = struct.unpack_from('<IIiIiI', view, offset)
+            offset += struct.calcsize('<IIiIiI')
+            arrays = []
+            for count in (4 * (1 + wall_count + checkpoint_count), wall_values, checkpoint_values):
+                values = array('i')
+                values.frombytes(view[offset:offset + count * values.itemsize])
+                if sys.byteorder != 'little':
+                    values.byteswap()
+                arrays.append(values)
+                offset += count * values.itemsize
+            rects, wall_cells, checkpoint_cells = arrays
+            
+            width, height = struct.unpack_from('<II', view, offset)
+            offset += 8
+            if len(view) != offset + width * height * 3:
+                raise ValueError("Truncated compiled track")
+            layer = pygame.image.frombytes(bytes(view[offset:offset + width * height * 3]), (width, height), 'RGB')
+        except (struct.error, UnicodeDecodeError) as error:
+            raise ValueError(f"Corrupt compiled track: {error}") from error
+        
+        track = cls.__new__(cls)
+        track.name, track.image_path = texts
+        if track.get_image_stamp() != (image_size, image_mtime):
+            raise ValueError("Compiled track is older than its image")
+        track.spawn = (spawn_x, spawn_y)
+        track.source_hash = compiled_hash
+        track.waypoints = list(zip(waypoint_values[0::2], waypoint_values[1::2]))
+        rect_list = [pygame.Rect(rects[index:index + 4].tolist()) for index in range(0, len(rects), 4)]
+        track.start_line = rect_list[0]
+        track.walls = rect_list[1:1 + wall_count]
+        track.checkpoints = rect_list[1 + wall_count:]
+        track.field = None
+        track.wall_index = SpatialGrid.from_array(track.walls, wall_cell_size, wall_cells)
+        track.checkpoint_index = SpatialGrid.from_array(track.checkpoints, checkpoint_cell_size, checkpoint_cells)
+        track.build_crossing_lines()
+        track.static_layer = layer.convert() if pygame.display.get_surface() is not None else layer
+        track.racing_line = None
+        return track
+    
+    def rebuild(self):
+        """Rebuild data derived from the track geometry (call again after editing it)."""
+        self.build_indexes()
+        self.static_layer = None  # Re-baked on next use
+        self.racing_line = None   # Recomputed on next use
+    
+    def build_indexes(self):
+        """Build spatial indexes for walls and checkpoints."""
+        self.wall_index = SpatialGrid(self.walls)
+        self.checkpoint_index = SpatialGrid(self.checkpoints)
+        self.build_crossing_lines()
+    
+    def build_crossing_lines(self):
+        """Compute the crossing lines, tested against the path of the car's center."""
+        self.start_line_segment = get_rect_centerline(self.start_line)
+        self.checkpoint_segments = [get_rect_centerline(checkpoint) for checkpoint in self.checkpoints]
+    
+    def use_image_collision(self, field):
+        """Collide with the edges of the road in the track image (a track_field.TrackField)
+        instead of the wall rectangles."""
+        self.field = field
+        self.walls = []
+        self.rebuild()
+    
+    def build_static_layer(self, background: pygame.Surface) -> pygame.Surface:
+        """Bake the background image and all static track elements into one surface."""
+        layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        layer.fill(BLACK)
+        layer.blit(background, (0, 0))
+        self.draw(layer)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()
+        return layer
+    
+    def get_static_layer(self, background: pygame.Surface) -> pygame.Surface:
+        """Get the baked static layer, building it on first use after load or rebuild()."""
+        if self.static_layer is None:
+            self.static_layer = self.build_static_layer(background)
+        return self.static_layer
+    
+    def get_racing_line(self, cache_dir: str = CACHE_DIR) -> 'RacingLine':
+        """Get the AI racing line, loaded or computed on first use after load or rebuild(). Its target
+        speeds are for the default CarParams (see RacingLine.for_params for other cars)."""
+        if self.racing_line is None:
+            self.racing_line = RacingLine.load(self, cache_dir)
+        return self.racing_line
+    
+    def get_clearance(self, x: float, y: float, limit: float) -> float:
+        """Get the distance from a point to the nearest wall, screen edge or road edge, up to limit."""
+        clearance = min(limit, x, y, SCREEN_WIDTH - x, SCREEN_HEIGHT - y)
+        if self.field is not None:
+            clearance = min(clearance, self.field.get_distance(x, y))
+        area = pygame.Rect(int(x - limit) - 1, int(y - limit) - 1, int(limit * 2) + 3, int(limit * 2) + 3)
+        for index in self.wall_index.query(area):
+            wall = self.walls[index]
+            dx = max(wall.left - x, 0.0, x - wall.right)
+            dy = max(wall.top - y, 0.0, y - wall.bottom)
+            clearance = min(clearance, math.hypot(dx, dy))
+        return clearance
     
     def check_wall_collision(self, car: Car) -> bool:
-        """Check if car collides with any wall."""
-        for wall in self.walls:
-            if car.rect.colliderect(wall):
-                return True
-        return False
+        """Check if the car's rotated box overlaps any wall (or leaves the road of the track image)."""
+        center_x, center_y, sin_angle, cos_angle = car.get_box()
+        if self.field is not None and self.field.get_push_out(
+                get_box_outline((center_x, center_y), sin_angle, cos_angle)) is not None:
+            return True
+        axes = get_separating_axes(sin_angle, cos_angle)
+        area = get_box_bounds((center_x, center_y), axes[0][2], axes[1][2])
+        return any(get_wall_overlap((center_x, center_y), axes, self.walls[index]) is not None
+                   for index in self.wall_index.query(area))
     
-    def handle_wall_collisions(self, car: Car) -> bool:
-        """Handle wall collisions with proper positioning and velocity reduction. Returns True if collision occurred."""
+    def handle_wall_collisions(self, car: Car, dt: float = REFERENCE_DT) -> bool:
+        """Handle wall collisions with proper positioning and velocity reduction. Returns True if collision occurred.
+        
+        The car's rotated box is swept from its previous to its current center against every
+        candidate wall (separating axis test over time): it stops at the earliest contact and
+        slides along that wall for the rest of the move, which is swept again, so fast cars
+        cannot pass through thin walls or corners.
+        """
         collision_occurred = False
+        axes = get_separating_axes(car.sin_angle, car.cos_angle)
+        half_width, half_height = axes[0][2], axes[1][2]
+        start = (car.previous_x + CAR_WIDTH / 2, car.previous_y + CAR_HEIGHT / 2)
+        end = (car.x + CAR_WIDTH / 2, car.y + CAR_HEIGHT / 2)
         
-        for wall in self.walls:
-            if car.rect.colliderect(wall):
-                collision_occurred = True
-                
-                # Determine which side of the wall was hit and reposition accordingly
-                car_center_x = car.x + CAR_WIDTH // 2
-                car_center_y = car.y + CAR_HEIGHT // 2
-                wall_center_x = wall.x + wall.width // 2
-                wall_center_y = wall.y + wall.height // 2
-                
-                # Calculate overlap distances
-                overlap_x = min(car.x + CAR_WIDTH - wall.x, wall.x + wall.width - car.x)
-                overlap_y = min(car.y + CAR_HEIGHT - wall.y, wall.y + wall.height - car.y)
-                
-                # Resolve collision by moving car to the side with smaller overlap
-                if overlap_x < overlap_y:
-                    # Horizontal collision - move car left or right
-                    if car_center_x < wall_center_x:
-                        # Car is to the left of wall, push it left
-                        car.x = wall.x - CAR_WIDTH
-                    else:
-                        # Car is to the right of wall, push it right
-                        car.x = wall.x + wall.width
-                else:
-                    # Vertical collision - move car up or down
-                    if car_center_y < wall_center_y:
-                        # Car is above wall, push it up
-                        car.y = wall.y - CAR_HEIGHT
-                    else:
-                        # Car is below wall, push it down
-                        car.y = wall.y + wall.height
-                
-                # Reduce velocity on collision (same as screen boundaries)
-                car.velocity *= 0.5
-                
-                # Update collision rectangle
-                car.rect.topleft = (car.x, car.y)
-                
-                # Only handle one collision per frame for stability
+        for _ in range(MAX_COLLISION_ITERATIONS):
+            if start == end:
+                break
+            
+            # Find the earliest wall hit along the remaining move
+            area = get_box_bounds(start, half_width, half_height).union(get_box_bounds(end, half_width, half_height))
+            earliest = None
+            for index in self.wall_index.query(area):
+                hit = sweep_box(start, end, axes, self.walls[index])
+                if hit is not None and (earliest is None or hit[0] < earliest[0]):
+                    earliest = hit
+            if earliest is None:
                 break
+            
+            # Stop at the contact and keep the part of the remaining move along the wall
+            collision_occurred = True
+            impact, normal_x, normal_y = earliest
+            contact = (start[0] + (end[0] - start[0]) * impact, start[1] + (end[1] - start[1]) * impact)
+            remaining_x, remaining_y = end[0] - contact[0], end[1] - contact[1]
+            into_wall = remaining_x * normal_x + remaining_y * normal_y
+            start = contact
+            end = (end[0] - into_wall * normal_x, end[1] - into_wall * normal_y)
+        
+        # Fallback for a car that started the step overlapping a wall (or turned into one)
+        for index in self.wall_index.query(get_box_bounds(end, half_width, half_height)):
+            push = get_wall_overlap(end, axes, self.walls[index])
+            if push is not None:
+                collision_occurred = True
+                end = (end[0] + push[0], end[1] + push[1])
+        
+        # Keep the car's outline on the road of the track image, deepest point first
+        if self.field is not None:
+            for _ in range(MAX_COLLISION_ITERATIONS):
+                push = self.field.get_push_out(get_box_outline(end, car.sin_angle, car.cos_angle))
+                if push is None:
+                    break
+                collision_occurred = True
+                end = (end[0] + push[0], end[1] + push[1])
+        
+        if collision_occurred:
+            car.x = end[0] - CAR_WIDTH / 2
+            car.y = end[1] - CAR_HEIGHT / 2
+            car.rect.topleft = (car.x, car.y)
+            
+            # Reduce velocity (same as screen boundaries)
+            car.velocity *= get_contact_speed_keep(car.wall_contact, dt)
+        car.wall_contact = collision_occurred
         
         return collision_occurred
     
-    def check_checkpoint_collision(self, car: Car, checkpoints_crossed: List[bool]) -> List[bool]:
-        """Check and update checkpoint crossings."""
-        for i, checkpoint in enumerate(self.checkpoints):
-            if car.rect.colliderect(checkpoint) and not checkpoints_crossed[i]:
-                checkpoints_crossed[i] = True
-        return checkpoints_crossed
+    def get_checkpoint_crossings(self, car: Car) -> List[Tuple[float, int]]:
+        """Get (fraction of the last step, checkpoint index) for every checkpoint the car's
+        center crossed during its last step, in the order they were crossed."""
+        previous_center = (car.previous_x + CAR_WIDTH / 2, car.previous_y + CAR_HEIGHT / 2)
+        center = (car.x + CAR_WIDTH / 2, car.y + CAR_HEIGHT / 2)
+        crossings = []
+        for index in self.checkpoint_index.query(car.get_swept_rect()):
+            line_start, line_end = self.checkpoint_segments[index]
+            fraction = segment_crossing(previous_center, center, line_start, line_end)
+            if fraction is not None:
+                crossings.append((fraction, index))
+        crossings.sort()
+        return crossings
     
-    def check_start_line_collision(self, car: Car) -> bool:
-        """Check if car crosses start/finish line."""
-        return car.rect.colliderect(self.start_line)
+    def get_start_line_crossing(self, car: Car) -> Optional[float]:
+        """Get the fraction of the car's last step at which its center crossed the start/finish line."""
+        line_start, line_end = self.start_line_segment
+        previous_center = (car.previous_x + CAR_WIDTH / 2, car.previous_y + CAR_HEIGHT / 2)
+        center = (car.x + CAR_WIDTH / 2, car.y + CAR_HEIGHT / 2)
+        return segment_crossing(previous_center, center, line_start, line_end)
     
     def draw(self, screen: pygame.Surface):
         """Draw all track elements."""
@@ -558,50 +1244,921 @@ class Track:
 
 
 class LapTimer:
-    """Manages lap timing and lap counting."""
+    """Manages lap timing and lap counting on simulated time.
     
-    def __init__(self):
-        """Initialize timer variables."""
+    Lap times come from the simulation tick counter (with crossings interpolated
+    within a tick), so they are reproducible regardless of frame rate or stalls.
+    Wall-clock time is only used to smooth the running clock on screen.
+    
+    Splits are lap times at each checkpoint; the lap time itself is the final
+    split, so sector i runs from split i-1 to split i.
+    """
+    
+    def __init__(self, dt: float = 1.0 / PHYSICS_HZ):
+        """Initialize timer variables for a simulation stepping at dt seconds per tick."""
+        self.dt = dt
+        self.current_time = 0.0      # Simulated time of the latest tick
+        self.tick_wall_ns = time.perf_counter_ns()  # When that tick was simulated (display only)
         self.start_time: Optional[float] = None
         self.best_time = float('inf')
         self.last_lap_time: Optional[float] = None
         self.lap_count = 1
-        self.lap_completed = False
+        
+        self.current_splits: List[float] = []   # Splits of the lap in progress
+        self.last_splits: List[float] = []
+        self.best_splits: List[float] = []      # Splits of the best lap, ending with its lap time
+        self.delta_to_best: Optional[float] = None  # Live delta of the lap in progress (None until known)
     
     def reset(self):
         """Reset timer to initial state."""
+        self.current_time = 0.0
+        self.tick_wall_ns = time.perf_counter_ns()
         self.start_time = None
         self.best_time = float('inf')
         self.last_lap_time = None
         self.lap_count = 1
-        self.lap_completed = False
+        self.current_splits = []
+        self.last_splits = []
+        self.best_splits = []
+        self.delta_to_best = None
+    
+    def update(self, current_time: float):
+        """Advance to the simulated time of the latest tick."""
+        self.current_time = current_time
+        self.tick_wall_ns = time.perf_counter_ns()
+        
+        # Once past the best lap's time at the next split, the delta can only grow: from the
+        # last split's delta, or from zero before the lap's first split
+        split_index = len(self.current_splits)
+        if self.start_time is not None and split_index < len(self.best_splits):
+            behind = current_time - self.start_time - self.best_splits[split_index]
+            if behind > (self.delta_to_best if self.delta_to_best is not None else 0.0):
+                self.delta_to_best = behind
     
-    def start_timing(self):
-        """Start the lap timer."""
+    def record_split(self, crossing_time: float) -> Optional[float]:
+        """Record a split at the simulated time a checkpoint was crossed. Returns the delta to the best lap."""
         if self.start_time is None:
-            self.start_time = time.time()
+            return None
+        split = crossing_time - self.start_time
+        split_index = len(self.current_splits)
+        self.current_splits.append(split)
+        if split_index < len(self.best_splits):
+            self.delta_to_best = split - self.best_splits[split_index]
+        return self.delta_to_best
+    
+    def get_sector_times(self, splits: List[float]) -> List[float]:
+        """Get the time spent in each sector from a list of splits."""
+        return [split - previous for previous, split in zip([0.0] + splits, splits)]
     
-    def complete_lap(self, checkpoints_crossed: List[bool]) -> bool:
-        """Complete a lap if all checkpoints were crossed. Returns True if lap was valid."""
+    def start_timing(self, at_time: Optional[float] = None):
+        """Start the lap timer at the given simulated time (default: the latest tick)."""
+        if self.start_time is None:
+            self.start_time = self.current_time if at_time is None else at_time
+    
+    def complete_lap(self, checkpoints_crossed: List[bool], crossing_time: float) -> bool:
+        """Complete a lap at the simulated time the line was crossed, if all checkpoints
+        were crossed. Returns True if lap was valid."""
         if not all(checkpoints_crossed) or self.start_time is None:
             return False
         
-        elapsed_time = time.time() - self.start_time
+        elapsed_time = crossing_time - self.start_time
         self.last_lap_time = elapsed_time
+        self.record_split(crossing_time)
+        self.last_splits = self.current_splits
+        self.current_splits = []
         
         if elapsed_time < self.best_time:
             self.best_time = elapsed_time
+            self.best_splits = self.last_splits
         
         self.lap_count += 1
-        self.start_time = time.time()
+        self.start_time = crossing_time
+        self.delta_to_best = None  # Nothing to compare the new lap with until it is behind or at a split
         return True
     
     def get_current_time(self) -> float:
         """Get current lap time, clamped to maximum of 60 seconds."""
         if self.start_time is None:
             return 0.0
-        current_time = time.time() - self.start_time
+        current_time = self.current_time - self.start_time
         return min(current_time, 60.0)  # Clamp to maximum 60 seconds
+    
+    def get_display_time(self) -> float:
+        """Get current lap time for display, advanced by wall time since the last tick (at most one tick)."""
+        if self.start_time is None:
+            return 0.0
+        since_tick = min(self.dt, (time.perf_counter_ns() - self.tick_wall_ns) / 1e9)
+        return min(self.current_time - self.start_time + since_tick, 60.0)
+
+
+class GhostLap:
+    """Trajectory of a recorded lap: x, y and angle per tick, packed as float32."""
+    
+    MAGIC = b'HLGH'
+    VERSION = 2
+    HEADER = struct.Struct('<4sB16sddI')  # Magic, version, track hash, dt, lap time, tick count
+    
+    def __init__(self, trajectory: array, dt: float, lap_time: float, track_hash: bytes = bytes(16)):
+        """Wrap a packed trajectory recorded at dt seconds per tick, on the track with the given
+        source hash (see Track.source_hash)."""
+        self.trajectory = trajectory
+        self.dt = dt
+        self.lap_time = lap_time
+        self.track_hash = track_hash
+    
+    @property
+    def tick_count(self) -> int:
+        """Number of recorded ticks."""
+        return len(self.trajectory) // 3
+    
+    def get_pose(self, elapsed: float) -> Optional[Tuple[float, float, float]]:
+        """Get (x, y, angle) at the given time into the lap, interpolated between ticks, or None past the end."""
+        position = elapsed / self.dt
+        index = int(position)
+        if index >= self.tick_count:
+            return None
+        offset = index * 3
+        trajectory = self.trajectory
+        if index + 1 >= self.tick_count:
+            return trajectory[offset], trajectory[offset + 1], trajectory[offset + 2]
+        
+        blend = position - index
+        return (trajectory[offset] + (trajectory[offset + 3] - trajectory[offset]) * blend,
+                trajectory[offset + 1] + (trajectory[offset + 4] - trajectory[offset + 1]) * blend,
+                trajectory[offset + 2] + (trajectory[offset + 5] - trajectory[offset + 2]) * blend)
+    
+    def draw(self, screen: pygame.Surface, sprites: RotatedSpriteCache, elapsed: float) -> Optional[pygame.Rect]:
+        """Draw the ghost at the given time into the lap. Returns the area drawn."""
+        pose = self.get_pose(elapsed)
+        if pose is None:
+            return None
+        x, y, angle = pose
+        sprite = sprites.get(angle)
+        center = (int(x) + CAR_WIDTH // 2, int(y) + CAR_HEIGHT // 2)
+        return screen.blit(sprite, sprite.get_rect(center=center).topleft)
+    
+    def to_bytes(self) -> bytes:
+        """Serialize to the binary ghost format (header plus little-endian float32 samples)."""
+        samples = array('f', self.trajectory)
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        return (self.HEADER.pack(self.MAGIC, self.VERSION, self.track_hash, self.dt, self.lap_time, self.tick_count) +
+                samples.tobytes())
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GhostLap':
+        """Parse the binary ghost format."""
+        if len(data) < cls.HEADER.size:
+            raise ValueError("Ghost data is truncated")
+        magic, version, track_hash, dt, lap_time, tick_count = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Not a Hot LapY ghost (or unsupported version)")
+        
+        samples = array('f')
+        samples.frombytes(data[cls.HEADER.size:])
+        if sys.byteorder == 'big':
+            samples.byteswap()
+        if len(samples) != tick_count * 3:
+            raise ValueError("Ghost sample count does not match its header")
+        return cls(samples, dt, lap_time, track_hash)
+    
+    def save(self, path: str):
+        """Write the ghost to a file."""
+        with open(path, 'wb') as ghost_file:
+            ghost_file.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path: str) -> 'GhostLap':
+        """Read a ghost from a file."""
+        with open(path, 'rb') as ghost_file:
+            return cls.from_bytes(ghost_file.read())
+
+
+class StepResult:
+    """Events produced by a single simulation step."""
+    
+    def __init__(self, engine_active: bool = False, wall_collision: bool = False,
+                 boundary_collision: bool = False, lap_completed: bool = False, new_best_lap: bool = False):
+        """Store step events."""
+        self.engine_active = engine_active
+        self.wall_collision = wall_collision
+        self.boundary_collision = boundary_collision
+        self.lap_completed = lap_completed
+        self.new_best_lap = new_best_lap  # best_lap ghost was replaced this step
+    
+    @property
+    def collision(self) -> bool:
+        """True if the car hit a wall or the screen boundary this step."""
+        return self.wall_collision or self.boundary_collision
+
+
+class WaypointDriver:
+    """Scripted driver that steers the car's center towards each track waypoint in turn,
+    lifting off the throttle while the heading error is large."""
+    
+    def __init__(self, waypoints: List[Tuple[float, float]], reach_distance: float = 60.0,
+                 full_lock_error: float = 10.0, lift_error: float = 30.0):
+        """Create a driver for a waypoint loop (angles in degrees, distances in pixels)."""
+        if not waypoints:
+            raise ValueError("A waypoint driver needs at least one waypoint")
+        self.waypoints = waypoints
+        self.reach_distance = reach_distance
+        self.full_lock_error = full_lock_error
+        self.lift_error = lift_error
+        self.target = 0
+    
+    def reset(self):
+        """Start again from the first waypoint."""
+        self.target = 0
+    
+    def __call__(self, simulation: 'Simulation') -> DriverInput:
+        """Get the controls for the next step."""
+        car = simulation.car
+        center_x, center_y = car.x + CAR_WIDTH / 2, car.y + CAR_HEIGHT / 2
+        target_x, target_y = self.waypoints[self.target]
+        if math.hypot(target_x - center_x, target_y - center_y) < self.reach_distance:
+            self.target = (self.target + 1) % len(self.waypoints)
+            target_x, target_y = self.waypoints[self.target]
+        
+        # Heading 0 is up, clockwise positive, matching Car.angle
+        heading = math.degrees(math.atan2(target_x - center_x, center_y - target_y))
+        error = (heading - car.angle + 180) % 360 - 180
+        return DriverInput(throttle=1.0 if abs(error) < self.lift_error or car.velocity < 2 else 0.0,
+                           steer=max(-1.0, min(1.0, error / self.full_lock_error)))
+
+
+class RacingLine:
+    """Closed AI racing line: evenly spaced points with the heading, signed curvature (1/pixels,
+    positive turning right) and target speed (Car.velocity units) at each point.
+    
+    The target speed is the fastest the car can take the curvature with some steering in
+    reserve, lowered ahead of corners so that braking at full force reaches it in time.
+    """
+    
+    def __init__(self, points: List[Tuple[float, float]], params: Optional[CarParams] = None,
+                 speeds: Optional[List[float]] = None):
+        """Compute headings, curvature and the speed profile (unless given) of a closed line of evenly spaced points."""
+        if len(points) < 3:
+            raise ValueError("A racing line needs at least three points")
+        self.points = points
+        self.count = len(points)
+        self.params = params if params is not None else CarParams()
+        self.spacing = sum(math.dist(point, points[index - 1]) for index, point in enumerate(points)) / self.count
+        
+        self.headings = []
+        self.curvatures = []
+        for index in range(self.count):
+            before = points[index - 2]
+            (x, y) = points[index]
+            after = points[(index + 2) % self.count]
+            self.headings.append(math.degrees(math.atan2(after[0] - before[0], before[1] - after[1])))
+            
+            # Menger curvature of the point and its neighbours two points away
+            cross = (x - before[0]) * (after[1] - y) - (y - before[1]) * (after[0] - x)
+            lengths = math.dist(before, (x, y)) * math.dist((x, y), after) * math.dist(before, after)
+            self.curvatures.append(2.0 * cross / lengths if lengths > 0 else 0.0)
+        if speeds is not None and len(speeds) != self.count:
+            raise ValueError("A racing line needs one target speed per point")
+        self.speeds = list(speeds) if speeds is not None else self.get_speed_profile()
+    
+    @classmethod
+    def from_waypoints(cls, waypoints: List[Tuple[float, float]], track: Optional['Track'] = None,
+                       params: Optional[CarParams] = None) -> 'RacingLine':
+        """Fit a line through a waypoint loop: a Catmull-Rom spline, relaxed towards the inside
+        of corners while it keeps LINE_CLEARANCE from the track's walls (if a track is given)."""
+        if len(waypoints) < 3:
+            raise ValueError("A racing line needs at least three waypoints")
+        spline = []
+        for index in range(len(waypoints)):
+            p0, p1, p2, p3 = (waypoints[(index + offset) % len(waypoints)] for offset in (-1, 0, 1, 2))
+            samples = max(1, int(math.dist(p1, p2) / 2))
+            for sample in range(samples):
+                t = sample / samples
+                spline.append(tuple(0.5 * (2 * b + (c - a) * t + (2 * a - 5 * b + 4 * c - d) * t * t +
+                                           (3 * b - a - 3 * c + d) * t * t * t)
+                                    for a, b, c, d in zip(p0, p1, p2, p3)))
+        points = resample_loop(spline, LINE_SPACING)
+        
+        # Relax each point towards the midpoint of its neighbours unless that brings it too near a wall
+        for _ in range(LINE_SMOOTHING_PASSES):
+            for index in range(len(points)):
+                (x, y), before, after = points[index], points[index - 1], points[(index + 1) % len(points)]
+                moved = ((x + (before[0] + after[0]) / 2) / 2, (y + (before[1] + after[1]) / 2) / 2)
+                if track is None or track.get_clearance(*moved, LINE_CLEARANCE) >= min(
+                        LINE_CLEARANCE, track.get_clearance(x, y, LINE_CLEARANCE)):
+                    points[index] = moved
+        return cls(resample_loop(points, LINE_SPACING), params)
+    
+    @classmethod
+    def from_track(cls, track: 'Track', params: Optional[CarParams] = None) -> 'RacingLine':
+        """Fit a line through a track's waypoints (see Track.get_racing_line for the cached one)."""
+        return cls.from_waypoints(track.waypoints, track, params)
+    
+    @classmethod
+    def load(cls, track: 'Track', cache_dir: str = CACHE_DIR, params: Optional[CarParams] = None) -> 'RacingLine':
+        """Get the line fitted to a track, from the disk cache when the track's layout is unchanged."""
+        layout = (track.waypoints, [tuple(wall) for wall in track.walls],
+                  track.get_image_stamp() if track.field is not None else None,
+                  LINE_SPACING, LINE_SMOOTHING_PASSES, LINE_CLEARANCE)
+        key = hashlib.blake2b(repr(layout).encode(), digest_size=16).hexdigest()
+        cache_path = os.path.join(cache_dir, f"racing_line_{key}.bin")
+        
+        try:
+            values = array('d')
+            with open(cache_path, 'rb') as cache_file:
+                values.frombytes(cache_file.read())
+            if sys.byteorder != 'little':
+                values.byteswap()
+            return cls(list(zip(values[0::2], values[1::2])), params)
+        except (OSError, ValueError):
+            pass  # Not computed yet (or unreadable): fit it
+        
+        line = cls.from_track(track, params)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            values = array('d', [value for point in line.points for value in point])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temporary_path, 'wb') as cache_file:
+                cache_file.write(values.tobytes())
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            pass  # Read-only install: fit it again next time
+        return line
+    
+    def for_params(self, params: Optional[CarParams]) -> 'RacingLine':
+        """Get the line with the speed profile of a car with other params (itself for the same params)."""
+        if params is None or params.to_dict() == self.params.to_dict():
+            return self
+        return RacingLine(self.points, params)
+    
+    def save(self, path: str, lap_time: Optional[float] = None):
+        """Write the points and target speeds to a JSON line file (as made by optimize_line.py)."""
+        with open(path, 'w') as line_file:
+            json.dump({'lap_time': lap_time, 'points': [list(point) for point in self.points],
+                       'speeds': self.speeds}, line_file)
+    
+    @classmethod
+    def from_file(cls, path: str, params: Optional[CarParams] = None) -> 'RacingLine':
+        """Read a line written by save, keeping its target speeds."""
+        with open(path) as line_file:
+            data = json.load(line_file)
+        try:
+            points = [(float(x), float(y)) for x, y in data['points']]
+            speeds = [float(speed) for speed in data['speeds']]
+        except (KeyError, TypeError) as error:
+            raise ValueError(f"Malformed racing line file: {error}") from None
+        return cls(points, params, speeds)
+    
+    def get_corner_speed(self, curvature: float) -> float:
+        """Get the fastest speed at which the car can follow a curvature with LINE_STEER_MARGIN of full lock."""
+        params = self.params
+        speed = params.max_speed
+        while speed > LINE_MIN_SPEED:
+            if math.radians(params.get_max_turn_rate(speed)) * LINE_STEER_MARGIN >= speed * abs(curvature):
+                return speed
+            speed -= 0.05
+        return LINE_MIN_SPEED
+    
+    def get_speed_profile(self) -> List[float]:
+        """Get the target speed at each point: corner speeds, lowered ahead of slower points for braking."""
+        params = self.params
+        speeds = [self.get_corner_speed(curvature) for curvature in self.curvatures]
+        for index in range(2 * self.count - 1, -1, -1):  # Twice round the loop, backwards
+            point = index % self.count
+            next_speed = speeds[(point + 1) % self.count]
+            
+            # Full brakes plus drag (engine braking ignored, so the estimate errs on the safe side)
+            braking = params.acceleration * (params.brake_force * params.get_traction(next_speed) +
+                                             next_speed * params.deceleration * params.friction_coefficient)
+            speeds[point] = min(speeds[point], math.sqrt(next_speed ** 2 + 2 * braking * self.spacing))
+        return speeds
+    
+    def get_nearest(self, x: float, y: float, hint: Optional[int] = None) -> int:
+        """Get the index of the line point nearest to (x, y). Given the previous nearest point as
+        hint, only walks from it along the line (a car moves a point or two per step)."""
+        points = self.points
+        if hint is None:
+            return min(range(self.count), key=lambda index: (points[index][0] - x) ** 2 + (points[index][1] - y) ** 2)
+        
+        index = hint
+        point_x, point_y = points[index]
+        nearest = (point_x - x) ** 2 + (point_y - y) ** 2
+        for step in (1, -1):
+            while True:
+                point_x, point_y = points[(index + step) % self.count]
+                distance = (point_x - x) ** 2 + (point_y - y) ** 2
+                if distance >= nearest:
+                    break
+                index = (index + step) % self.count
+                nearest = distance
+        return index
+    
+    def get_length(self) -> float:
+        """Get the length of the loop in pixels."""
+        return self.spacing * self.count
+
+
+def resample_loop(points: List[Tuple[float, float]], spacing: float) -> List[Tuple[float, float]]:
+    """Resample a closed polyline to points evenly spaced about spacing apart along it."""
+    lengths = [math.dist(point, points[(index + 1) % len(points)]) for index, point in enumerate(points)]
+    count = max(3, round(sum(lengths) / spacing))
+    step = sum(lengths) / count
+    resampled = []
+    segment = 0
+    segment_start = 0.0
+    for sample in range(count):
+        along = sample * step
+        while segment_start + lengths[segment] < along and segment < len(points) - 1:
+            segment_start += lengths[segment]
+            segment += 1
+        (x1, y1), (x2, y2) = points[segment], points[(segment + 1) % len(points)]
+        t = (along - segment_start) / lengths[segment] if lengths[segment] > 0 else 0.0
+        resampled.append((x1 + (x2 - x1) * t, y1 + (y2 - y1) * t))
+    return resampled
+
+
+class PurePursuitDriver:
+    """AI driver that steers along the arc to a racing line point ahead of the car (pure
+    pursuit) and brakes or accelerates towards the line's target speed."""
+    
+    def __init__(self, line: RacingLine):
+        """Create a driver for a racing line."""
+        self.line = line
+        self.index: Optional[int] = None  # Nearest line point, tracked from step to step
+    
+    def reset(self):
+        """Forget the car's position on the line."""
+        self.index = None
+    
+    def drive(self, car: Car) -> DriverInput:
+        """Get the controls for a car's next step."""
+        line = self.line
+        center_x, center_y = car.x + CAR_WIDTH / 2, car.y + CAR_HEIGHT / 2
+        self.index = index = line.get_nearest(center_x, center_y, self.index)
+        speed = abs(car.velocity)
+        
+        # Steer onto the arc through the lookahead point: curvature 2 sin(alpha) / distance
+        lookahead = LOOKAHEAD_BASE + LOOKAHEAD_PER_SPEED * speed
+        target_x, target_y = line.points[(index + int(lookahead / line.spacing)) % line.count]
+        offset_x, offset_y = target_x - center_x, target_y - center_y
+        distance = math.hypot(offset_x, offset_y) or 1.0
+        across = (offset_x * car.cos_angle + offset_y * car.sin_angle) / distance   # Towards the car's right
+        ahead = offset_x * car.sin_angle - offset_y * car.cos_angle
+        if ahead < 0:
+            steer = 1.0 if across >= 0 else -1.0  # Target behind: full lock towards it
+        else:
+            yaw_rate = math.degrees(speed * 2.0 * across / distance)
+            steer = max(-1.0, min(1.0, yaw_rate / max(car.params.get_max_turn_rate(speed), 1e-6)))
+        
+        # Match the target speed a little way ahead, to allow for the progressive pedals
+        target_speed = line.speeds[(index + BRAKING_LEAD) % line.count]
+        if speed > target_speed + 0.2:
+            return DriverInput(brake=min(1.0, speed - target_speed), steer=steer)
+        return DriverInput(throttle=1.0 if speed < target_speed else 0.0, steer=steer)
+    
+    def __call__(self, simulation: 'Simulation') -> DriverInput:
+        """Get the controls for the simulation's car (so it can drive Simulation.run)."""
+        return self.drive(simulation.car)
+
+
+class Opponent:
+    """AI car starting at a point of a racing line and driven by a PurePursuitDriver."""
+    
+    def __init__(self, line: 'RacingLine', start_index: int):
+        """Place a car with the line's params on its point start_index, facing along the line."""
+        center_x, center_y = line.points[start_index % line.count]
+        self.start_angle = line.headings[start_index % line.count]
+        self.car = Car(center_x - CAR_WIDTH / 2, center_y - CAR_HEIGHT / 2, line.params)
+        self.driver = PurePursuitDriver(line)
+        self.reset()
+    
+    def reset(self):
+        """Put the car back on its grid slot."""
+        car = self.car
+        car.reset_to_initial_state()
+        car.angle = car.previous_angle = self.start_angle
+        car.sin_angle = math.sin(math.radians(self.start_angle))
+        car.cos_angle = math.cos(math.radians(self.start_angle))
+        self.driver.reset()
+    
+    def step(self, track: 'Track', dt: float) -> bool:
+        """Drive one fixed step, colliding with the track. Returns True on a collision."""
+        car = self.car
+        car.apply_input(self.driver.drive(car), dt)
+        wall_collision = track.handle_wall_collisions(car, dt)
+        return car.handle_screen_boundaries(dt) or wall_collision
+
+
+class Simulation:
+    """Headless fixed-step race simulation of a Car on a Track, timed by a LapTimer.
+    
+    Nothing here touches the display or the mixer, so it runs without SDL and as
+    fast as the CPU allows instead of being paced by the game's frame clock.
+    """
+    
+    def __init__(self, track: Optional[Track] = None, car: Optional[Car] = None,
+                 timer: Optional[LapTimer] = None, dt: float = 1.0 / PHYSICS_HZ):
+        """Initialize simulation state. The default timer runs on simulated time."""
+        self.dt = dt
+        self.tick = 0
+        self.track = track if track is not None else Track()
+        self.car = car if car is not None else Car(*self.track.spawn)  # Start position
+        self.timer = timer if timer is not None else LapTimer(dt)
+        self.checkpoints_crossed = [False] * len(self.track.checkpoints)
+        
+        # Trajectory of the lap in progress, sampled every ghost_stride ticks, and the fastest lap so far
+        self.current_lap = array('f')
+        self.lap_ticks = 0
+        self.ghost_stride = max(1, round(1.0 / (GHOST_HZ * dt)))
+        self.best_lap: Optional[GhostLap] = None
+        
+        # AI cars sharing the track (they do not collide with the player)
+        self.opponents: List[Opponent] = []
+    
+    def add_opponents(self, count: int, params: Optional[CarParams] = None):
+        """Line up count AI cars on the racing line ahead of the player's start, OPPONENT_SPACING apart."""
+        line = self.track.get_racing_line().for_params(params)  # Braking points and corner speeds for these cars
+        start = line.get_nearest(self.car.initial_x + CAR_WIDTH / 2, self.car.initial_y + CAR_HEIGHT / 2)
+        gap = max(1, round(OPPONENT_SPACING / line.spacing))
+        for slot in range(len(self.opponents) + 1, len(self.opponents) + count + 1):
+            self.opponents.append(Opponent(line, start + slot * gap))
+    
+    def get_elapsed_time(self) -> float:
+        """Get simulated time in seconds since the last reset."""
+        return self.tick * self.dt
+    
+    def reset(self):
+        """Reset car, timer and lap progress to the initial state."""
+        self.tick = 0
+        self.car.reset_to_initial_state()
+        self.timer.reset()
+        self.checkpoints_crossed = [False] * len(self.track.checkpoints)
+        self.current_lap = array('f')
+        self.lap_ticks = 0
+        self.ghost_stride = max(1, round(1.0 / (GHOST_HZ * self.dt)))  # replay() may have changed dt
+        for opponent in self.opponents:
+            opponent.reset()
+    
+    def get_lap_elapsed_time(self) -> float:
+        """Get simulated time of the car's current pose within the recorded lap (for ghosts)."""
+        return max(0, self.lap_ticks - 1) * self.dt
+    
+    def step(self, controls: DriverInput) -> StepResult:
+        """Advance the simulation by one fixed time step."""
+        if controls.reset:
+            self.reset()
+            return StepResult()
+        
+        # Update car movement with realistic physics
+        engine_active = self.car.apply_input(controls, self.dt)
+        self.tick += 1
+        self.timer.update(self.get_elapsed_time())
+        
+        # Start timer on first movement
+        if engine_active and abs(self.car.velocity) > 0.1:
+            self.timer.start_timing()
+        
+        # Handle wall collisions with improved positioning
+        wall_collision = self.track.handle_wall_collisions(self.car, self.dt)
+        boundary_collision = self.car.handle_screen_boundaries(self.dt)
+        
+        # AI cars drive the same physics from their own controls
+        for opponent in self.opponents:
+            opponent.step(self.track, self.dt)
+        
+        # Record the lap trajectory once timing has started
+        if self.timer.start_time is not None:
+            if self.lap_ticks % self.ghost_stride == 0 and len(self.current_lap) < GHOST_MAX_SECONDS * GHOST_HZ * 3:
+                self.current_lap.extend((self.car.x, self.car.y, self.car.angle))
+            self.lap_ticks += 1
+        
+        # Check checkpoint crossings in sequence, recording a split at each one
+        for crossing, index in self.track.get_checkpoint_crossings(self.car):
+            if index == self.checkpoints_crossed.count(True):
+                self.checkpoints_crossed[index] = True
+                self.timer.record_split((self.tick - 1 + crossing) * self.dt)
+        
+        # Handle start/finish line crossing, timed to the point within this step
+        lap_completed = False
+        new_best_lap = False
+        crossing = self.track.get_start_line_crossing(self.car)
+        if crossing is not None and self.timer.start_time is not None:
+            crossing_time = (self.tick - 1 + crossing) * self.dt
+            if self.timer.complete_lap(self.checkpoints_crossed, crossing_time):
+                self.checkpoints_crossed = [False] * len(self.track.checkpoints)
+                lap_completed = True
+                new_best_lap = self.finish_lap_trajectory()
+        
+        return StepResult(engine_active, wall_collision, boundary_collision, lap_completed, new_best_lap)
+    
+    def finish_lap_trajectory(self) -> bool:
+        """Keep the completed lap's trajectory if it beats the best lap. Returns True if it did."""
+        lap_time = self.timer.last_lap_time
+        trajectory = self.current_lap
+        self.current_lap = array('f')
+        self.lap_ticks = 0
+        if self.best_lap is None or lap_time < self.best_lap.lap_time:
+            self.best_lap = GhostLap(trajectory, self.dt * self.ghost_stride, lap_time, self.track.source_hash)
+            return True
+        return False
+    
+    def run(self, driver: Callable[['Simulation'], DriverInput], max_ticks: int,
+            max_laps: Optional[int] = None) -> int:
+        """Step with controls from driver until max_ticks or max_laps completed laps. Returns ticks run."""
+        for ticks in range(1, max_ticks + 1):
+            result = self.step(driver(self))
+            if result.lap_completed and max_laps is not None and self.timer.lap_count - 1 >= max_laps:
+                return ticks
+        return max_ticks
+    
+    def get_state_checksum(self) -> bytes:
+        """Get a digest of the simulated state, used to verify that replays are deterministic."""
+        car = self.car
+        state = struct.pack('<q8di', self.tick, car.x, car.y, car.angle, car.velocity, car.engine_rpm,
+                            car.throttle, car.brake, car.gear_shift_timer, car.current_gear)
+        progress = bytes(self.checkpoints_crossed) + struct.pack('<i', self.timer.lap_count)
+        return hashlib.blake2b(state + progress, digest_size=8).digest()
+    
+    def replay(self, log: 'InputLog') -> bool:
+        """Re-simulate a recorded input log from a reset. Returns True if the final state matches the recording."""
+        self.dt = log.dt
+        self.reset()
+        step = self.step
+        for controls in log:
+            step(controls)
+        return log.final_checksum is None or log.final_checksum == self.get_state_checksum()
+
+
+class InputLog:
+    """Compact recording of per-tick driver inputs for deterministic replays.
+    
+    Each tick's controls are packed into bits (throttle, brake, steer left, steer
+    right, reset) and stored delta-encoded as runs of unchanged input, so a lap
+    held on full throttle costs a few bytes instead of one sample per tick. The
+    header names the track and collision mode, which a replay has to match.
+    """
+    
+    MAGIC = b'HLRP'
+    VERSION = 2
+    HEADER = struct.Struct('<4sBdI8s16s?')  # Magic, version, dt, tick count, checksum, track hash, image collision
+    
+    THROTTLE_BIT = 1
+    BRAKE_BIT = 2
+    LEFT_BIT = 4
+    RIGHT_BIT = 8
+    RESET_BIT = 16
+    
+    def __init__(self, dt: float = 1.0 / PHYSICS_HZ, track_hash: bytes = bytes(16), image_collision: bool = False):
+        """Initialize an empty log for a simulation stepping at dt seconds per tick, on the track with
+        the given source hash (see Track.source_hash) and collision mode (see Track.use_image_collision)."""
+        self.dt = dt
+        self.track_hash = track_hash
+        self.image_collision = image_collision
+        self.runs: List[List[int]] = []  # [input bits, tick count] pairs
+        self.tick_count = 0
+        self.final_checksum: Optional[bytes] = None
+    
+    @classmethod
+    def encode(cls, controls: DriverInput) -> int:
+        """Pack digital controls into input bits."""
+        bits = 0
+        if controls.throttle > 0:
+            bits |= cls.THROTTLE_BIT
+        if controls.brake > 0:
+            bits |= cls.BRAKE_BIT
+        if controls.steer < 0:
+            bits |= cls.LEFT_BIT
+        elif controls.steer > 0:
+            bits |= cls.RIGHT_BIT
+        if controls.reset:
+            bits |= cls.RESET_BIT
+        return bits
+    
+    @classmethod
+    def decode(cls, bits: int) -> DriverInput:
+        """Unpack input bits into driver controls."""
+        steer = -1.0 if bits & cls.LEFT_BIT else (1.0 if bits & cls.RIGHT_BIT else 0.0)
+        return DriverInput(
+            throttle=1.0 if bits & cls.THROTTLE_BIT else 0.0,
+            brake=1.0 if bits & cls.BRAKE_BIT else 0.0,
+            steer=steer,
+            reset=bool(bits & cls.RESET_BIT)
+        )
+    
+    def record(self, controls: DriverInput):
+        """Append one tick of controls."""
+        bits = self.encode(controls)
+        if self.runs and self.runs[-1][0] == bits:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([bits, 1])
+        self.tick_count += 1
+    
+    def __iter__(self):
+        """Iterate over the recorded controls, one DriverInput per tick."""
+        for bits, count in self.runs:
+            controls = self.decode(bits)
+            for _ in range(count):
+                yield controls
+    
+    def to_bytes(self) -> bytes:
+        """Serialize to the binary replay format (header, then bits + varint run length per run)."""
+        data = bytearray(self.HEADER.pack(self.MAGIC, self.VERSION, self.dt, self.tick_count,
+                                          self.final_checksum or bytes(8), self.track_hash, self.image_collision))
+        for bits, count in self.runs:
+            data.append(bits)
+            while count >= 0x80:
+                data.append((count & 0x7F) | 0x80)
+                count >>= 7
+            data.append(count)
+        return bytes(data)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'InputLog':
+        """Parse the binary replay format."""
+        if len(data) < cls.HEADER.size:
+            raise ValueError("Replay data is truncated")
+        magic, version, dt, tick_count, checksum, track_hash, image_collision = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Not a Hot LapY replay (or unsupported version)")
+        
+        log = cls(dt, track_hash, image_collision)
+        log.final_checksum = checksum if any(checksum) else None
+        position = cls.HEADER.size
+        while position < len(data):
+            bits = data[position]
+            position += 1
+            count, shift = 0, 0
+            while True:
+                if position >= len(data):
+                    raise ValueError("Replay data is truncated")
+                byte = data[position]
+                position += 1
+                count |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            log.runs.append([bits, count])
+            log.tick_count += count
+        
+        if log.tick_count != tick_count:
+            raise ValueError("Replay tick count does not match its header")
+        return log
+    
+    def save(self, path: str):
+        """Write the log to a replay file."""
+        with open(path, 'wb') as replay_file:
+            replay_file.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path: str) -> 'InputLog':
+        """Read a log from a replay file."""
+        with open(path, 'rb') as replay_file:
+            return cls.from_bytes(replay_file.read())
+
+
+class GlyphAtlas:
+    """Pre-rendered glyphs and labels for drawing frequently changing strings by blitting."""
+    
+    def __init__(self, font: pygame.font.Font, color: tuple = WHITE,
+                 characters: str = "0123456789:.-+s", labels: Tuple[str, ...] = ()):
+        """Rasterize characters and whole label strings once."""
+        self.font = font
+        self.color = color
+        self.height = font.get_height()
+        self.glyphs: Dict[str, Tuple[pygame.Surface, int]] = {}
+        self.labels: Dict[str, pygame.Surface] = {}
+        
+        for character in characters:
+            self.add_glyph(character)
+        for label in labels:
+            self.labels[label] = font.render(label, True, color)
+    
+    def add_glyph(self, character: str) -> Tuple[pygame.Surface, int]:
+        """Rasterize a single character and store it with its horizontal advance."""
+        surface = self.font.render(character, True, self.color)
+        metrics = self.font.metrics(character)
+        advance = metrics[0][4] if metrics and metrics[0] else surface.get_width()
+        self.glyphs[character] = (surface, advance)
+        return surface, advance
+    
+    def split_label(self, text: str) -> Tuple[Optional[pygame.Surface], str]:
+        """Split a leading pre-rendered label off text."""
+        for label, surface in self.labels.items():
+            if text.startswith(label):
+                return surface, text[len(label):]
+        return None, text
+    
+    def get_width(self, text: str) -> int:
+        """Get the width of text as drawn by this atlas."""
+        label, rest = self.split_label(text)
+        width = label.get_width() if label is not None else 0
+        for character in rest:
+            glyph = self.glyphs.get(character) or self.add_glyph(character)
+            width += glyph[1]
+        return width
+    
+    def draw(self, surface: pygame.Surface, text: str, position: Tuple[int, int]) -> pygame.Rect:
+        """Blit text at position from cached glyphs. Returns the area drawn."""
+        x, y = position
+        label, rest = self.split_label(text)
+        if label is not None:
+            surface.blit(label, (x, y))
+            x += label.get_width()
+        
+        glyphs = self.glyphs
+        for character in rest:
+            glyph = glyphs.get(character) or self.add_glyph(character)
+            surface.blit(glyph[0], (x, y))
+            x += glyph[1]
+        return pygame.Rect(position[0], y, x - position[0], self.height)
+
+
+class FrameProfiler:
+    """Times the phases of each frame with perf_counter_ns, keeping the last PROFILE_HISTORY
+    frames per phase in ring buffers for percentiles.
+    
+    Top-level phases are timed back to back with mark(); sections nested inside them
+    (sound resampling, car drawing, HUD drawing) with start()/stop() pairs, summed over
+    the frame. While disabled every call returns straight away.
+    """
+    
+    PHASES = ('events', 'logic', 'audio', 'render', 'idle')
+    SECTIONS = ('pitch', 'synth', 'cars', 'hud')
+    
+    def __init__(self, enabled: bool = False, history: int = PROFILE_HISTORY):
+        """Create empty ring buffers (nanoseconds per frame) for the frame, each phase and each section."""
+        self.enabled = enabled
+        self.requested = enabled   # Takes effect at the end of the frame, so frames are timed whole
+        self.history = history
+        self.names = ('frame',) + self.PHASES + self.SECTIONS
+        self.samples = {name: array('q', [0]) * history for name in self.names}
+        self.totals = dict.fromkeys(self.names, 0)  # The frame in progress
+        self.frames = 0            # Frames recorded; the next goes in slot frames % history
+        self.frame_start = 0
+        self.last_mark = 0
+    
+    def toggle(self):
+        """Switch profiling on or off from the next frame."""
+        self.requested = not self.requested
+    
+    def begin_frame(self):
+        """Start timing a frame."""
+        if self.enabled:
+            self.frame_start = self.last_mark = time.perf_counter_ns()
+    
+    def mark(self, phase: str):
+        """End a phase: charge it the time since the previous mark (or the frame start)."""
+        if self.enabled:
+            now = time.perf_counter_ns()
+            self.totals[phase] += now - self.last_mark
+            self.last_mark = now
+    
+    def start(self) -> int:
+        """Get the start timestamp of a nested section (0 while disabled)."""
+        return time.perf_counter_ns() if self.enabled else 0
+    
+    def stop(self, section: str, start: int):
+        """Charge a nested section the time since its start()."""
+        if self.enabled:
+            self.totals[section] += time.perf_counter_ns() - start
+    
+    def wrap(self, section: str, function: Callable) -> Callable:
+        """Wrap a function so its calls are charged to a nested section."""
+        def timed(*args):
+            if not self.enabled:
+                return function(*args)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args)
+            finally:
+                self.totals[section] += time.perf_counter_ns() - start
+        return timed
+    
+    def end_frame(self):
+        """Record the frame's timings, then apply a pending toggle."""
+        if self.enabled:
+            totals = self.totals
+            totals['frame'] = time.perf_counter_ns() - self.frame_start
+            slot = self.frames % self.history
+            for name, total in totals.items():
+                self.samples[name][slot] = total
+                totals[name] = 0
+            self.frames += 1
+        self.enabled = self.requested
+    
+    def get_percentiles(self, name: str, fractions: Tuple[float, ...] = (0.5, 0.99)) -> Tuple[float, ...]:
+        """Get percentiles of a phase's time per frame over the recorded frames, in milliseconds."""
+        window = sorted(self.samples[name][:min(self.frames, self.history)])
+        if not window:
+            return tuple(0.0 for _ in fractions)
+        return tuple(window[min(len(window) - 1, int(fraction * len(window)))] / 1e6 for fraction in fractions)
+    
+    def get_report(self) -> List[Tuple[str, float, float]]:
+        """Get (name, p50 ms, p99 ms) for the frame, each phase and each section."""
+        return [(name, *self.get_percentiles(name)) for name in self.names]
 
 
 class GameUI:
@@ -621,6 +2178,32 @@ class GameUI:
         # Colors with transparency
         self.box_bg_color = (0, 0, 0, 180)  # Semi-transparent black
         self.border_color = WHITE
+        
+        # Render caches: panel backgrounds by size/style and static text
+        self.panel_cache: Dict[tuple, pygame.Surface] = {}
+        self.text_cache: Dict[tuple, pygame.Surface] = {}
+        
+        # Glyphs for readouts that change every frame (timer digits, lap count)
+        self.glyphs = GlyphAtlas(self.font, labels=("Time: ", "Best: ", "Last: ", "Delta: ", "Lap: "))
+        
+        # Profiler overlay, re-rendered every PROFILE_REFRESH frames
+        self.profile_overlay: Optional[pygame.Surface] = None
+        self.profile_refresh = -1
+    
+    def clear_caches(self):
+        """Drop all cached panels and text (e.g. after changing fonts or colors)."""
+        self.panel_cache.clear()
+        self.text_cache.clear()
+    
+    def render_static_text(self, font: pygame.font.Font, text: str) -> pygame.Surface:
+        """Render text that rarely or never changes, caching the surface."""
+        key = (id(font), text)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            surface = font.render(text, True, WHITE)
+            self.text_cache[key] = surface
+        return surface
+    
     
     def format_time(self, seconds: float) -> str:
         """Format time in M:SS.ss format without leading zeros for minutes, or as seconds if at maximum."""
@@ -639,38 +2222,46 @@ class GameUI:
         else:
             return f"{remaining_seconds:.2f}s"
     
+    def get_panel(self, width: int, height: int, bg_color: tuple, border_color: tuple,
+                  border_width: int, border_radius: int) -> pygame.Surface:
+        """Get a rounded panel background, rendering it once per size and style."""
+        key = (width, height, bg_color, border_color, border_width, border_radius)
+        panel = self.panel_cache.get(key)
+        if panel is None:
+            # Create a surface for the rounded rectangle with transparency
+            panel = pygame.Surface((width, height), pygame.SRCALPHA)
+            
+            # Draw the background rectangle
+            pygame.draw.rect(panel, bg_color, (0, 0, width, height), border_radius=border_radius)
+            
+            # Draw the border
+            pygame.draw.rect(panel, border_color, (0, 0, width, height),
+                            width=border_width, border_radius=border_radius)
+            
+            if pygame.display.get_surface() is not None:
+                panel = panel.convert_alpha()
+            self.panel_cache[key] = panel
+        return panel
+    
     def draw_rounded_rect_with_border(self, surface: pygame.Surface, rect: pygame.Rect, 
-                                    bg_color: tuple, border_color: tuple, border_width: int, border_radius: int):
-        """Draw a rounded rectangle with border and semi-transparent background."""
-        # Create a temporary surface for the rounded rectangle with transparency
-        temp_surface = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        
-        # Draw the background rectangle
-        pygame.draw.rect(temp_surface, bg_color, (0, 0, rect.width, rect.height), border_radius=border_radius)
-        
-        # Draw the border
-        pygame.draw.rect(temp_surface, border_color, (0, 0, rect.width, rect.height), 
-                        width=border_width, border_radius=border_radius)
-        
-        # Blit to main surface
-        surface.blit(temp_surface, rect.topleft)
+                                    bg_color: tuple, border_color: tuple, border_width: int, border_radius: int) -> pygame.Rect:
+        """Draw a rounded rectangle with border and semi-transparent background. Returns the area drawn."""
+        panel = self.get_panel(rect.width, rect.height, bg_color, border_color, border_width, border_radius)
+        return surface.blit(panel, rect.topleft)
     
-    def draw_timer_info(self, screen: pygame.Surface, timer: LapTimer):
-        """Draw timing information with styled rounded rectangle background."""
+    def draw_timer_info(self, screen: pygame.Surface, timer: LapTimer) -> Optional[pygame.Rect]:
+        """Draw timing information with styled rounded rectangle background. Returns the area drawn."""
         if timer.start_time is not None:
-            current_time = timer.get_current_time()
+            current_time = timer.get_display_time()
             current_display = self.format_time(current_time)
             best_display = self.format_time(timer.best_time) if timer.best_time != float('inf') else "--:--"
             last_display = self.format_time(timer.last_lap_time) if timer.last_lap_time is not None else "--:--"
-            
-            # Render text
-            time_text = self.font.render(f"Time: {current_display}", True, WHITE)
-            best_text = self.font.render(f"Best: {best_display}", True, WHITE)
-            last_text = self.font.render(f"Last: {last_display}", True, WHITE)
+            delta_display = f"{timer.delta_to_best:+.2f}" if timer.delta_to_best is not None else "--:--"
             
             # Use fixed width to prevent wobbling (wide enough for longest possible time format)
             fixed_width = 100  # Reduced from 200 to fit smaller font size
-            total_height = time_text.get_height() * 3 + self.box_margin * 2
+            line_height = self.glyphs.height
+            total_height = line_height * 4 + self.box_margin * 3
             
             # Create rectangle for background with fixed width
             rect_width = fixed_width + self.box_padding * 2
@@ -678,56 +2269,203 @@ class GameUI:
             timer_rect = pygame.Rect(UI_MARGIN, UI_MARGIN, rect_width, rect_height)
             
             # Draw styled background
-            self.draw_rounded_rect_with_border(screen, timer_rect, self.box_bg_color, 
-                                             self.border_color, self.border_width, self.border_radius)
+            area = self.draw_rounded_rect_with_border(screen, timer_rect, self.box_bg_color, 
+                                                    self.border_color, self.border_width, self.border_radius)
             
-            # Draw text inside the rectangle
+            # Draw text inside the rectangle from cached glyphs
             text_x = UI_MARGIN + self.box_padding
             text_y = UI_MARGIN + self.box_padding
             
-            screen.blit(time_text, (text_x, text_y))
-            screen.blit(best_text, (text_x, text_y + time_text.get_height() + self.box_margin))
-            screen.blit(last_text, (text_x, text_y + (time_text.get_height() + self.box_margin) * 2))
+            self.glyphs.draw(screen, f"Time: {current_display}", (text_x, text_y))
+            self.glyphs.draw(screen, f"Best: {best_display}", (text_x, text_y + line_height + self.box_margin))
+            self.glyphs.draw(screen, f"Last: {last_display}", (text_x, text_y + (line_height + self.box_margin) * 2))
+            self.glyphs.draw(screen, f"Delta: {delta_display}", (text_x, text_y + (line_height + self.box_margin) * 3))
+            return area
+        return None
     
-    def draw_lap_counter(self, screen: pygame.Surface, timer: LapTimer):
-        """Draw lap counter with styled rounded rectangle background."""
-        lap_text = self.font.render(f"Lap: {timer.lap_count}", True, WHITE)
+    def draw_lap_counter(self, screen: pygame.Surface, timer: LapTimer) -> pygame.Rect:
+        """Draw lap counter with styled rounded rectangle background. Returns the area drawn."""
+        lap_display = f"Lap: {timer.lap_count}"
         
         # Calculate rectangle size
-        rect_width = lap_text.get_width() + self.box_padding * 2
-        rect_height = lap_text.get_height() + self.box_padding * 2
+        rect_width = self.glyphs.get_width(lap_display) + self.box_padding * 2
+        rect_height = self.glyphs.height + self.box_padding * 2
         
         # Position on the right side
         rect_x = SCREEN_WIDTH - rect_width - UI_MARGIN
         lap_rect = pygame.Rect(rect_x, UI_MARGIN, rect_width, rect_height)
         
         # Draw styled background
-        self.draw_rounded_rect_with_border(screen, lap_rect, self.box_bg_color, 
-                                         self.border_color, self.border_width, self.border_radius)
+        area = self.draw_rounded_rect_with_border(screen, lap_rect, self.box_bg_color, 
+                                                self.border_color, self.border_width, self.border_radius)
         
         # Draw text inside the rectangle
         text_x = rect_x + self.box_padding
         text_y = UI_MARGIN + self.box_padding
-        screen.blit(lap_text, (text_x, text_y))
+        self.glyphs.draw(screen, lap_display, (text_x, text_y))
+        return area
     
-    def draw_car_info(self, screen: pygame.Surface, car: Car):
-        """Draw car information on the right side."""
+    def draw_car_info(self, screen: pygame.Surface, car: Car) -> Optional[pygame.Rect]:
+        """Draw car information on the right side. Returns the area drawn."""
         # Throttle/Brake indicators removed for cleaner UI
-        pass
+        return None
+    
+    def render_profile_overlay(self, profiler: FrameProfiler) -> pygame.Surface:
+        """Render the p50/p99 table of the profiler's phases on a panel."""
+        rows = [("ms", "p50", "p99")] + [(name, f"{p50:.2f}", f"{p99:.2f}")
+                                         for name, p50, p99 in profiler.get_report()]
+        columns = (0, 60, 110)   # Left edge of each column
+        line_height = self.small_font.get_linesize()
+        width = columns[-1] + 50 + self.box_padding * 2
+        height = line_height * len(rows) + self.box_padding * 2
+        overlay = self.get_panel(width, height, self.box_bg_color, self.border_color,
+                                 self.border_width, self.border_radius).copy()
+        for row, cells in enumerate(rows):
+            for column, text in zip(columns, cells):
+                overlay.blit(self.small_font.render(text, True, WHITE),
+                             (self.box_padding + column, self.box_padding + row * line_height))
+        return overlay
+    
+    def draw_profile_overlay(self, screen: pygame.Surface, profiler: FrameProfiler) -> Optional[pygame.Rect]:
+        """Draw frame time percentiles in the middle of the screen (the infield of the built-in
+        track) while profiling. Returns the area drawn."""
+        if not profiler.enabled or not profiler.frames:
+            return None
+        refresh = profiler.frames // PROFILE_REFRESH
+        if self.profile_overlay is None or refresh != self.profile_refresh:
+            self.profile_overlay = self.render_profile_overlay(profiler)
+            self.profile_refresh = refresh
+        return screen.blit(self.profile_overlay, self.profile_overlay.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
     
-    def draw_controls_help(self, screen: pygame.Surface):
-        """Draw control instructions at the bottom of the screen."""
-        controls_text = self.small_font.render("Press R to Reset", True, WHITE)
+    def draw_controls_help(self, screen: pygame.Surface) -> pygame.Rect:
+        """Draw control instructions at the bottom of the screen. Returns the area drawn."""
+        controls_text = self.render_static_text(self.small_font, "Press R to Reset")
         text_rect = controls_text.get_rect()
-        screen.blit(controls_text, (SCREEN_WIDTH // 2 - text_rect.width // 2, SCREEN_HEIGHT - 30))
+        return screen.blit(controls_text, (SCREEN_WIDTH // 2 - text_rect.width // 2, SCREEN_HEIGHT - 30))
+
+
+class EnginePitchBank:
+    """LRU cache of engine sounds resampled to quantized pitch steps.
+    
+    Each pitch step is resampled once, so changing engine pitch only swaps to a
+    cached Sound instead of resampling the whole buffer on the game thread.
+    """
+    
+    def __init__(self, original_sound: pygame.mixer.Sound,
+                 resample: Callable[[pygame.mixer.Sound, float], pygame.mixer.Sound],
+                 pitch_step: float = 0.05, max_entries: int = 32, max_bytes: int = 16 * 1024 * 1024):
+        """Initialize an empty bank for original_sound using the given resampling function."""
+        self.original_sound = original_sound
+        self.resample = resample
+        self.pitch_step = pitch_step
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        
+        self.sounds: "OrderedDict[int, pygame.mixer.Sound]" = OrderedDict()
+        self.sizes: Dict[int, int] = {}
+        self.memory_bytes = 0  # Total PCM bytes held by cached sounds
+        self.misses = 0
+    
+    def get(self, pitch: float) -> pygame.mixer.Sound:
+        """Get the cached sound for the nearest pitch step, resampling it on first use."""
+        key = round(pitch / self.pitch_step)
+        sound = self.sounds.get(key)
+        if sound is not None:
+            self.sounds.move_to_end(key)
+            return sound
+        
+        self.misses += 1
+        sound = self.resample(self.original_sound, key * self.pitch_step)
+        size = memoryview(sound).nbytes
+        self.sounds[key] = sound
+        self.sizes[key] = size
+        self.memory_bytes += size
+        
+        # Evict least recently used steps beyond the entry and memory bounds
+        while len(self.sounds) > 1 and (len(self.sounds) > self.max_entries or self.memory_bytes > self.max_bytes):
+            old_key, _ = self.sounds.popitem(last=False)
+            self.memory_bytes -= self.sizes.pop(old_key)
+        
+        return sound
+    
+    def preload(self, min_pitch: float, max_pitch: float):
+        """Resample every pitch step in the given range up front (e.g. during startup)."""
+        first = round(min_pitch / self.pitch_step)
+        last = round(max_pitch / self.pitch_step)
+        for key in range(first, last + 1):
+            self.get(key * self.pitch_step)
+
+
+class EngineSynthesizer:
+    """Streams looping engine audio in small blocks through a phase-continuous resampler.
+    
+    Playback rate ramps linearly from the previous block's pitch to the new target
+    across each block, and the read position carries over between blocks, so
+    pitch changes are seamless and every block costs the same amount of work.
+    """
+    
+    def __init__(self, original_sound: pygame.mixer.Sound, block_frames: int = 1024):
+        """Prepare the source samples (requires numpy)."""
+        import numpy as np
+        self.np = np
+        
+        samples = pygame.sndarray.array(original_sound)
+        self.dtype = samples.dtype
+        self.source = samples.astype(np.float32)
+        self.length = len(self.source)
+        self.block_frames = block_frames
+        
+        # Per-block constants for the position ramp: i and i * (i - 1) / 2
+        self.steps = np.arange(block_frames, dtype=np.float64)
+        self.ramp = self.steps * (self.steps - 1) / 2.0
+        
+        self.phase = 0.0   # Read position in source frames
+        self.pitch = 1.0   # Playback rate at the end of the last block
+    
+    def reset(self):
+        """Restart from the beginning of the source at original pitch."""
+        self.phase = 0.0
+        self.pitch = 1.0
+    
+    def render_block(self, target_pitch: float) -> pygame.mixer.Sound:
+        """Render the next block, gliding playback rate from the current pitch to target_pitch."""
+        np = self.np
+        frames = self.block_frames
+        slope = (target_pitch - self.pitch) / frames
+        
+        # Read positions for a linearly ramped rate, wrapped around the looping source
+        positions = self.phase + self.pitch * self.steps + slope * self.ramp
+        positions %= self.length
+        
+        # Linear interpolation between neighbouring source frames
+        index = positions.astype(np.int64)
+        fraction = (positions - index).astype(np.float32)
+        following = index + 1
+        following[following == self.length] = 0
+        if self.source.ndim > 1:
+            fraction = fraction[:, None]
+        block = self.source[index] * (1.0 - fraction) + self.source[following] * fraction
+        
+        self.phase = (self.phase + self.pitch * frames + slope * frames * (frames - 1) / 2.0) % self.length
+        self.pitch = target_pitch
+        return pygame.sndarray.make_sound(np.ascontiguousarray(block.astype(self.dtype)))
 
 
 class AudioManager:
     """Manages game audio with realistic engine sound based on RPM with pitch shifting."""
     
-    def __init__(self, assets: GameAssets):
-        """Initialize audio manager with game assets."""
+    def __init__(self, assets: GameAssets, use_pitch_bank: bool = True, streaming: bool = True,
+                 profiler: Optional[FrameProfiler] = None):
+        """Initialize audio manager with game assets.
+        
+        With streaming enabled (and numpy available) the engine is synthesized in
+        blocks queued on a reserved channel; otherwise the looping engine sound is
+        swapped between pitch bank entries (or resampled per change without the bank).
+        Resampling and block synthesis are timed by the profiler, if given.
+        """
         self.assets = assets
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.resample_engine_sound = self.profiler.wrap('pitch', self.create_pitched_sound)
         self.engine_playing = False
         self.current_pitch = 1.0
         self.engine_channel = None
@@ -736,6 +2474,25 @@ class AudioManager:
         self.base_rpm = IDLE_RPM      # RPM that corresponds to original pitch
         self.min_pitch = 0.6          # Minimum pitch multiplier (low RPM)
         self.max_pitch = 2.0          # Maximum pitch multiplier (high RPM)
+        self.idle_pitch = 0.8         # Minimum pitch for idle rumble
+        self.pitch_step = 0.05        # Pitch change needed before switching sounds
+        
+        # Block-streamed engine audio driven by engine RPM
+        self.synthesizer: Optional[EngineSynthesizer] = None
+        if streaming:
+            try:
+                self.synthesizer = EngineSynthesizer(assets.original_engine_sound)
+                pygame.mixer.set_reserved(1)
+            except (ImportError, Exception):
+                # Fallback: looping sounds with stepped pitch
+                self.synthesizer = None
+        
+        # Resampled engine sounds, one per pitch step
+        self.pitch_bank: Optional[EnginePitchBank] = None
+        if use_pitch_bank and self.synthesizer is None:
+            self.pitch_bank = EnginePitchBank(assets.original_engine_sound, self.resample_engine_sound,
+                                              pitch_step=self.pitch_step)
+            self.pitch_bank.preload(self.idle_pitch, self.max_pitch)
     
     def calculate_pitch_from_speed(self, velocity: float) -> float:
         """Calculate pitch multiplier based on car speed for smoother audio."""
@@ -747,6 +2504,12 @@ class AudioManager:
         pitch = self.min_pitch + (self.max_pitch - self.min_pitch) * (speed_normalized ** 0.5)
         return max(0.7, min(2.5, pitch))  # Clamp to reasonable bounds
     
+    def calculate_pitch_from_rpm(self, rpm: float) -> float:
+        """Calculate pitch multiplier from engine RPM, from idle rumble up to redline."""
+        rpm_normalized = (rpm - IDLE_RPM) / (MAX_RPM - IDLE_RPM)
+        rpm_normalized = max(0.0, min(1.0, rpm_normalized))
+        return self.idle_pitch + (self.max_pitch - self.idle_pitch) * rpm_normalized
+    
     def create_pitched_sound(self, original_sound: pygame.mixer.Sound, pitch: float) -> pygame.mixer.Sound:
         """Create a new sound with modified pitch (simplified approach)."""
         # Note: This is a simplified pitch shifting approach
@@ -783,6 +2546,12 @@ class AudioManager:
         
         return original_sound
     
+    def get_pitched_engine_sound(self, pitch: float) -> pygame.mixer.Sound:
+        """Get the engine sound at the given pitch, from the pitch bank when enabled."""
+        if self.pitch_bank is not None:
+            return self.pitch_bank.get(pitch)
+        return self.resample_engine_sound(self.assets.original_engine_sound, pitch)
+    
     def reset(self):
         """Reset audio state."""
         if self.engine_playing and self.engine_channel:
@@ -790,20 +2559,42 @@ class AudioManager:
             self.engine_playing = False
         self.current_pitch = 1.0
         self.engine_channel = None
+        if self.synthesizer is not None:
+            self.synthesizer.reset()
+    
+    def stream_engine_sound(self, car: Car):
+        """Keep the reserved engine channel fed with synthesized blocks at the car's RPM pitch."""
+        if self.engine_channel is None:
+            self.engine_channel = pygame.mixer.Channel(0)
+        
+        target_pitch = self.calculate_pitch_from_rpm(car.engine_rpm)
+        self.current_pitch = target_pitch
+        
+        # One block playing and one queued; refill the queue slot as soon as it frees up
+        start = self.profiler.start()
+        if not self.engine_channel.get_busy():
+            self.engine_channel.play(self.synthesizer.render_block(target_pitch))
+        if self.engine_channel.get_queue() is None:
+            self.engine_channel.queue(self.synthesizer.render_block(target_pitch))
+        self.profiler.stop('synth', start)
+        self.engine_playing = True
     
     def update_engine_sound(self, car: Car):
         """Update engine sound based on car's speed with pitch shifting. Engine always rumbles at idle."""
         # Engine is always active - always rumbling
+        if self.synthesizer is not None:
+            self.stream_engine_sound(car)
+            self.update_engine_volume(car)
+            return
         
         # Calculate target pitch based on speed, with minimum idle pitch
         base_pitch = self.calculate_pitch_from_speed(car.velocity)
-        idle_pitch = 0.8  # Minimum pitch for idle rumble
-        target_pitch = max(idle_pitch, base_pitch)
+        target_pitch = max(self.idle_pitch, base_pitch)
         
         # Start engine sound if not already playing
         if not self.engine_playing or not (self.engine_channel and self.engine_channel.get_busy()):
             try:
-                pitched_sound = self.create_pitched_sound(self.assets.original_engine_sound, target_pitch)
+                pitched_sound = self.get_pitched_engine_sound(target_pitch)
                 self.engine_channel = pitched_sound.play(-1)  # Loop
             except:
                 # Fallback: use original sound
@@ -813,22 +2604,25 @@ class AudioManager:
             self.current_pitch = target_pitch
         
         # Only update pitch if it changed significantly (to avoid constant recreating)
-        elif abs(target_pitch - self.current_pitch) > 0.05:
+        elif abs(target_pitch - self.current_pitch) > self.pitch_step:
             self.current_pitch = target_pitch
             
             # Stop current sound
             if self.engine_channel and self.engine_channel.get_busy():
                 self.engine_channel.stop()
             
-            # Create new pitched sound
+            # Swap to the new pitched sound
             try:
-                pitched_sound = self.create_pitched_sound(self.assets.original_engine_sound, self.current_pitch)
+                pitched_sound = self.get_pitched_engine_sound(self.current_pitch)
                 self.engine_channel = pitched_sound.play(-1)  # Loop
             except:
                 # Fallback: use original sound
                 self.engine_channel = self.assets.engine_sound.play(-1)
         
-        # Adjust volume - always has minimum idle volume
+        self.update_engine_volume(car)
+    
+    def update_engine_volume(self, car: Car):
+        """Adjust engine volume from speed and throttle - always has minimum idle volume."""
         if self.engine_channel and self.engine_channel.get_busy():
             speed_factor = abs(car.velocity) / MAX_SPEED
             throttle_factor = max(0.2, car.throttle + 0.2)  # Base idle volume
@@ -849,35 +2643,64 @@ class AudioManager:
 class Game:
     """Main game class that orchestrates all components."""
     
-    def __init__(self):
-        """Initialize the game."""
+    def __init__(self, dirty_rects: bool = False, record_path: Optional[str] = None,
+                 image_collision: bool = False, track_path: str = DEFAULT_TRACK_PATH, opponents: int = 0,
+                 racing_line_path: Optional[str] = None, profile: bool = False):
+        """Initialize the game (dirty_rects pushes only changed regions to the display,
+        record_path saves the session's inputs as a replay on exit, image_collision keeps
+        the car on the road drawn in the track image instead of using the wall rects,
+        track_path is the track definition to race on, opponents is the number of AI cars,
+        racing_line_path is a line file for them to follow instead of the fitted line,
+        profile starts with frame profiling and its overlay on; PROFILE_KEY toggles them)."""
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Hot LapY")
         self.clock = pygame.time.Clock()
         
         # Initialize game components
-        self.assets = GameAssets()
-        self.car = Car(50, 280)  # Start position
-        self.track = Track()
-        self.timer = LapTimer()
+        track = Track.load(track_path)
+        self.assets = GameAssets(track.image_path)
+        self.car_sprites = RotatedSpriteCache(self.assets.car_image)
+        self.ghost_sprites = RotatedSpriteCache(self.assets.ghost_image)
+        self.opponent_sprites = RotatedSpriteCache(self.assets.opponent_image)
+        self.simulation = Simulation(track, dt=1.0 / PHYSICS_HZ)
+        self.car = self.simulation.car
+        self.track = self.simulation.track
+        self.timer = self.simulation.timer
+        if image_collision:
+            from track_field import TrackField  # Needs NumPy
+            self.track.use_image_collision(TrackField.load(self.track.image_path))
+        if racing_line_path:
+            self.track.racing_line = RacingLine.from_file(racing_line_path)
+        self.simulation.add_opponents(opponents)
         self.ui = GameUI()
-        self.audio = AudioManager(self.assets)
+        self.profiler = FrameProfiler(profile)
+        self.audio = AudioManager(self.assets, profiler=self.profiler)
+        
+        # Dirty-rect rendering: regions drawn last frame, restored from the static track layer
+        self.dirty_rects = dirty_rects
+        self.previous_dirty: List[pygame.Rect] = []
+        self.full_redraw = True
+        
+        # Best-lap ghost from previous sessions on this track (ignored once the layout is edited)
+        self.ghost_path = os.path.splitext(track_path)[0] + GHOST_SUFFIX
+        try:
+            ghost = GhostLap.load(self.ghost_path)
+            self.simulation.best_lap = ghost if ghost.track_hash == self.track.source_hash else None
+        except (OSError, ValueError):
+            self.simulation.best_lap = None
+        
+        # Session recording
+        self.record_path = record_path
+        self.input_log = InputLog(self.simulation.dt, self.track.source_hash, image_collision) if record_path else None
         
         # Game state
         self.running = True
-        self.checkpoints_crossed = [False, False, False]
     
     def reset_game(self):
         """Reset the entire game to initial state."""
-        # Reset car
-        self.car.reset_to_initial_state()
-        
-        # Reset timer
-        self.timer.reset()
-        
-        # Reset checkpoints
-        self.checkpoints_crossed = [False, False, False]
+        # Reset car, timer and checkpoints
+        self.simulation.reset()
         
         # Reset audio
         self.audio.reset()
@@ -887,84 +2710,181 @@ class Game:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWRESTORED):
+                self.full_redraw = True
+            elif event.type == pygame.KEYDOWN and event.key == PROFILE_KEY:
+                self.profiler.toggle()
+                self.full_redraw = True  # Erase the overlay when it goes away
     
     def update_game_logic(self):
-        """Update game logic for one frame."""
-        keys = pygame.key.get_pressed()
+        """Update game logic for one fixed physics step."""
+        controls = DriverInput.from_keys(pygame.key.get_pressed())
+        if self.input_log is not None:
+            self.input_log.record(controls)
         
         # Check for reset key
-        if keys[pygame.K_r]:
+        if controls.reset:
             self.reset_game()
             return  # Skip other updates this frame
         
-        # Update car movement with realistic physics
-        engine_active = self.car.update_position(keys)
-        
-        # Start timer on first movement
-        if engine_active and abs(self.car.velocity) > 0.1:
-            self.timer.start_timing()
+        # Advance car, collisions, checkpoints and lap timing
+        result = self.simulation.step(controls)
         
-        # Handle wall collisions with improved positioning
-        wall_collision = self.track.handle_wall_collisions(self.car)
-        boundary_collision = self.car.handle_screen_boundaries()
-        
-        if wall_collision or boundary_collision:
+        if result.collision:
             # Play collision sound for both wall and boundary hits
             self.audio.play_collision_sound()
         
-        # Update engine sound based on car state
+        if result.new_best_lap:
+            self.save_ghost()
+    
+    def update_audio(self):
+        """Update engine sound based on car state (once per rendered frame)."""
         self.audio.update_engine_sound(self.car)
-        
-        # Check checkpoint crossings
-        self.checkpoints_crossed = self.track.check_checkpoint_collision(
-            self.car, self.checkpoints_crossed
-        )
-        
-        # Handle start/finish line crossing
-        if self.track.check_start_line_collision(self.car) and self.timer.start_time is not None:
-            if not self.timer.lap_completed:
-                self.timer.lap_completed = True
-            else:
-                if self.timer.complete_lap(self.checkpoints_crossed):
-                    self.checkpoints_crossed = [False, False, False]
-                self.timer.lap_completed = False
     
-    def render(self):
-        """Render the game for one frame."""
-        self.screen.fill(BLACK)
-        
-        # Draw track background
-        self.screen.blit(self.assets.track_image, (0, 0))
+    def save_ghost(self):
+        """Persist the best lap ghost (failing to write it is not fatal)."""
+        try:
+            self.simulation.best_lap.save(self.ghost_path)
+        except OSError:
+            pass
+    
+    def draw_ghost(self, alpha: float = 1.0) -> Optional[pygame.Rect]:
+        """Draw the best lap ghost alongside the lap in progress. Returns the area drawn."""
+        ghost = self.simulation.best_lap
+        if ghost is None or self.timer.start_time is None:
+            return None
+        elapsed = self.simulation.get_lap_elapsed_time() - (1.0 - alpha) * self.simulation.dt
+        return ghost.draw(self.screen, self.ghost_sprites, max(0.0, elapsed))
+    
+    def draw_opponents(self, alpha: float = 1.0) -> List[pygame.Rect]:
+        """Draw the AI cars. Returns the areas drawn."""
+        return [opponent.car.draw(self.screen, self.opponent_sprites, alpha) for opponent in self.simulation.opponents]
+    
+    def draw_hud(self) -> List[Optional[pygame.Rect]]:
+        """Draw the HUD panels (and the profiler overlay). Returns the areas drawn."""
+        return [
+            self.ui.draw_timer_info(self.screen, self.timer),
+            self.ui.draw_lap_counter(self.screen, self.timer),
+            self.ui.draw_car_info(self.screen, self.car),
+            self.ui.draw_controls_help(self.screen),
+            self.ui.draw_profile_overlay(self.screen, self.profiler)
+        ]
+    
+    def draw_dynamic(self, alpha: float = 1.0) -> List[pygame.Rect]:
+        """Draw the AI cars, ghost, car and HUD over the current frame. Returns the areas drawn."""
+        start = self.profiler.start()
+        areas = self.draw_opponents(alpha) + [
+            self.draw_ghost(alpha),
+            self.car.draw(self.screen, self.car_sprites, alpha)
+        ]
+        self.profiler.stop('cars', start)
         
-        # Draw track elements
-        self.track.draw(self.screen)
+        start = self.profiler.start()
+        areas += self.draw_hud()
+        self.profiler.stop('hud', start)
+        return [area for area in areas if area]
+    
+    def render_dirty(self, alpha: float = 1.0):
+        """Render one frame by restoring and redrawing only regions that changed."""
+        background = self.track.get_static_layer(self.assets.track_image)
+        if self.full_redraw:
+            self.screen.blit(background, (0, 0))
+            self.previous_dirty = self.draw_dynamic(alpha)
+            pygame.display.flip()
+            self.full_redraw = False
+            return
+        
+        # Erase last frame's car and HUD with the static background
+        for area in self.previous_dirty:
+            self.screen.blit(background, area, area)
+        
+        dirty = self.draw_dynamic(alpha)
+        pygame.display.update(self.previous_dirty + dirty)
+        self.previous_dirty = dirty
+    
+    def render(self, alpha: float = 1.0):
+        """Render the game for one frame, alpha of the way between the last two physics steps."""
+        if self.dirty_rects:
+            self.render_dirty(alpha)
+            return
         
-        # Draw car
-        self.car.draw(self.screen, self.assets.car_image)
+        # Draw track background and elements (pre-composited)
+        self.screen.blit(self.track.get_static_layer(self.assets.track_image), (0, 0))
         
-        # Draw UI
-        self.ui.draw_timer_info(self.screen, self.timer)
-        self.ui.draw_lap_counter(self.screen, self.timer)
-        self.ui.draw_car_info(self.screen, self.car)
-        self.ui.draw_controls_help(self.screen)
+        # Draw AI cars, best lap ghost, car and UI
+        self.draw_dynamic(alpha)
         
         # Update display
         pygame.display.flip()
     
     def run(self):
-        """Main game loop."""
+        """Main game loop: fixed-rate physics steps, rendered with interpolation at the display rate."""
+        dt = self.simulation.dt
+        accumulator = 0.0
+        previous_time = time.perf_counter()
+        profiler = self.profiler
+        
         while self.running:
+            profiler.begin_frame()
+            current_time = time.perf_counter()
+            accumulator += min(current_time - previous_time, MAX_FRAME_TIME)
+            previous_time = current_time
+            
             self.handle_events()
-            self.update_game_logic()
-            self.render()
+            profiler.mark('events')
+            
+            # Run as many physics steps as real time has accumulated
+            while accumulator >= dt:
+                self.update_game_logic()
+                accumulator -= dt
+            profiler.mark('logic')
+            
+            self.update_audio()
+            profiler.mark('audio')
+            self.render(accumulator / dt)
+            profiler.mark('render')
             self.clock.tick(FPS)
+            profiler.mark('idle')
+            profiler.end_frame()
+        
+        if profiler.frames:
+            print(f"Frame times over the last {min(profiler.frames, profiler.history)} profiled frames (ms):")
+            for name, p50, p99 in profiler.get_report():
+                print(f"  {name:<8} p50 {p50:7.3f}  p99 {p99:7.3f}")
+        
+        if self.input_log is not None:
+            self.input_log.final_checksum = self.simulation.get_state_checksum()
+            self.input_log.save(self.record_path)
         
         pygame.quit()
 
 
 def main():
     """Main function to start the game."""
-    game = Game()
+    parser = argparse.ArgumentParser(description="Hot LapY - 2D time trial racing")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="update only changed screen regions (for low-power displays)")
+    parser.add_argument('--record', metavar='PATH',
+                        help="save this session's inputs as a replay file (play back with replay.py)")
+    parser.add_argument('--image-collision', action='store_true',
+                        help="collide with the road edges of the track image instead of the walls (needs NumPy)")
+    parser.add_argument('--track', metavar='PATH', default=DEFAULT_TRACK_PATH,
+                        help=f"track definition file (default: {DEFAULT_TRACK_PATH})")
+    parser.add_argument('--opponents', type=int, default=0, metavar='N',
+                        help="race against N AI cars following the track's racing line")
+    parser.add_argument('--racing-line', metavar='PATH',
+                        help="racing line file for the AI cars (from optimize_line.py)")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each part of the frame and show p50/p99 frame times (F3 toggles)")
+    args = parser.parse_args()
+    
+    try:
+        game = Game(dirty_rects=args.dirty_rects, record_path=args.record,
+                    image_collision=args.image_collision, track_path=args.track, opponents=args.opponents,
+                    racing_line_path=args.racing_line, profile=args.profile)
+    except (OSError, ValueError) as error:
+        print(f"Could not load track: {error}", file=sys.stderr)
+        sys.exit(1)
     game.run()
 
 
@@ -0,0 +1,304 @@
+"""
+Hot LapY - Reinforcement learning environments
+
+Gym-style environments (reset/step returning observation, reward, terminated,
+truncated, info) for training driving agents on the game's own physics:
+
+- HotLapEnv drives one car through the headless Simulation, so it uses the
+  exact Car, Track and LapTimer logic of the game.
+- HotLapVecEnv steps N independent cars in lockstep on a CarBatch, with wall
+  contacts, checkpoints, lap timing, rewards and observations all computed as
+  array operations, so there is no Python work per environment.
+
+Actions are (throttle, brake, steer) with the DriverInput ranges. Observations
+are the car's speed, yaw rate, RPM and gear, its heading relative to the
+waypoint path, and the distances to the walls along a fan of rays. The reward
+is progress along the track's waypoint loop, minus a penalty for hitting a
+wall or the screen edge, plus a bonus for every valid lap.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from hot_lap import (
+    CAR_HEIGHT, CAR_WIDTH, COLLISION_EPSILON, CONTACT_SPEED_KEEP, PHYSICS_HZ, REFERENCE_DT, Car, CarParams, DriverInput,
+    Simulation, Track
+)
+from car_batch import CarBatch
+from sensors import RAY_ANGLES, RAY_LENGTH, RaySensors
+
+
+MAX_EPISODE_SECONDS = 60.0   # Episodes are truncated after this much simulated time
+
+# Reward shaping
+PROGRESS_REWARD = 0.01       # Per pixel driven along the waypoint loop (negative when going backwards)
+COLLISION_PENALTY = 0.1      # Per step in contact with a wall or the screen edge
+LAP_REWARD = 10.0            # Per valid lap
+
+CAR_STATE_SIZE = 6           # Speed, yaw rate, RPM, gear, sin and cos of the heading to the path
+
+
+def push_out_of_walls(center_x: np.ndarray, center_y: np.ndarray, sin_angle: np.ndarray, cos_angle: np.ndarray,
+                      walls: np.ndarray) -> np.ndarray:
+    """Vectorized hot_lap.get_wall_overlap: push N car boxes out of S walls in turn, along the
+    axis of smallest overlap, updating the centers in place. Returns the (N,) contact mask."""
+    abs_sin = np.abs(sin_angle)
+    abs_cos = np.abs(cos_angle)
+    axes = ((1.0, 0.0, abs_cos * CAR_WIDTH / 2 + abs_sin * CAR_HEIGHT / 2),
+            (0.0, 1.0, abs_sin * CAR_WIDTH / 2 + abs_cos * CAR_HEIGHT / 2),
+            (cos_angle, sin_angle, CAR_WIDTH / 2),      # Car's right
+            (sin_angle, -cos_angle, CAR_HEIGHT / 2))    # Car's forward
+    touched = np.zeros(center_x.shape, dtype=bool)
+
+    for wall_x, wall_y, wall_width, wall_height in np.asarray(walls, dtype=float).reshape(-1, 4):
+        wall_center_x = wall_x + wall_width / 2
+        wall_center_y = wall_y + wall_height / 2
+        overlapping = np.ones(center_x.shape, dtype=bool)
+        smallest = np.full(center_x.shape, np.inf)
+        push_x = np.zeros(center_x.shape)
+        push_y = np.zeros(center_x.shape)
+        for axis_x, axis_y, car_radius in axes:
+            radius = car_radius + np.abs(axis_x) * wall_width / 2 + np.abs(axis_y) * wall_height / 2
+            offset = (center_x - wall_center_x) * axis_x + (center_y - wall_center_y) * axis_y
+            overlap = radius - np.abs(offset)
+            overlapping &= overlap > COLLISION_EPSILON
+            smaller = overlap < smallest
+            smallest = np.where(smaller, overlap, smallest)
+            signed = np.where(offset >= 0, overlap, -overlap)
+            push_x = np.where(smaller, axis_x * signed, push_x)
+            push_y = np.where(smaller, axis_y * signed, push_y)
+        center_x += np.where(overlapping, push_x, 0.0)
+        center_y += np.where(overlapping, push_y, 0.0)
+        touched |= overlapping
+    return touched
+
+
+class WaypointPath:
+    """Closed polyline through a track's waypoints, used to measure lap progress."""
+
+    def __init__(self, waypoints: list):
+        """Precompute the segments of the loop. Raises ValueError with fewer than two waypoints."""
+        if len(waypoints) < 2:
+            raise ValueError("The track needs at least two waypoints to measure progress")
+        points = np.asarray(waypoints, dtype=float)
+        self.start_x, self.start_y = points[:, 0], points[:, 1]
+        ends = np.roll(points, -1, axis=0)
+        self.segment_x = ends[:, 0] - self.start_x
+        self.segment_y = ends[:, 1] - self.start_y
+        self.segment_length = np.hypot(self.segment_x, self.segment_y)
+        self.segment_start = np.concatenate(([0.0], np.cumsum(self.segment_length)[:-1]))
+        self.length = float(self.segment_length.sum())
+        self.segment_heading = np.arctan2(self.segment_x, -self.segment_y)  # Car.angle convention
+
+    def locate(self, x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the distance along the loop of the nearest point to each (x, y), and the
+        heading (radians) of the path there."""
+        offset_x = x[:, None] - self.start_x
+        offset_y = y[:, None] - self.start_y
+        along = np.clip((offset_x * self.segment_x + offset_y * self.segment_y) / self.segment_length ** 2, 0.0, 1.0)
+        squared = (offset_x - along * self.segment_x) ** 2 + (offset_y - along * self.segment_y) ** 2
+        nearest = squared.argmin(axis=1)
+        rows = np.arange(len(x))
+        position = self.segment_start[nearest] + along[rows, nearest] * self.segment_length[nearest]
+        return position, self.segment_heading[nearest]
+
+    def get_progress(self, previous: np.ndarray, position: np.ndarray) -> np.ndarray:
+        """Get the distance driven along the loop between two positions, across the start of the loop."""
+        return (position - previous + self.length / 2) % self.length - self.length / 2
+
+
+class Observer:
+    """Builds observations and progress for cars on a track, shared by both environments."""
+
+    def __init__(self, track: Track, params: CarParams, ray_angles: tuple = RAY_ANGLES,
+                 ray_length: float = RAY_LENGTH):
+        """Precompute the track's waypoint path and ray sensors."""
+        self.params = params
+        self.path = WaypointPath(track.waypoints)
+        self.sensors = RaySensors(track, ray_angles, ray_length)
+        self.ray_length = ray_length
+        self.size = CAR_STATE_SIZE + len(ray_angles)
+
+    def observe(self, center_x: np.ndarray, center_y: np.ndarray, angle: np.ndarray, velocity: np.ndarray,
+                angular_velocity: np.ndarray, rpm: np.ndarray, gear: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the (N, size) float32 observations and the (N,) positions along the waypoint loop."""
+        params = self.params
+        heading = np.radians(angle)
+        position, path_heading = self.path.locate(center_x, center_y)
+        observations = np.empty((len(center_x), self.size), dtype=np.float32)
+        observations[:, 0] = velocity / params.max_speed
+        observations[:, 1] = angular_velocity / params.turn_speed_base
+        observations[:, 2] = rpm / params.max_rpm
+        observations[:, 3] = gear / 5.0
+        observations[:, 4] = np.sin(path_heading - heading)
+        observations[:, 5] = np.cos(path_heading - heading)
+        observations[:, CAR_STATE_SIZE:] = self.sensors.cast(center_x, center_y, angle) / self.ray_length
+        return observations, position
+
+
+class HotLapEnv:
+    """Single-car environment running the game's Simulation."""
+
+    action_size = 3
+
+    def __init__(self, track: Optional[Track] = None, params: Optional[CarParams] = None, max_laps: int = 1,
+                 max_seconds: float = MAX_EPISODE_SECONDS, ray_angles: tuple = RAY_ANGLES,
+                 ray_length: float = RAY_LENGTH):
+        """Create the environment (the built-in track and default car unless given).
+        An episode ends after max_laps valid laps or max_seconds of simulated time."""
+        track = track if track is not None else Track()
+        car = Car(*track.spawn, params)
+        self.simulation = Simulation(track, car)
+        self.observer = Observer(track, car.params, ray_angles, ray_length)
+        self.observation_size = self.observer.size
+        self.max_laps = max_laps
+        self.max_steps = int(max_seconds * PHYSICS_HZ)
+        self.position = np.zeros(1)
+
+    def observe(self) -> np.ndarray:
+        """Get the current observation and update the car's position along the track."""
+        car = self.simulation.car
+        observations, self.position = self.observer.observe(
+            np.array([car.x + CAR_WIDTH / 2]), np.array([car.y + CAR_HEIGHT / 2]), np.array([car.angle]),
+            np.array([car.velocity]), np.array([car.angular_velocity]), np.array([car.engine_rpm]),
+            np.array([car.current_gear]))
+        return observations[0]
+
+    def reset(self) -> Tuple[np.ndarray, dict]:
+        """Start a new episode. Returns (observation, info)."""
+        self.simulation.reset()
+        return self.observe(), {}
+
+    def step(self, action) -> Tuple[np.ndarray, float, bool, bool, dict]:
+        """Apply (throttle, brake, steer) for one physics step.
+        Returns (observation, reward, terminated, truncated, info)."""
+        throttle, brake, steer = action
+        simulation = self.simulation
+        previous = self.position
+        result = simulation.step(DriverInput(float(throttle), float(brake), float(steer)))
+        observation = self.observe()
+
+        progress = float(self.observer.path.get_progress(previous, self.position)[0])
+        reward = progress * PROGRESS_REWARD - COLLISION_PENALTY * result.collision + LAP_REWARD * result.lap_completed
+        laps_completed = simulation.timer.lap_count - 1
+        info = {'lap_time': simulation.timer.last_lap_time if result.lap_completed else None,
+                'laps_completed': laps_completed, 'collision': result.collision}
+        terminated = laps_completed >= self.max_laps
+        truncated = not terminated and simulation.tick >= self.max_steps
+        return observation, reward, terminated, truncated, info
+
+
+class HotLapVecEnv:
+    """count independent single-car environments stepped together on a CarBatch.
+
+    Matches HotLapEnv except that walls are resolved by pushing the car out along the
+    axis of least overlap at the end of each step (the Track resolver's fallback) instead
+    of sweeping the move. Environments whose episode ends are reset within the same step;
+    the observation they ended with is in info['final_observation'].
+    """
+
+    action_size = 3
+
+    def __init__(self, count: int, track: Optional[Track] = None, params: Optional[CarParams] = None,
+                 max_laps: int = 1, max_seconds: float = MAX_EPISODE_SECONDS, ray_angles: tuple = RAY_ANGLES,
+                 ray_length: float = RAY_LENGTH):
+        """Create count environments (the built-in track and default car unless given).
+        Raises ValueError for image collision tracks, which only HotLapEnv supports."""
+        self.track = track if track is not None else Track()
+        if self.track.field is not None:
+            raise ValueError("HotLapVecEnv collides with wall rectangles, not the track image")
+        self.walls = np.array([tuple(wall) for wall in self.track.walls], dtype=float).reshape(-1, 4)
+        self.count = count
+        self.batch = CarBatch(count, *self.track.spawn, params)
+        self.observer = Observer(self.track, self.batch.params, ray_angles, ray_length)
+        self.observation_size = self.observer.size
+        self.max_laps = max_laps
+        self.max_steps = int(max_seconds * PHYSICS_HZ)
+        self.dt = 1.0 / PHYSICS_HZ
+        self.checkpoint_segments = np.array([(*start, *end) for start, end in self.track.checkpoint_segments],
+                                            dtype=float).reshape(-1, 4)
+        start, end = self.track.start_line_segment
+        self.start_line_segment = np.array([(*start, *end)], dtype=float)
+
+        # Per-environment episode state
+        self.tick = np.zeros(count, dtype=np.int64)
+        self.next_checkpoint = np.zeros(count, dtype=np.int64)
+        self.lap_start = np.full(count, np.nan)   # NaN until the car first moves
+        self.laps_completed = np.zeros(count, dtype=np.int64)
+        self.position = np.zeros(count)
+
+    def observe(self) -> np.ndarray:
+        """Get the current (count, observation_size) observations and update positions along the track."""
+        batch = self.batch
+        observations, self.position = self.observer.observe(
+            batch.x + CAR_WIDTH / 2, batch.y + CAR_HEIGHT / 2, batch.angle, batch.velocity,
+            batch.angular_velocity, batch.rpm, batch.gear)
+        return observations
+
+    def reset_envs(self, mask: np.ndarray):
+        """Reset the environments selected by a boolean mask (without observing)."""
+        self.batch.reset(mask)
+        self.tick[mask] = 0
+        self.next_checkpoint[mask] = 0
+        self.lap_start[mask] = np.nan
+        self.laps_completed[mask] = 0
+
+    def reset(self) -> Tuple[np.ndarray, dict]:
+        """Start new episodes in every environment. Returns (observations, info)."""
+        self.reset_envs(np.ones(self.count, dtype=bool))
+        return self.observe(), {}
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+        """Apply a (count, 3) array of (throttle, brake, steer) for one physics step.
+        Returns (observations, rewards, terminated, truncated, info) arrays."""
+        batch = self.batch
+        dt = self.dt
+        actions = np.asarray(actions, dtype=float)
+        engine_active = batch.apply_input(actions[:, 0], actions[:, 1], actions[:, 2], dt)
+        self.tick += 1
+
+        # Start timing on first movement
+        starting = np.isnan(self.lap_start) & engine_active & (np.abs(batch.velocity) > 0.1)
+        self.lap_start[starting] = self.tick[starting] * dt
+
+        # Walls, then the screen edge, losing speed in contact (see get_contact_speed_keep)
+        center_x = batch.x + CAR_WIDTH / 2
+        center_y = batch.y + CAR_HEIGHT / 2
+        wall_collision = push_out_of_walls(center_x, center_y, batch.sin_angle, batch.cos_angle, self.walls)
+        batch.x = np.where(wall_collision, center_x - CAR_WIDTH / 2, batch.x)
+        batch.y = np.where(wall_collision, center_y - CAR_HEIGHT / 2, batch.y)
+        keep = np.where(batch.wall_contact, CONTACT_SPEED_KEEP ** (dt / REFERENCE_DT), CONTACT_SPEED_KEEP)
+        batch.velocity = np.where(wall_collision, batch.velocity * keep, batch.velocity)
+        batch.wall_contact = wall_collision
+        collision = wall_collision | batch.handle_screen_boundaries(dt)
+
+        # Checkpoints count in sequence; the line completes a lap once all are crossed
+        checkpoint_count = len(self.checkpoint_segments)
+        if checkpoint_count:
+            crossings = batch.get_line_crossings(self.checkpoint_segments)
+            pending = np.minimum(self.next_checkpoint, checkpoint_count - 1)
+            crossed = (self.next_checkpoint < checkpoint_count) & ~np.isnan(crossings[np.arange(self.count), pending])
+            self.next_checkpoint += crossed
+        line_crossing = batch.get_line_crossings(self.start_line_segment)[:, 0]
+        lap_completed = ~np.isnan(line_crossing) & ~np.isnan(self.lap_start) & (self.next_checkpoint == checkpoint_count)
+        crossing_time = (self.tick - 1 + line_crossing) * dt
+        lap_time = np.where(lap_completed, crossing_time - self.lap_start, np.nan)
+        self.lap_start = np.where(lap_completed, crossing_time, self.lap_start)
+        self.next_checkpoint[lap_completed] = 0
+        self.laps_completed += lap_completed
+
+        previous = self.position
+        observations = self.observe()
+        rewards = (self.observer.path.get_progress(previous, self.position) * PROGRESS_REWARD -
+                   COLLISION_PENALTY * collision + LAP_REWARD * lap_completed).astype(np.float32)
+        terminated = self.laps_completed >= self.max_laps
+        truncated = ~terminated & (self.tick >= self.max_steps)
+        info = {'lap_time': lap_time, 'laps_completed': self.laps_completed.copy(), 'collision': collision}
+
+        done = terminated | truncated
+        if done.any():
+            info['final_observation'] = observations.copy()
+            self.reset_envs(done)
+            observations = self.observe()
+        return observations, rewards, terminated, truncated, info
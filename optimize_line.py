@@ -0,0 +1,264 @@
+"""
+Hot LapY - Offline racing line optimizer
+
+Searches for the fastest racing line and speed profile of a track by driving
+the real car physics (Car.update_physics, wall collisions and lap timing via
+Simulation) with the AI's pure pursuit driver. The line is the track's fitted
+racing line, bent sideways by offsets at evenly spaced stations around the
+loop (smoothly interpolated between them), with a target speed scale per
+station. A parallel pattern search tries moving each parameter both ways in
+worker processes, keeps what improves the flying lap and halves its steps
+when nothing does.
+
+The search state is checkpointed after every iteration, so an interrupted or
+time-limited run picks up where it stopped when started again. The best line
+so far is written as a racing line file for the AI (hot_lap.py --racing-line)
+and, optionally, its lap as a ghost (save it as tracks/<name>.ghost to race it).
+
+Usage:
+    python optimize_line.py [--track PATH] [--output PATH] [--ghost PATH] [--stations 16]
+                            [--iterations 40] [--time-limit SECONDS] [--workers N] [--restart]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # One banner per worker otherwise
+
+from hot_lap import (DEFAULT_TRACK_PATH, LINE_SPACING, PHYSICS_HZ, PurePursuitDriver, RacingLine, Simulation, Track,
+                     resample_loop)
+
+
+MAX_LAP_SECONDS = 30.0       # A line that has not finished its laps by then scores infinity
+COLLISION_PENALTY = 0.05     # Seconds added per step spent touching a wall, so the AI drives clean
+MAX_OFFSET = 40.0            # Furthest the line may move sideways from the fitted line (pixels)
+SCALE_LIMITS = (0.7, 1.3)    # Range of the target speed scales
+INITIAL_STEPS = (8.0, 0.08)  # Starting offset (pixels) and speed scale steps
+MIN_OFFSET_STEP = 0.5        # The search has converged once the offset step falls below this
+CHECKPOINT_VERSION = 1
+
+# Per-process state, set up once by init_worker
+_track: Optional[Track] = None
+_base: Optional[RacingLine] = None
+
+
+def interpolate_loop(values: List[float], position: float) -> float:
+    """Interpolate a closed loop of station values at a fractional station position (Catmull-Rom)."""
+    count = len(values)
+    index = int(position)
+    t = position - index
+    a, b, c, d = (values[(index + offset) % count] for offset in (-1, 0, 1, 2))
+    return 0.5 * (2 * b + (c - a) * t + (2 * a - 5 * b + 4 * c - d) * t * t + (3 * b - a - 3 * c + d) * t * t * t)
+
+
+def build_line(base: RacingLine, offsets: List[float], scales: List[float]) -> RacingLine:
+    """Bend the base line sideways by the station offsets (positive to the right of the
+    direction of travel) and scale its target speeds by the station scales."""
+    stations = len(offsets)
+    points = []
+    for index, (x, y) in enumerate(base.points):
+        offset = interpolate_loop(offsets, index * stations / base.count)
+        heading = math.radians(base.headings[index])
+        points.append((x + offset * math.cos(heading), y + offset * math.sin(heading)))
+    line = RacingLine(resample_loop(points, LINE_SPACING), base.params)
+    line.speeds = [min(line.params.max_speed, speed * interpolate_loop(scales, index * stations / line.count))
+                   for index, speed in enumerate(line.speeds)]
+    return line
+
+
+def drive_line(track: Track, line: RacingLine) -> Tuple[Optional[float], int, Simulation]:
+    """Drive a standing-start lap and a flying lap on a line. Returns (flying lap time or
+    None, steps spent in collision, the simulation with the lap as its best_lap ghost)."""
+    simulation = Simulation(track)
+    driver = PurePursuitDriver(line)
+    laps = 0
+    collisions = 0
+    for _ in range(int(2 * MAX_LAP_SECONDS * PHYSICS_HZ)):
+        result = simulation.step(driver(simulation))
+        collisions += result.collision
+        if result.lap_completed:
+            laps += 1
+            if laps == 2:
+                return simulation.timer.last_lap_time, collisions, simulation
+    return None, collisions, simulation
+
+
+def get_score(lap_time: Optional[float], collisions: int) -> float:
+    """Score a drive: the flying lap time plus the collision penalty (lower is better)."""
+    return lap_time + COLLISION_PENALTY * collisions if lap_time is not None else math.inf
+
+
+def split_vector(vector: List[float]) -> Tuple[List[float], List[float]]:
+    """Split a search vector into its station offsets and speed scales."""
+    stations = len(vector) // 2
+    return vector[:stations], vector[stations:]
+
+
+def init_worker(track_path: str):
+    """Load the track and its fitted racing line once per worker process."""
+    global _track, _base
+    _track = Track.load(track_path)
+    _base = _track.get_racing_line()
+
+
+def evaluate(vector: Tuple[float, ...]) -> float:
+    """Score the line described by a search vector."""
+    lap_time, collisions, _ = drive_line(_track, build_line(_base, *split_vector(list(vector))))
+    return get_score(lap_time, collisions)
+
+
+def clamp(vector: List[float]) -> List[float]:
+    """Keep offsets within MAX_OFFSET and speed scales within SCALE_LIMITS."""
+    offsets, scales = split_vector(vector)
+    return ([max(-MAX_OFFSET, min(MAX_OFFSET, offset)) for offset in offsets] +
+            [max(SCALE_LIMITS[0], min(SCALE_LIMITS[1], scale)) for scale in scales])
+
+
+def get_key(base: RacingLine, stations: int) -> str:
+    """Identify the search problem, so a checkpoint is only resumed for the same track and settings."""
+    problem = (base.points, vars(base.params), stations, MAX_OFFSET, SCALE_LIMITS, COLLISION_PENALTY, PHYSICS_HZ)
+    return hashlib.blake2b(repr(problem).encode(), digest_size=16).hexdigest()
+
+
+def load_checkpoint(path: str, key: str) -> Optional[dict]:
+    """Read a checkpoint for this problem, or None if there is none (or it is for another problem)."""
+    try:
+        with open(path) as checkpoint_file:
+            state = json.load(checkpoint_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION or state.get('key') != key:
+        print(f"Ignoring {path}: it is for a different track or settings")
+        return None
+    return state
+
+
+def save_checkpoint(path: str, state: dict):
+    """Write the search state atomically, so an interruption never leaves a torn checkpoint."""
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, 'w') as checkpoint_file:
+        json.dump(state, checkpoint_file)
+    os.replace(temporary_path, path)
+
+
+def save_results(track: Track, base: RacingLine, vector: List[float], line_path: str, ghost_path: Optional[str]):
+    """Drive the best line once more and write it (and its lap as a ghost)."""
+    line = build_line(base, *split_vector(vector))
+    lap_time, _, simulation = drive_line(track, line)
+    line.save(line_path, lap_time)
+    if ghost_path and simulation.best_lap is not None:
+        simulation.best_lap.save(ghost_path)
+
+
+def search(executor: ProcessPoolExecutor, state: dict, iterations: int, deadline: float, on_iteration) -> bool:
+    """Run pattern search iterations on the state in place, calling on_iteration(state, improved)
+    after each. Returns True once the search has converged."""
+    while state['iteration'] < iterations and time.monotonic() < deadline:
+        vector = state['vector']
+        offset_step, scale_step = state['steps']
+        stations = len(vector) // 2
+        if offset_step < MIN_OFFSET_STEP:
+            return True
+
+        # Try each parameter one step either way
+        candidates = []
+        for index in range(len(vector)):
+            step = offset_step if index < stations else scale_step
+            for sign in (1, -1):
+                candidate = list(vector)
+                candidate[index] += sign * step
+                candidates.append(clamp(candidate))
+        scores = list(executor.map(evaluate, map(tuple, candidates), chunksize=max(1, len(candidates) // 32)))
+
+        # Combine every improving move (the better direction of each parameter) and keep the best
+        combined = list(vector)
+        for index in range(len(vector)):
+            plus, minus = scores[2 * index], scores[2 * index + 1]
+            if min(plus, minus) < state['best']:
+                combined[index] = candidates[2 * index if plus <= minus else 2 * index + 1][index]
+        if combined != vector:
+            candidates.append(combined)
+            scores.append(executor.submit(evaluate, tuple(combined)).result())
+        best_score = min(scores)
+        state['evaluations'] += len(candidates)
+        state['iteration'] += 1
+        improved = best_score < state['best']
+        if improved:
+            state['best'] = best_score
+            state['vector'] = candidates[scores.index(best_score)]
+        else:
+            state['steps'] = [offset_step / 2, scale_step / 2]
+        state['history'].append(state['best'])
+        on_iteration(state, improved)
+    return state['steps'][0] < MIN_OFFSET_STEP
+
+
+def main():
+    """Optimize the racing line of a track, resuming from its checkpoint if there is one."""
+    parser = argparse.ArgumentParser(description="Optimize a Hot LapY track's racing line with the car physics")
+    parser.add_argument('--track', default=DEFAULT_TRACK_PATH, help="track definition file")
+    parser.add_argument('--output', help="racing line file to write (default: next to the track, .line.json)")
+    parser.add_argument('--ghost', metavar='PATH', help="also save the optimized lap as a ghost file")
+    parser.add_argument('--stations', type=int, default=16, help="control stations around the loop")
+    parser.add_argument('--iterations', type=int, default=40, help="pattern search iterations (in total, when resuming)")
+    parser.add_argument('--time-limit', type=float, default=math.inf, metavar='SECONDS',
+                        help="stop after this long; run again to resume")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--restart', action='store_true', help="ignore any checkpoint and start from the fitted line")
+    args = parser.parse_args()
+
+    line_path = args.output or os.path.splitext(args.track)[0] + '.line.json'
+    checkpoint_path = line_path + '.checkpoint'
+    try:
+        if args.stations < 4:
+            raise ValueError("At least four stations are needed")
+        track = Track.load(args.track)   # Compile the track cache once, before the workers read it
+        base = track.get_racing_line()  # Likewise the fitted line
+    except (OSError, ValueError) as error:
+        print(f"Invalid optimization: {error}", file=sys.stderr)
+        return 1
+
+    key = get_key(base, args.stations)
+    state = None if args.restart else load_checkpoint(checkpoint_path, key)
+    if state is not None:
+        print(f"Resuming from {checkpoint_path}: iteration {state['iteration']}, best lap {state['best']:.3f}s")
+    else:
+        vector = [0.0] * args.stations + [1.0] * args.stations
+        lap_time, collisions, _ = drive_line(track, build_line(base, *split_vector(vector)))
+        state = {'version': CHECKPOINT_VERSION, 'key': key, 'vector': vector, 'steps': list(INITIAL_STEPS),
+                 'best': get_score(lap_time, collisions), 'iteration': 0, 'evaluations': 1, 'history': []}
+        print(f"Fitted line: {state['best']:.3f}s")
+    start_best = state['best']
+
+    def on_iteration(state: dict, improved: bool):
+        """Checkpoint, write an improved line and report progress."""
+        save_checkpoint(checkpoint_path, state)
+        if improved:
+            save_results(track, base, state['vector'], line_path, args.ghost)
+        print(f"  iteration {state['iteration']:>3}: best {state['best']:.3f}s, "
+              f"offset step {state['steps'][0]:.2f}px, {state['evaluations']} laps driven")
+
+    workers = max(1, args.workers or 1)
+    print(f"Optimizing {args.stations} stations over {workers} workers...")
+    start = time.perf_counter()
+    deadline = time.monotonic() + args.time_limit
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(args.track,)) as executor:
+        converged = search(executor, state, args.iterations, deadline, on_iteration)
+    elapsed = time.perf_counter() - start
+
+    save_results(track, base, state['vector'], line_path, args.ghost)
+    status = "converged" if converged else "stopped (run again to resume)"
+    print(f"{status.capitalize()} after {elapsed:.0f}s: {start_best:.3f}s -> {state['best']:.3f}s, "
+          f"line in {line_path}" + (f", ghost in {args.ghost}" if args.ghost else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Hot LapY - Replay runner
+
+Re-simulates a recorded session (``python hot_lap.py --record session.hlr``)
+through the headless Simulation at many times real-time and reports the lap
+times. The recording's final state checksum is compared against the replay,
+so any loss of tick-determinism in the physics shows up as a mismatch. The
+replay runs in the collision mode it was recorded in, and is refused on any
+track other than the one it was recorded on.
+
+Usage:
+    python replay.py session.hlr [--repeat N] [--track PATH]
+"""
+
+import argparse
+import sys
+import time
+
+from hot_lap import DEFAULT_TRACK_PATH, InputLog, Simulation, Track
+
+
+def main():
+    """Replay a recorded session and report lap times, speed and determinism."""
+    parser = argparse.ArgumentParser(description="Replay a recorded Hot LapY session headlessly")
+    parser.add_argument('path', help="replay file written with hot_lap.py --record")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="replay N times and check every run ends in the same state")
+    parser.add_argument('--track', metavar='PATH', default=DEFAULT_TRACK_PATH,
+                        help="track definition the session was recorded on")
+    args = parser.parse_args()
+
+    try:
+        log = InputLog.load(args.path)
+    except (OSError, ValueError) as error:
+        print(f"Could not load replay: {error}", file=sys.stderr)
+        return 1
+    try:
+        track = Track.load(args.track)
+    except (OSError, ValueError) as error:
+        print(f"Could not load track: {error}", file=sys.stderr)
+        return 1
+    if log.track_hash != track.source_hash:
+        print(f"The replay was recorded on another track (or an older version of {args.track}); "
+              "pass the track it was recorded on with --track", file=sys.stderr)
+        return 1
+
+    checksums = set()
+    matches = True
+    simulation = Simulation(track)
+    if log.image_collision:
+        from track_field import TrackField
+        track.use_image_collision(TrackField.load(track.image_path))
+    start = time.perf_counter()
+    for _ in range(max(1, args.repeat)):
+        matches = simulation.replay(log) and matches
+        checksums.add(simulation.get_state_checksum())
+    elapsed = (time.perf_counter() - start) / max(1, args.repeat)
+
+    recorded_seconds = log.tick_count * log.dt
+    print(f"Replayed {log.tick_count} ticks ({recorded_seconds:.1f}s of driving) in {elapsed * 1e3:.1f} ms "
+          f"({recorded_seconds / elapsed:.0f}x real time)")
+    print(f"Laps completed: {simulation.timer.lap_count - 1}")
+    if simulation.timer.best_time != float('inf'):
+        print(f"Best lap: {simulation.timer.best_time:.3f}s")
+
+    if len(checksums) > 1:
+        print("DESYNC: repeated replays ended in different states", file=sys.stderr)
+        return 1
+    if not matches:
+        print("DESYNC: replay does not match the recorded final state", file=sys.stderr)
+        return 1
+    if log.final_checksum is not None:
+        print("Final state matches the recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
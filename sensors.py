@@ -0,0 +1,185 @@
+"""
+Hot LapY - Ray-cast distance sensors
+
+Casts a fan of rays from each car and reports the distance to the nearest
+wall (or the screen edge) along each ray, for AI drivers, training
+observations and telemetry. All rays of all cars are cast in one batched
+NumPy call:
+
+- On wall tracks, rays walk the wall grid index cell by cell in lockstep and
+  are only slab-tested against the walls in the cells they pass through.
+- On image collision tracks, rays sphere-trace the track's distance field,
+  stepping by the clearance to the nearest road edge.
+"""
+
+from typing import List
+
+import numpy as np
+
+from hot_lap import CAR_HEIGHT, CAR_WIDTH, SCREEN_HEIGHT, SCREEN_WIDTH, Car, Track
+
+
+RAY_ANGLES = (-90.0, -45.0, -20.0, 0.0, 20.0, 45.0, 90.0)  # Degrees from the car's heading
+RAY_LENGTH = 250.0           # Rays report distances up to this many pixels
+GRID_MIN_WALLS = 128         # Below this many walls, testing every wall beats walking the grid
+MIN_TRACE_STEP = 0.5         # Smallest sphere-tracing step (pixels), so rays grazing an edge advance
+TRACE_MARGIN = 0.75          # Distances are sampled at pixel centers, up to ~0.71 px from the ray
+MAX_TRACE_STEPS = 96         # Sphere-tracing rays stop here, reporting how far they got
+
+
+def get_screen_exit(origin_x: np.ndarray, origin_y: np.ndarray, direction_x: np.ndarray,
+                    direction_y: np.ndarray) -> np.ndarray:
+    """Get the distance along each ray to the edge of the screen."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exit_x = np.where(direction_x > 0, SCREEN_WIDTH - origin_x, origin_x) / np.abs(direction_x)
+        exit_y = np.where(direction_y > 0, SCREEN_HEIGHT - origin_y, origin_y) / np.abs(direction_y)
+    return np.maximum(np.fmin(exit_x, exit_y), 0.0)
+
+
+def get_slab_hits(origin_x: np.ndarray, origin_y: np.ndarray, inverse_x: np.ndarray, inverse_y: np.ndarray,
+                  walls: np.ndarray) -> np.ndarray:
+    """Get the distance along rays to axis-aligned walls (rows of x, y, width, height, broadcast
+    against the rays), 0 for rays starting inside a wall and inf where a ray misses."""
+    with np.errstate(invalid='ignore'):
+        near_x = (walls[..., 0] - origin_x) * inverse_x
+        far_x = (walls[..., 0] + walls[..., 2] - origin_x) * inverse_x
+        near_y = (walls[..., 1] - origin_y) * inverse_y
+        far_y = (walls[..., 1] + walls[..., 3] - origin_y) * inverse_y
+        entry = np.maximum(np.minimum(near_x, far_x), np.minimum(near_y, far_y))
+        exit_distance = np.minimum(np.maximum(near_x, far_x), np.maximum(near_y, far_y))
+    return np.where((entry <= exit_distance) & (exit_distance >= 0), np.maximum(entry, 0.0), np.inf)
+
+
+class RaySensors:
+    """Casts rays at fixed angles from the center of cars on a track."""
+
+    def __init__(self, track: Track, angles: tuple = RAY_ANGLES, max_distance: float = RAY_LENGTH):
+        """Prepare the track's walls (or distance field) for batched casts. Angles are in degrees."""
+        self.offsets = np.radians(np.asarray(angles, dtype=float))
+        self.max_distance = max_distance
+        self.field = track.field
+
+        # Wall grid as a (rows, columns, slots) table of wall indices, -1 in unused slots
+        grid = track.wall_index
+        self.cell_size = grid.cell_size
+        self.columns = -(-SCREEN_WIDTH // grid.cell_size)
+        self.rows = -(-SCREEN_HEIGHT // grid.cell_size)
+        self.walls = np.array([tuple(wall) for wall in track.walls], dtype=float).reshape(-1, 4)
+        buckets = {cell: bucket for cell, bucket in grid.cells.items()
+                   if 0 <= cell[0] < self.columns and 0 <= cell[1] < self.rows}
+        slots = max((len(bucket) for bucket in buckets.values()), default=0)
+        self.cell_walls = np.full((self.rows, self.columns, max(slots, 1)), -1, dtype=np.int64)
+        for (cell_x, cell_y), bucket in buckets.items():
+            self.cell_walls[cell_y, cell_x, :len(bucket)] = bucket
+
+    def cast_rays(self, origin_x: np.ndarray, origin_y: np.ndarray, angles: np.ndarray) -> np.ndarray:
+        """Get the distance from each origin to the nearest wall or screen edge along rays at
+        the given angles (radians, Car.angle convention: 0 is up, clockwise positive),
+        clamped to max_distance. All arrays share one shape, which the result has too."""
+        shape = np.shape(angles)
+        origin_x = np.broadcast_to(origin_x, shape).ravel().astype(float)
+        origin_y = np.broadcast_to(origin_y, shape).ravel().astype(float)
+        angles = np.ravel(angles)
+        direction_x = np.sin(angles)
+        direction_y = -np.cos(angles)
+        limit = np.minimum(get_screen_exit(origin_x, origin_y, direction_x, direction_y), self.max_distance)
+
+        if self.field is not None:
+            distance = self.trace_field(origin_x, origin_y, direction_x, direction_y, limit)
+        elif len(self.walls) < GRID_MIN_WALLS:
+            distance = self.test_walls(origin_x, origin_y, direction_x, direction_y, limit)
+        else:
+            distance = self.walk_grid(origin_x, origin_y, direction_x, direction_y, limit)
+        return distance.reshape(shape)
+
+    def test_walls(self, origin_x: np.ndarray, origin_y: np.ndarray, direction_x: np.ndarray,
+                   direction_y: np.ndarray, limit: np.ndarray) -> np.ndarray:
+        """Cast rays against every wall in turn (fastest for a handful of walls)."""
+        distance = limit.copy()
+        with np.errstate(divide='ignore'):
+            inverse_x = 1.0 / direction_x
+            inverse_y = 1.0 / direction_y
+        for wall in self.walls:
+            np.minimum(distance, get_slab_hits(origin_x, origin_y, inverse_x, inverse_y, wall), out=distance)
+        return distance
+
+    def walk_grid(self, origin_x: np.ndarray, origin_y: np.ndarray, direction_x: np.ndarray,
+                  direction_y: np.ndarray, limit: np.ndarray) -> np.ndarray:
+        """Cast rays through the wall grid (a DDA walk, all rays one cell per iteration)."""
+        size = self.cell_size
+        distance = limit.copy()
+        if not len(self.walls):
+            return distance
+
+        with np.errstate(divide='ignore'):
+            inverse_x = 1.0 / direction_x
+            inverse_y = 1.0 / direction_y
+        cell_x = np.clip((origin_x // size).astype(np.int64), 0, self.columns - 1)
+        cell_y = np.clip((origin_y // size).astype(np.int64), 0, self.rows - 1)
+        step_x = np.where(direction_x > 0, 1, -1)
+        step_y = np.where(direction_y > 0, 1, -1)
+
+        # Distance along the ray to the next vertical and horizontal grid line, and between lines
+        with np.errstate(invalid='ignore'):
+            next_x = np.where(direction_x != 0, ((cell_x + (direction_x > 0)) * size - origin_x) * inverse_x, np.inf)
+            next_y = np.where(direction_y != 0, ((cell_y + (direction_y > 0)) * size - origin_y) * inverse_y, np.inf)
+        delta_x = np.abs(size * inverse_x)
+        delta_y = np.abs(size * inverse_y)
+
+        active = np.arange(len(distance))
+        while len(active):
+            # Test the walls of each ray's current cell
+            candidates = self.cell_walls[cell_y[active], cell_x[active]]
+            walls = self.walls[candidates]
+            hits = get_slab_hits(origin_x[active, None], origin_y[active, None],
+                                 inverse_x[active, None], inverse_y[active, None], walls)
+            hits = np.where(candidates >= 0, hits, np.inf).min(axis=1)
+            np.minimum(distance[active], hits, out=hits)
+            distance[active] = hits
+
+            # Rays are done once their nearest hit (or their end) comes before the next cell
+            cell_exit = np.minimum(next_x[active], next_y[active])
+            going = cell_exit < hits
+            active = active[going]
+            across_x = next_x[active] < next_y[active]
+            moving_x = active[across_x]
+            moving_y = active[~across_x]
+            cell_x[moving_x] += step_x[moving_x]
+            next_x[moving_x] += delta_x[moving_x]
+            cell_y[moving_y] += step_y[moving_y]
+            next_y[moving_y] += delta_y[moving_y]
+
+            # Cells past the grid lie beyond the screen edge, which ends the ray
+            inside = ((cell_x[active] >= 0) & (cell_x[active] < self.columns) &
+                      (cell_y[active] >= 0) & (cell_y[active] < self.rows))
+            active = active[inside]
+        return distance
+
+    def trace_field(self, origin_x: np.ndarray, origin_y: np.ndarray, direction_x: np.ndarray,
+                    direction_y: np.ndarray, limit: np.ndarray) -> np.ndarray:
+        """Cast rays by sphere tracing the distance field until they leave the road."""
+        field = self.field
+        distance = np.zeros(len(limit))
+        active = np.arange(len(limit))
+        for _ in range(MAX_TRACE_STEPS):
+            along = distance[active]
+            clearance = field.get_distances(origin_x[active] + direction_x[active] * along,
+                                            origin_y[active] + direction_y[active] * along)
+            going = clearance > 0
+            along = np.minimum(along + np.maximum(clearance - TRACE_MARGIN, MIN_TRACE_STEP), limit[active])
+            distance[active] = np.where(going, along, distance[active])
+            active = active[going & (along < limit[active])]
+            if not len(active):
+                break
+        return distance
+
+    def cast(self, center_x: np.ndarray, center_y: np.ndarray, heading: np.ndarray) -> np.ndarray:
+        """Get the (N, K) sensor readings for N cars given their centers and headings (degrees)."""
+        angles = np.radians(np.asarray(heading, dtype=float))[:, None] + self.offsets
+        return self.cast_rays(np.asarray(center_x, dtype=float)[:, None],
+                              np.asarray(center_y, dtype=float)[:, None], angles)
+
+    def read(self, car: Car) -> List[float]:
+        """Get the sensor readings for one car."""
+        return self.cast(np.array([car.x + CAR_WIDTH / 2]), np.array([car.y + CAR_HEIGHT / 2]),
+                         np.array([car.angle]))[0].tolist()
@@ -0,0 +1,139 @@
+"""
+Hot LapY - Car setup sweep
+
+Runs headless laps with a scripted waypoint driver for every combination of
+car parameters in a grid, spread over worker processes, and writes the lap
+times as columnar JSON (one list per parameter and per result), ready to
+load into any analysis tool without a CSV or Parquet dependency.
+
+Parameters are CarParams attribute names; gear table entries are written as
+table_gear (for example gear_ratios_5). Values are a comma-separated list or
+start:stop:count for evenly spaced values.
+
+Usage:
+    python sweep.py --param acceleration=0.03:0.06:4 --param gear_ratios_5=0.7,0.8,0.9
+                    [--laps 2] [--workers N] [--track PATH] [--output sweep.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # One banner per worker otherwise
+
+from hot_lap import DEFAULT_TRACK_PATH, PHYSICS_HZ, Car, CarParams, Simulation, Track, WaypointDriver
+
+
+MAX_LAP_SECONDS = 60.0   # Give up on a setup that has not finished a lap by then
+RESULT_COLUMNS = ('standing_lap', 'best_lap', 'laps_completed', 'wall_hits', 'ticks')
+
+# Per-process state, set up once by init_worker
+_track: Optional[Track] = None
+_laps = 0
+
+
+def parse_values(text: str) -> List[float]:
+    """Parse 'a,b,c' or 'start:stop:count' into a list of values."""
+    if ':' in text:
+        start, stop, count = text.split(':')
+        count = int(count)
+        if count < 2:
+            return [float(start)]
+        step = (float(stop) - float(start)) / (count - 1)
+        return [float(start) + step * index for index in range(count)]
+    return [float(value) for value in text.split(',')]
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[float]]:
+    """Parse name=values arguments, checking every name is a car parameter."""
+    grid = {}
+    for spec in specs:
+        name, separator, values = spec.partition('=')
+        if not separator:
+            raise ValueError(f"Expected name=values, got {spec!r}")
+        CarParams().replace(**{name: 0.0})  # Raises ValueError for unknown names
+        grid[name] = parse_values(values)
+    return grid
+
+
+def init_worker(track_path: str, laps: int):
+    """Load the track once per worker process."""
+    global _track, _laps
+    _track = Track.load(track_path)
+    _laps = laps
+
+
+def run_setup(changes: Dict[str, float]) -> Tuple:
+    """Drive the standing-start lap plus the requested flying laps with one setup."""
+    car = Car(*_track.spawn, CarParams().replace(**changes))
+    simulation = Simulation(_track, car)
+    driver = WaypointDriver(_track.waypoints)
+
+    lap_times = []
+    wall_hits = 0
+    max_ticks = int((_laps + 1) * MAX_LAP_SECONDS * PHYSICS_HZ)
+    ticks = 0
+    while ticks < max_ticks and len(lap_times) < _laps + 1:
+        result = simulation.step(driver(simulation))
+        ticks += 1
+        wall_hits += result.wall_collision
+        if result.lap_completed:
+            lap_times.append(simulation.timer.last_lap_time)
+
+    standing_lap = lap_times[0] if lap_times else None
+    best_lap = min(lap_times[1:]) if len(lap_times) > 1 else None
+    return standing_lap, best_lap, len(lap_times), wall_hits, ticks
+
+
+def main():
+    """Run the sweep and write columnar results."""
+    parser = argparse.ArgumentParser(description="Sweep Hot LapY car parameters over headless laps")
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help="parameter to sweep: comma list or start:stop:count (repeatable)")
+    parser.add_argument('--laps', type=int, default=2, help="flying laps per setup after the standing start")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--track', default=DEFAULT_TRACK_PATH, help="track definition file")
+    parser.add_argument('--output', default='sweep.json', help="columnar JSON results file")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.param)
+        Track.load(args.track)  # Compile the track cache once, before the workers read it
+    except (OSError, ValueError) as error:
+        print(f"Invalid sweep: {error}", file=sys.stderr)
+        return 1
+
+    names = list(grid)
+    setups = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    workers = max(1, args.workers or 1)
+    chunk_size = max(1, len(setups) // (workers * 8))
+    print(f"Sweeping {len(setups)} setups over {workers} workers...")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(args.track, args.laps)) as executor:
+        results = list(executor.map(run_setup, setups, chunksize=chunk_size))
+    elapsed = time.perf_counter() - start
+
+    columns = {name: [setup[name] for setup in setups] for name in names}
+    for index, column in enumerate(RESULT_COLUMNS):
+        columns[column] = [result[index] for result in results]
+    with open(args.output, 'w') as output_file:
+        json.dump({'track': args.track, 'laps': args.laps, 'physics_hz': PHYSICS_HZ,
+                   'rows': len(setups), 'columns': columns}, output_file)
+
+    print(f"Ran {len(setups)} setups in {elapsed:.1f}s ({len(setups) / elapsed * 60:.0f} setups/min), "
+          f"results in {args.output}")
+    finished = sorted((result[1], index) for index, result in enumerate(results) if result[1] is not None)
+    for lap_time, index in finished[:5]:
+        settings = ", ".join(f"{name}={setups[index][name]:g}" for name in names)
+        print(f"  {lap_time:.3f}s  {settings}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Hot LapY - Track collision from the track image
+
+Derives the drivable area from the track artwork instead of the hardcoded
+wall rectangles: road pixels (grey tarmac and white markings) are drivable,
+grass and kerbs are not. A signed distance field and its normals are
+precomputed once so collision depth and push-out direction are O(1) table
+lookups, and both are cached on disk keyed by a hash of the image file so
+startup stays fast after the first run.
+"""
+
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from hot_lap import CACHE_DIR
+
+
+MAX_DISTANCE = 64            # Distances are exact up to this many pixels and clamped beyond
+DRIVABLE_MAX_SATURATION = 40  # Road pixels are grey or white (max - min channel below this)
+PUSH_MARGIN = 0.5            # Extra push-out (pixels) so resolved cars do not re-touch next step
+
+
+def get_drivable_mask(surface: pygame.Surface) -> np.ndarray:
+    """Get a (height, width) bool array that is True on low-saturation (road) pixels."""
+    pixels = pygame.surfarray.array3d(surface).transpose(1, 0, 2).astype(np.int16)
+    saturation = pixels.max(axis=2) - pixels.min(axis=2)
+    return saturation < DRIVABLE_MAX_SATURATION
+
+
+def get_distance_to(features: np.ndarray, max_distance: int = MAX_DISTANCE) -> np.ndarray:
+    """Get the Euclidean distance from every pixel to the nearest True pixel of features,
+    exact up to max_distance and clamped to max_distance + 1 beyond.
+
+    Separable transform: first the distance to the nearest feature in the same column
+    (forward and backward scans), then per row the minimum of dx^2 + column distance^2
+    over the 2 * max_distance + 1 horizontal offsets that can still be in range.
+    """
+    height, width = features.shape
+    limit = max_distance + 1
+    rows = np.arange(height)[:, None]
+
+    # Nearest feature above and below in each column
+    above = np.where(features, rows, -height - limit)
+    np.maximum.accumulate(above, axis=0, out=above)
+    below = np.where(features, rows, 2 * height + limit)[::-1]
+    np.minimum.accumulate(below, axis=0, out=below)
+    column_distance = np.minimum(rows - above, below[::-1] - rows)
+    column_squared = np.minimum(column_distance, limit).astype(np.float32) ** 2
+
+    # Lower envelope along each row over nearby columns
+    squared = np.full((height, width), float(limit * limit), dtype=np.float32)
+    for offset in range(-max_distance, max_distance + 1):
+        if offset < 0:
+            candidate = column_squared[:, :offset] + offset * offset
+            np.minimum(squared[:, -offset:], candidate, out=squared[:, -offset:])
+        elif offset > 0:
+            candidate = column_squared[:, offset:] + offset * offset
+            np.minimum(squared[:, :-offset], candidate, out=squared[:, :-offset])
+        else:
+            np.minimum(squared, column_squared, out=squared)
+    return np.sqrt(squared)
+
+
+class TrackField:
+    """Drivable mask, signed distance field and wall normals of a track image.
+
+    distance is positive on the road (clearance to the nearest edge) and negative
+    off it (penetration depth); normals point towards the road.
+    """
+
+    VERSION = 1
+
+    def __init__(self, mask: np.ndarray, distance: np.ndarray, normal_x: np.ndarray, normal_y: np.ndarray):
+        """Wrap precomputed (height, width) arrays."""
+        self.mask = mask
+        self.distance = distance
+        self.normal_x = normal_x
+        self.normal_y = normal_y
+        self.height, self.width = mask.shape
+
+    @classmethod
+    def from_surface(cls, surface: pygame.Surface) -> 'TrackField':
+        """Build the mask, distance field and normals from track artwork."""
+        mask = get_drivable_mask(surface)
+        distance = (np.where(mask, get_distance_to(~mask), -get_distance_to(mask)) -
+                    np.where(mask, 0.5, -0.5)).astype(np.float32)  # Edge lies between pixel centers
+
+        gradient_y, gradient_x = np.gradient(distance)
+        length = np.hypot(gradient_x, gradient_y)
+        length[length == 0] = 1.0
+        return cls(mask, distance, (gradient_x / length).astype(np.float32),
+                   (gradient_y / length).astype(np.float32))
+
+    @classmethod
+    def load(cls, image_path: str, cache_dir: str = CACHE_DIR) -> 'TrackField':
+        """Get the field for a track image, from the disk cache when the image is unchanged."""
+        with open(image_path, 'rb') as image_file:
+            image_bytes = image_file.read()
+        key = hashlib.blake2b(image_bytes, digest_size=16)
+        key.update(f"{cls.VERSION}:{MAX_DISTANCE}:{DRIVABLE_MAX_SATURATION}".encode())
+        cache_path = os.path.join(cache_dir, f"track_field_{key.hexdigest()}.npz")
+
+        try:
+            with np.load(cache_path) as cached:
+                mask = np.unpackbits(cached['mask'], count=int(np.prod(cached['shape'])))
+                return cls(mask.reshape(cached['shape']).astype(bool), cached['distance'],
+                           cached['normal_x'], cached['normal_y'])
+        except (OSError, KeyError, ValueError):
+            pass  # Not cached yet (or unreadable): build it
+
+        field = cls.from_surface(pygame.image.load(image_path))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            temporary_path = cache_path + '.tmp.npz'
+            np.savez(temporary_path, shape=np.array(field.mask.shape), mask=np.packbits(field.mask),
+                     distance=field.distance, normal_x=field.normal_x, normal_y=field.normal_y)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            pass  # Read-only install: build again next time
+        return field
+
+    def get_distance(self, x: float, y: float) -> float:
+        """Get the signed distance to the road edge at a point (off the image counts as off road)."""
+        column, row = int(x), int(y)
+        if not (0 <= column < self.width and 0 <= row < self.height):
+            return -float(MAX_DISTANCE)
+        return float(self.distance[row, column])
+
+    def get_normal(self, x: float, y: float) -> Tuple[float, float]:
+        """Get the unit direction towards the road at a point."""
+        column = min(max(int(x), 0), self.width - 1)
+        row = min(max(int(y), 0), self.height - 1)
+        return float(self.normal_x[row, column]), float(self.normal_y[row, column])
+
+    def is_drivable(self, x: float, y: float) -> bool:
+        """Check whether a point is on the road."""
+        return self.get_distance(x, y) > 0
+
+    def get_distances(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Vectorized get_distance for arrays of points."""
+        columns = x.astype(np.int64)
+        rows = y.astype(np.int64)
+        inside = (columns >= 0) & (columns < self.width) & (rows >= 0) & (rows < self.height)
+        values = self.distance[np.clip(rows, 0, self.height - 1), np.clip(columns, 0, self.width - 1)]
+        return np.where(inside, values, -float(MAX_DISTANCE))
+
+    def get_push_out(self, points: List[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+        """Get the translation that moves the deepest off-road point back onto the road, or None."""
+        deepest = 0.0
+        deepest_point = None
+        for x, y in points:
+            distance = self.get_distance(x, y)
+            if distance < deepest:
+                deepest = distance
+                deepest_point = (x, y)
+        if deepest_point is None:
+            return None
+        normal_x, normal_y = self.get_normal(*deepest_point)
+        depth = PUSH_MARGIN - deepest
+        return normal_x * depth, normal_y * depth